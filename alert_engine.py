@@ -0,0 +1,245 @@
+"""
+Batch inventory alert engine for Medical Management System.
+
+Stock and expiry conditions are detected with a handful of set-based
+queries over ``medicines``, their lots in ``medicine_batches`` and
+``medical_equipment`` instead of evaluating
+model properties row by row on every page view. The results are reconciled
+against ``inventory_alerts`` so that each condition has exactly one alert:
+
+- new conditions are inserted in bulk;
+- alerts whose severity or message changed are updated in place, keeping
+  any acknowledgement;
+- alerts whose condition no longer holds are deleted, so the condition
+  raises a fresh alert if it comes back;
+- dismissed alerts (``is_active`` False) are left alone while their
+  condition persists, so dismissing one is not undone by the next run;
+- duplicate alerts for the same condition are collapsed to one.
+
+Run it from cron with ``flask refresh-alerts`` or set
+``ALERT_REFRESH_INTERVAL_SECONDS`` to refresh from a background thread.
+
+The alerts are notifications and may lag behind the stock until the next
+refresh. The inventory list and the dashboards therefore compute stock
+status from the current ``Medicine.quantity`` (``stock_statuses``,
+``low_stock_watchlist``), with the same ``stock_status`` expression the
+alerts are detected with. A medicine is low on stock at or below its
+``minimum_stock_level``; its ``reorder_point`` only raises the severity.
+"""
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, delete, func, insert, update
+
+from models import db, InventoryAlert, MedicalEquipment, Medicine, MedicineBatch
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPES = ('LOW_STOCK', 'OUT_OF_STOCK', 'EXPIRED', 'EXPIRING_SOON', 'MAINTENANCE_DUE')
+EXPIRING_SOON_DAYS = 30
+EXPIRING_URGENT_DAYS = 7
+
+
+def stock_status():
+    """SQL for a medicine's stock alert type: 'OUT_OF_STOCK', 'LOW_STOCK' or NULL."""
+    return case(
+        (Medicine.quantity <= 0, 'OUT_OF_STOCK'),
+        (Medicine.quantity <= Medicine.minimum_stock_level, 'LOW_STOCK'),
+    )
+
+
+def _lots(count):
+    return '1 lot' if count == 1 else f'{count} lots'
+
+
+def detect_conditions(today=None, expiring_within_days=EXPIRING_SOON_DAYS):
+    """
+    Find every alert-worthy condition with one query per alert type.
+
+    Args:
+        today (date): Reference date; defaults to the current date.
+        expiring_within_days (int): Window for EXPIRING_SOON alerts.
+
+    Returns:
+        dict: Maps (alert_type, medicine_id, equipment_id) to a
+              (severity, message) tuple.
+    """
+    today = today or date.today()
+    expiring_limit = today + timedelta(days=expiring_within_days)
+    conditions = {}
+
+    status = stock_status()
+    stock_levels = db.session.query(
+        Medicine.id, Medicine.name, Medicine.quantity, Medicine.reorder_point, status,
+    ).filter(status.isnot(None))
+    for medicine_id, name, quantity, reorder_point, alert_type in stock_levels:
+        if alert_type == 'OUT_OF_STOCK':
+            conditions[(alert_type, medicine_id, None)] = ('Critical', f'{name} is out of stock')
+        else:
+            severity = 'High' if quantity <= reorder_point else 'Medium'
+            conditions[(alert_type, medicine_id, None)] = (severity, f'{name} is low on stock ({quantity} left)')
+
+    # Expiry is tracked per lot; a medicine is flagged while any lot with stock left is affected
+    expired = db.session.query(
+        Medicine.id, Medicine.name, func.min(MedicineBatch.expiry_date),
+        func.count(MedicineBatch.id), func.sum(MedicineBatch.quantity),
+    ).join(MedicineBatch, MedicineBatch.medicine_id == Medicine.id).filter(
+        MedicineBatch.expiry_date < today,
+        MedicineBatch.quantity > 0,
+    ).group_by(Medicine.id, Medicine.name)
+    for medicine_id, name, expiry_date, lots, units in expired:
+        conditions[('EXPIRED', medicine_id, None)] = (
+            'Critical', f'{name}: {units} units in {_lots(lots)} expired (earliest {expiry_date.isoformat()})'
+        )
+
+    expiring = db.session.query(
+        Medicine.id, Medicine.name, func.min(MedicineBatch.expiry_date),
+        func.count(MedicineBatch.id), func.sum(MedicineBatch.quantity),
+    ).join(MedicineBatch, MedicineBatch.medicine_id == Medicine.id).filter(
+        MedicineBatch.expiry_date >= today,
+        MedicineBatch.expiry_date <= expiring_limit,
+        MedicineBatch.quantity > 0,
+    ).group_by(Medicine.id, Medicine.name)
+    for medicine_id, name, expiry_date, lots, units in expiring:
+        days_left = (expiry_date - today).days
+        severity = 'High' if days_left <= EXPIRING_URGENT_DAYS else 'Medium'
+        conditions[('EXPIRING_SOON', medicine_id, None)] = (
+            severity, f'{name}: {units} units in {_lots(lots)} expiring from {expiry_date.isoformat()} '
+                      f'({days_left} days left)'
+        )
+
+    maintenance_due = db.session.query(
+        MedicalEquipment.id, MedicalEquipment.name, MedicalEquipment.next_maintenance_date
+    ).filter(
+        MedicalEquipment.next_maintenance_date <= today,
+        MedicalEquipment.status != 'Retired',
+    )
+    for equipment_id, name, due_date in maintenance_due:
+        conditions[('MAINTENANCE_DUE', None, equipment_id)] = (
+            'High', f'{name} maintenance was due on {due_date.isoformat()}'
+        )
+
+    return conditions
+
+
+def refresh_alerts(today=None, expiring_within_days=EXPIRING_SOON_DAYS):
+    """
+    Reconcile ``inventory_alerts`` with the current inventory state.
+
+    Args:
+        today (date): Reference date; defaults to the current date.
+        expiring_within_days (int): Window for EXPIRING_SOON alerts.
+
+    Returns:
+        dict: Counts of 'created', 'updated' and 'resolved' alerts.
+    """
+    conditions = detect_conditions(today, expiring_within_days)
+
+    existing = db.session.query(
+        InventoryAlert.id,
+        InventoryAlert.alert_type,
+        InventoryAlert.medicine_id,
+        InventoryAlert.equipment_id,
+        InventoryAlert.severity,
+        InventoryAlert.message,
+        InventoryAlert.is_active,
+    ).filter(
+        InventoryAlert.alert_type.in_(ALERT_TYPES)
+    ).order_by(
+        InventoryAlert.is_active.desc(), InventoryAlert.id
+    ).all()
+
+    seen = set()
+    stale_ids = []
+    changed = []
+    for alert_id, alert_type, medicine_id, equipment_id, severity, message, is_active in existing:
+        key = (alert_type, medicine_id, equipment_id)
+        if key not in conditions or key in seen:
+            stale_ids.append(alert_id)
+            continue
+        seen.add(key)
+        if is_active and (severity, message) != conditions[key]:
+            changed.append({'id': alert_id, 'severity': conditions[key][0], 'message': conditions[key][1]})
+
+    now = datetime.utcnow()
+    new_alerts = [
+        {
+            'alert_type': alert_type,
+            'medicine_id': medicine_id,
+            'equipment_id': equipment_id,
+            'severity': severity,
+            'message': message,
+            'is_active': True,
+            'is_acknowledged': False,
+            'created_at': now,
+        }
+        for (alert_type, medicine_id, equipment_id), (severity, message) in conditions.items()
+        if (alert_type, medicine_id, equipment_id) not in seen
+    ]
+
+    if stale_ids:
+        db.session.execute(delete(InventoryAlert).where(InventoryAlert.id.in_(stale_ids)))
+    if changed:
+        db.session.execute(update(InventoryAlert), changed)
+    if new_alerts:
+        db.session.execute(insert(InventoryAlert), new_alerts)
+    db.session.commit()
+
+    return {'created': len(new_alerts), 'updated': len(changed), 'resolved': len(stale_ids)}
+
+
+def stock_statuses(medicine_ids):
+    """
+    The stock alert type of each of ``medicine_ids`` that is low or out of stock.
+
+    Computed from the current stock, so it is never behind the alert table.
+
+    Returns:
+        dict: Maps medicine id to 'OUT_OF_STOCK' or 'LOW_STOCK'.
+    """
+    if not medicine_ids:
+        return {}
+    status = stock_status()
+    return dict(db.session.query(Medicine.id, status).filter(Medicine.id.in_(medicine_ids), status.isnot(None)))
+
+
+def low_stock_watchlist():
+    """
+    Medicines that are low or out of stock, lowest stock first.
+
+    Returns:
+        list: Rows with name, batch_number, expiry_date and quantity.
+    """
+    return db.session.query(
+        Medicine.name, Medicine.batch_number, Medicine.expiry_date, Medicine.quantity,
+    ).filter(stock_status().isnot(None)).order_by(Medicine.quantity, Medicine.name).all()
+
+
+def start_alert_scheduler(app, interval_seconds):
+    """
+    Refresh alerts every ``interval_seconds`` from a daemon thread.
+
+    Every process that calls this runs its own refresher; that is safe
+    because refreshes are idempotent, but with several workers prefer the
+    ``flask refresh-alerts`` command from cron.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval_seconds):
+            with app.app_context():
+                try:
+                    logger.info('Alert refresh: %s', refresh_alerts())
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Alert refresh failed')
+
+    thread = threading.Thread(target=run, name='alert-refresh', daemon=True)
+    thread.stop = stop
+    thread.start()
+    return thread
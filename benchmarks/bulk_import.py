@@ -0,0 +1,90 @@
+"""
+Benchmark for the CSV/XLSX bulk import.
+
+Writes a medicines file and a file of purchase invoice lines (CSV, or XLSX
+with ``--xlsx``) to a temporary directory, imports both into an in-memory
+SQLite database with ``bulk_import.run_import`` and reports rows per
+second. Each file is then imported a second time to check nothing is added
+on a re-run, and the stock is checked against the stock movement ledger.
+
+Usage:
+    python benchmarks/bulk_import.py [--medicines 5000] [--purchase-lines 50000] [--xlsx]
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+from datetime import date, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from app import app
+import bulk_import
+from models import db
+from stock_ledger import stock_discrepancies
+
+
+def write_rows(path, header, rows):
+    if path.endswith('.xlsx'):
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(header)
+        for row in rows:
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+
+
+def write_files(directory, medicine_count, line_count, extension):
+    rnd = random.Random(42)
+    expiry = date.today() + timedelta(days=400)
+    medicines = os.path.join(directory, f'medicines.{extension}')
+    write_rows(medicines, ['Name', 'Batch Number', 'Category', 'Expiry Date', 'Price', 'GST Percent', 'Quantity',
+                           'Cost Price', 'Supplier'], (
+        [f'Medicine {i}', f'B{i}', 'General', expiry.isoformat(), 10.0, 12, 50, 7.5, f'Supplier {i % 20}']
+        for i in range(medicine_count)
+    ))
+    purchases = os.path.join(directory, f'purchases.{extension}')
+    write_rows(purchases, ['Supplier', 'Invoice Number', 'Invoice Date', 'Medicine', 'Batch Number', 'Expiry Date',
+                           'Quantity', 'Price Per Unit'], (
+        [f'Supplier {n // 20 % 20}', f'INV{n // 20}', (date.today() - timedelta(days=n // 2000)).isoformat(),
+         f'Medicine {rnd.randrange(medicine_count)}', f'L{n // 5000}', expiry.isoformat(), rnd.randint(1, 50), 7.5]
+        for n in range(line_count)
+    ))
+    return medicines, purchases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--medicines', type=int, default=5000)
+    parser.add_argument('--purchase-lines', type=int, default=50000)
+    parser.add_argument('--xlsx', action='store_true', help='Import XLSX files instead of CSV.')
+    args = parser.parse_args()
+
+    with app.app_context(), tempfile.TemporaryDirectory() as directory:
+        db.create_all()
+        files = write_files(directory, args.medicines, args.purchase_lines, 'xlsx' if args.xlsx else 'csv')
+        for kind, path in zip(('medicines', 'purchases'), files):
+            report = bulk_import.run_import(kind, path)
+            print(f'{report.summary()} in {report.elapsed:.1f}s')
+            assert not report.invalid, report.errors
+            rerun = bulk_import.run_import(kind, path)
+            print(f're-run: {rerun.summary()}')
+            assert rerun.inserted == 0
+        assert not stock_discrepancies()
+        print('Re-runs imported nothing; stock matches the ledger.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark the in-memory catalog index against the SQL LIKE search.
+
+Seeds an in-memory SQLite database with a synthetic medicine catalogue,
+builds ``catalog.CatalogIndex`` and times ranked fuzzy lookups (exact and
+mistyped names, manufacturers, batch numbers) against the
+``Medicine.name.like('%term%')`` filter ``inventory()`` used before. Also
+times an incremental refresh after a batch of edits.
+
+Usage:
+    python benchmarks/catalog_search.py [--medicines 50000] [--edits 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import insert, update
+
+from app import app
+from catalog import CatalogIndex
+from models import db, Medicine
+
+CONSONANTS = 'bcdfghklmnprstvxz'
+VOWELS = 'aeiou'
+SUFFIXES = ['ol', 'in', 'ide', 'ate', 'ine', 'one', 'ex', 'an', 'cin', 'pril', 'statin', 'zole', 'mab', 'vir']
+MANUFACTURERS = ['Cipla', 'Sun Pharma', 'Dr Reddys', 'Lupin', 'Mankind', 'Zydus', 'Glenmark', 'Alkem']
+CATEGORIES = ['Tablet', 'Capsule', 'Syrup', 'Injection', 'Ointment', 'Drops']
+STRENGTHS = ['50mg', '100mg', '250mg', '500mg', '650mg', '5ml', '10ml']
+KNOWN = ['paracetamol', 'amoxicillin', 'azithromycin', 'atorvastatin', 'pantoprazole', 'metformin']
+
+
+def brand_name(rnd):
+    syllables = [rnd.choice(CONSONANTS) + rnd.choice(VOWELS) for _ in range(rnd.randint(2, 3))]
+    return ''.join(syllables) + rnd.choice(SUFFIXES)
+
+
+def mistype(word, rnd):
+    """Drop or swap one letter, as a hurried pharmacist would."""
+    i = rnd.randrange(1, len(word) - 1)
+    if rnd.random() < 0.5:
+        return word[:i] + word[i + 1:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def seed(count):
+    """Bulk insert a synthetic catalogue; returns (term, kind, intended id) to look up."""
+    rnd = random.Random(11)
+    rows = []
+    for i in range(1, count + 1):
+        stem = KNOWN[i // 500 % len(KNOWN)] if i % 500 == 0 else brand_name(rnd)
+        rows.append({
+            'id': i,
+            'name': f'{stem.title()} {rnd.choice(STRENGTHS)}',
+            'batch_number': f'B{i:05d}',
+            'category': rnd.choice(CATEGORIES),
+            'manufacturer': rnd.choice(MANUFACTURERS),
+            'quantity': rnd.randint(0, 500),
+            'expiry_date': date.today() + timedelta(days=rnd.randint(-30, 720)),
+            'price': 10.0,
+            'gst_percent': 12.0,
+            'updated_at': datetime.utcnow() - timedelta(minutes=rnd.randint(10, 525600)),
+        })
+    db.session.execute(insert(Medicine), rows)
+    db.session.commit()
+
+    terms = [('paracetamol', 'exact', None), ('paracetmol', 'typo', None), ('amoxicilin', 'typo', None)]
+    for row in rnd.sample(rows, 4):
+        stem = row['name'].split()[0].lower()
+        terms += [(stem, 'exact', row['id']), (mistype(stem, rnd), 'typo', row['id'])]
+    return terms + [('glenmark', 'manufacturer', None), ('b00042', 'batch', 42)]
+
+
+def like_search(term, limit=50):
+    """Reference implementation: the substring filter inventory() used."""
+    return db.session.query(Medicine.id).filter(Medicine.name.like(f'%{term}%'))\
+                     .order_by(Medicine.name).limit(limit).all()
+
+
+def timed(fn, *args, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--medicines', type=int, default=50000)
+    parser.add_argument('--edits', type=int, default=500)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        terms = seed(args.medicines)
+
+        index = CatalogIndex()
+        started = time.perf_counter()
+        index.load()
+        print(f'Indexed {len(index.slot_of)} medicines in {(time.perf_counter() - started) * 1000:.0f} ms, '
+              f'{len(index.name_postings.keys() | index.other_postings.keys())} distinct trigrams')
+
+        print(f'{"term":<14} {"kind":<13} {"index hits":>10} {"index ms":>9} {"in top 5":>8} '
+              f'{"like hits":>9} {"like ms":>8}')
+        for term, kind, intended in terms:
+            ranked, elapsed = timed(index.search, term)
+            liked, like_elapsed = timed(like_search, term, repeat=5)
+            top = '-' if intended is None else ('yes' if intended in [i for i, _ in ranked[:5]] else 'NO')
+            print(f'{term:<14} {kind:<13} {len(ranked):>10} {elapsed:>9.2f} {top:>8} '
+                  f'{len(liked):>9} {like_elapsed:>8.2f}')
+
+        edited = random.Random(3).sample(range(1, args.medicines + 1), args.edits)
+        db.session.execute(update(Medicine).where(Medicine.id.in_(edited)).values(
+            name=Medicine.name + ' Forte', updated_at=datetime.utcnow(),
+        ))
+        db.session.commit()
+        _, refresh_elapsed = timed(index.refresh, repeat=1)
+        print(f'Incremental refresh after {args.edits} edits: {refresh_elapsed:.1f} ms '
+              f'({index.dead} tombstoned slots)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark FEFO stock allocation as the number of lots grows.
+
+Seeds an in-memory SQLite database with a catalogue whose lots accumulate
+the way a pharmacy's do (most older lots sold out, a few per medicine
+still holding stock) and times ``stock_ledger.allocate_stock`` for small
+counter baskets. Each allocation is rolled back so every run sees the same
+data. Latency should stay flat as the lot table grows.
+
+Usage:
+    python benchmarks/fefo_allocation.py [--medicines 500] [--lots 1000 10000 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import func, insert
+
+from app import app
+from models import db, Medicine, MedicineBatch
+from stock_ledger import allocate_stock
+
+
+def seed(medicine_count, lot_count, live_share=0.1):
+    """Catalogue of ``medicine_count`` medicines sharing ``lot_count`` lots."""
+    rnd = random.Random(5)
+    today = date.today()
+    db.drop_all()
+    db.create_all()
+    lots = []
+    for i in range(lot_count):
+        medicine_id = i % medicine_count + 1
+        live = rnd.random() < live_share or i < medicine_count
+        lots.append({
+            'medicine_id': medicine_id,
+            'batch_number': f'L{i}',
+            'expiry_date': today + timedelta(days=rnd.randint(-400, 900)),
+            'quantity': rnd.randint(20, 200) if live else 0,
+        })
+    totals = {}
+    for lot in lots:
+        if lot['expiry_date'] >= today:
+            totals[lot['medicine_id']] = totals.get(lot['medicine_id'], 0) + lot['quantity']
+    db.session.execute(insert(Medicine), [{
+        'id': medicine_id,
+        'name': f'Medicine {medicine_id}',
+        'batch_number': f'L{medicine_id - 1}',
+        'category': 'General',
+        'quantity': 0,
+        'expiry_date': today + timedelta(days=365),
+        'price': 10.0,
+        'gst_percent': 12.0,
+    } for medicine_id in range(1, medicine_count + 1)])
+    db.session.execute(insert(MedicineBatch), lots)
+    # Medicine totals include expired lots, as they do in production
+    db.session.execute(
+        Medicine.__table__.update().values(quantity=(
+            db.select(func.sum(MedicineBatch.quantity))
+            .where(MedicineBatch.medicine_id == Medicine.id)
+            .scalar_subquery()
+        ))
+    )
+    db.session.commit()
+    return [medicine_id for medicine_id, total in totals.items() if total >= 10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--medicines', type=int, default=500)
+    parser.add_argument('--lots', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--baskets', type=int, default=300)
+    args = parser.parse_args()
+
+    print(f'{"lots":>8} {"baskets":>8} {"mean ms":>8} {"p95 ms":>8}')
+    with app.app_context():
+        for lot_count in args.lots:
+            sellable = seed(args.medicines, lot_count)
+            rnd = random.Random(9)
+            timings = []
+            for _ in range(args.baskets):
+                basket = [(medicine_id, rnd.randint(1, 10)) for medicine_id in rnd.sample(sellable, 3)]
+                started = time.perf_counter()
+                allocate_stock(basket)
+                timings.append((time.perf_counter() - started) * 1000)
+                db.session.rollback()
+            timings.sort()
+            mean = sum(timings) / len(timings)
+            p95 = timings[int(len(timings) * 0.95)]
+            print(f'{lot_count:>8} {len(timings):>8} {mean:>8.2f} {p95:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
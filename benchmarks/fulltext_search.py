@@ -0,0 +1,119 @@
+"""
+Benchmark full-text patient search over a large medical history table.
+
+Seeds an in-memory SQLite database with synthetic patients and visits,
+builds the FTS5 search tables and times ``fulltext.search_patients``
+against the ``ilike('%term%')`` scan it replaces (patient columns plus
+diagnosis/symptoms/notes of every visit). Point DATABASE_URL at a scratch
+PostgreSQL database to time the GIN index instead.
+
+Usage:
+    python benchmarks/fulltext_search.py [--visits 1000000] [--patients 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import insert, or_
+
+import fulltext
+from app import app
+from models import db, MedicalHistory, Patient
+
+FIRST_NAMES = ['Asha', 'Ravi', 'John', 'Maria', 'Wei', 'Fatima', 'Carlos', 'Priya', 'Liam', 'Noor']
+LAST_NAMES = ['Reddy', 'Smith', 'Garcia', 'Chen', 'Khan', 'Patel', 'Brown', 'Silva', 'Rao', 'Ahmed']
+DIAGNOSES = [
+    'Type 2 diabetes mellitus', 'Essential hypertension', 'Acute bronchitis', 'Migraine without aura',
+    'Iron deficiency anaemia', 'Seasonal influenza', 'Gastroesophageal reflux', 'Osteoarthritis of knee',
+    'Urinary tract infection', 'Allergic rhinitis', 'Hypothyroidism', 'Lumbar strain',
+]
+SYMPTOMS = [
+    'fever', 'cough', 'headache', 'fatigue', 'nausea', 'dizziness', 'joint pain', 'sore throat',
+    'shortness of breath', 'chest tightness', 'frequent urination', 'sneezing', 'heartburn',
+]
+TERMS = ['diabetes', 'bronch', 'migraine aura', 'heartburn reflux', 'Chen', 'Priya Rao', 'hypothyroid']
+
+
+def seed(patient_count, visit_count, batch=50000):
+    """Bulk insert patients and visits, then fill the search tables."""
+    rnd = random.Random(7)
+    db.session.execute(insert(Patient), [{
+        'id': i,
+        'first_name': rnd.choice(FIRST_NAMES),
+        'last_name': rnd.choice(LAST_NAMES),
+        'date_of_birth': date(1950, 1, 1) + timedelta(days=rnd.randint(0, 25000)),
+        'gender': rnd.choice(['Male', 'Female']),
+        'phone_number': f'9{i:09d}',
+        'email': f'patient{i}@example.com',
+    } for i in range(1, patient_count + 1)])
+    for start in range(0, visit_count, batch):
+        db.session.execute(insert(MedicalHistory), [{
+            'patient_id': rnd.randint(1, patient_count),
+            'visit_date': date.today() - timedelta(days=rnd.randint(0, 3650)),
+            'diagnosis': rnd.choice(DIAGNOSES),
+            'symptoms': ', '.join(rnd.sample(SYMPTOMS, 3)),
+            'notes': f'Follow-up in {rnd.randint(1, 12)} weeks',
+        } for _ in range(start, min(start + batch, visit_count))])
+    db.session.commit()
+
+    started = time.perf_counter()
+    fulltext.rebuild(db.session.connection())
+    db.session.commit()
+    return (time.perf_counter() - started) * 1000
+
+
+def ilike_patients(term, limit=200):
+    """Reference implementation: substring scan over patients and their visits."""
+    like_pattern = f'%{term}%'
+    return db.session.query(Patient.id).outerjoin(MedicalHistory).filter(or_(
+        Patient.first_name.ilike(like_pattern),
+        Patient.last_name.ilike(like_pattern),
+        Patient.phone_number.ilike(like_pattern),
+        Patient.email.ilike(like_pattern),
+        MedicalHistory.diagnosis.ilike(like_pattern),
+        MedicalHistory.symptoms.ilike(like_pattern),
+        MedicalHistory.notes.ilike(like_pattern),
+    )).distinct().limit(limit).all()
+
+
+def timed(fn, *args, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--visits', type=int, default=1000000)
+    parser.add_argument('--patients', type=int, default=100000)
+    parser.add_argument('--skip-ilike', action='store_true', help='Do not time the ilike scan')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        build_ms = seed(args.patients, args.visits)
+        print(f'Seeded {args.patients} patients / {args.visits} visits; index build {build_ms:.0f} ms')
+        print(f'{"term":<20} {"matches":>8} {"fulltext ms":>12} {"ilike ms":>10}')
+        for term in TERMS:
+            ranked, elapsed = timed(fulltext.search_patients, term)
+            line = f'{term:<20} {len(ranked):>8} {elapsed:>12.1f}'
+            # ilike cannot match multi-word terms spread across columns, so only time single words
+            if not args.skip_ilike and ' ' not in term:
+                _, legacy_elapsed = timed(ilike_patients, term, repeat=1)
+                line += f' {legacy_elapsed:>10.1f}'
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Measure what importing the application costs a web worker.
+
+Runs ``python -X importtime -c "import wsgi"`` (the module gunicorn loads)
+in a fresh interpreter a few times and reports the best total and the
+heaviest top-level imports. Fails (exit status 1) if the import pulls in a
+module that should only load on first use, such as WeasyPrint, openpyxl
+or Alembic, or if it takes longer than ``--budget-ms``, so it can run as a
+CI check.
+
+The import runs as gunicorn would: the pre-start step and background
+threads are left to ``gunicorn.conf.py``.
+
+Usage:
+    python benchmarks/import_time.py [--module wsgi] [--runs 5] [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Loaded on first use only; none of these may appear in a worker's import
+DEFERRED = ('weasyprint', 'openpyxl', 'alembic', 'flask_migrate')
+
+LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def measure(module):
+    """One cold import of ``module``; returns {module name: (self us, cumulative us, depth)}."""
+    env = dict(os.environ, RUN_MIGRATIONS='0', MAIL_QUEUE_POLL_SECONDS='0', ALERT_REFRESH_INTERVAL_SECONDS='0')
+    env.setdefault('FLASK_ENV', 'development')
+    env.setdefault('DATABASE_URL', f'sqlite:///{tempfile.mkdtemp()}/import_time.db')
+    # Importing gunicorn first makes wsgi.py behave as it does under gunicorn
+    code = f'import gunicorn, sys; sys.path.insert(0, {ROOT!r}); import {module}'
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit(result.stderr[-2000:])
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            timings[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--module', default='wsgi')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda timings: timings[args.module][1])
+    total_ms = best[args.module][1] / 1000
+
+    print(f'import {args.module}: best of {args.runs} = {total_ms:.0f} ms '
+          f'(runs: {", ".join(f"{timings[args.module][1] / 1000:.0f}" for timings in runs)})')
+    print(f'{"module":<32} {"cumulative ms":>14} {"self ms":>8}')
+    # Direct imports of the module and their own direct imports (app's modules)
+    top_level = sorted(
+        ((name, timing) for name, timing in best.items() if 1 <= timing[2] <= 2),
+        key=lambda item: -item[1][1],
+    )
+    for name, (self_us, cumulative_us, _) in top_level[:args.top]:
+        print(f'{name:<32} {cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}')
+
+    failures = [f'{name} is imported eagerly' for name in DEFERRED
+                if any(module == name or module.startswith(name + '.') for module in best)]
+    if total_ms > args.budget_ms:
+        failures.append(f'import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget')
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Load benchmark for the dashboard, inventory and checkout routes.
+
+Seeds a scratch database, starts gunicorn with the settings from
+``gunicorn.conf.py`` / ``deploy_profile.py`` and drives it with a simple
+threaded client: each client logs in once, then loops over the dashboard,
+inventory listing and search, and a one-line sale checkout over a
+keep-alive connection. Prints throughput and p50/p99 latency per route.
+
+Pass profile settings through the environment to compare configurations:
+
+    python benchmarks/load_test.py --clients 32
+    GUNICORN_WORKER_CLASS=sync WEB_CONCURRENCY=4 python benchmarks/load_test.py --clients 32
+    DATABASE_URL=postgresql://... GUNICORN_THREADS=8 python benchmarks/load_test.py
+
+Usage:
+    python benchmarks/load_test.py [--clients 16] [--duration 20] [--medicines 5000] [--sales 20000]
+                                   [--url http://host:port (use a running server; skips seeding)]
+"""
+
+import argparse
+import http.client
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+CSRF = re.compile(r'name="csrf_token" type="hidden" value="([^"]+)"')
+# Route mix per client iteration: (label, weight)
+ROUTES = [('dashboard', 2), ('inventory', 3), ('inventory search', 2), ('checkout', 2)]
+SEARCH_TERMS = ['para', 'amox', 'cetir', 'ome', 'ator', 'met', 'azi', 'pan']
+
+
+def seed(medicine_count, sale_count):
+    """Fill the scratch database named by DATABASE_URL."""
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import insert
+
+    from app import app, create_default_admin
+    from models import db, Customer, Medicine, Sale, SaleItem
+    from stock_ledger import backfill_batches
+
+    rnd = random.Random(3)
+    with app.app_context():
+        db.create_all()
+        create_default_admin()
+        db.session.execute(insert(Customer), [
+            {'id': i, 'name': f'Customer {i}', 'phone_number': f'98{i:08d}'} for i in range(1, 201)
+        ])
+        db.session.execute(insert(Medicine), [{
+            'id': i,
+            'name': f'{rnd.choice(SEARCH_TERMS).title()}{rnd.choice("abcdefgh")}in {i}',
+            'batch_number': f'B{i:05d}',
+            'category': rnd.choice(['Tablet', 'Capsule', 'Syrup']),
+            'quantity': 1000000,
+            'expiry_date': date.today() + timedelta(days=rnd.randint(60, 900)),
+            'price': round(rnd.uniform(5, 500), 2),
+            'gst_percent': 12.0,
+        } for i in range(1, medicine_count + 1)])
+        backfill_batches()
+        for start in range(0, sale_count, 5000):
+            count = min(5000, sale_count - start)
+            db.session.execute(insert(Sale), [{
+                'id': start + i + 1,
+                'customer_id': rnd.randint(1, 200),
+                'total_amount': 100.0,
+                'gst_amount': 12.0,
+                'created_at': datetime.utcnow() - timedelta(minutes=rnd.randint(0, 60 * 24 * 90)),
+            } for i in range(count)])
+            db.session.execute(insert(SaleItem), [{
+                'sale_id': start + i + 1,
+                'medicine_id': rnd.randint(1, medicine_count),
+                'quantity': 1,
+                'dispensed_quantity': 1,
+                'price_per_unit': 100.0,
+            } for i in range(count)])
+        db.session.commit()
+
+
+class Client:
+    """One logged-in user on a keep-alive connection."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        self.cookies = {}
+
+    def request(self, method, path, form=None):
+        headers = {'Cookie': '; '.join(f'{k}={v}' for k, v in self.cookies.items())}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        data = response.read()
+        for header in response.headers.get_all('Set-Cookie') or ():
+            name, _, rest = header.partition('=')
+            self.cookies[name] = rest.split(';', 1)[0]
+        return response.status, data.decode('utf-8', 'replace')
+
+    def login(self):
+        _, page = self.request('GET', '/login')
+        status, _ = self.request('POST', '/login', {
+            'csrf_token': CSRF.search(page).group(1), 'username': 'Admin', 'password': 'Admin@13',
+        })
+        if status != 302:
+            raise RuntimeError(f'login failed ({status})')
+        _, page = self.request('GET', '/sales')
+        self.csrf_token = CSRF.search(page).group(1)
+
+
+def run_client(url, deadline, medicine_count, samples, errors, rnd):
+    client = Client(url)
+    client.login()
+    routes = [label for label, weight in ROUTES for _ in range(weight)]
+    while time.perf_counter() < deadline:
+        label = rnd.choice(routes)
+        if label == 'dashboard':
+            method, path, form, expected = 'GET', '/', None, 200
+        elif label == 'inventory':
+            method, path, form, expected = 'GET', '/inventory', None, 200
+        elif label == 'inventory search':
+            method, path, form, expected = 'GET', f'/inventory?query={rnd.choice(SEARCH_TERMS)}', None, 200
+        else:
+            method, path, expected = 'POST', '/sales', 302
+            form = {
+                'csrf_token': client.csrf_token,
+                'items-0-csrf_token': client.csrf_token,
+                'customer': rnd.randint(1, 200),
+                'items-0-medicine': rnd.randint(1, medicine_count),
+                'items-0-quantity': rnd.randint(1, 3),
+            }
+        started = time.perf_counter()
+        try:
+            status, _ = client.request(method, path, form)
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            client.connection.close()
+        elapsed = (time.perf_counter() - started) * 1000
+        if status == expected:
+            samples[label].append(elapsed)
+        else:
+            errors[label] = errors.get(label, 0) + 1
+
+
+def wait_for(url, timeout=60):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((parts.hostname, parts.port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server at {url} did not start')
+
+
+def percentile(values, share):
+    return values[min(int(len(values) * share), len(values) - 1)] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--medicines', type=int, default=5000)
+    parser.add_argument('--sales', type=int, default=20000)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help='Benchmark an already running server instead')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = args.url
+    else:
+        env = dict(os.environ, FLASK_ENV='development', PORT=str(args.port), RUN_MIGRATIONS='0',
+                   MAIL_QUEUE_POLL_SECONDS='0', ALERT_REFRESH_INTERVAL_SECONDS='0')
+        if not os.environ.get('DATABASE_URL'):
+            env['DATABASE_URL'] = f'sqlite:///{tempfile.mkdtemp()}/load_test.db'
+        os.environ.update(env)
+        seed(args.medicines, args.sales)
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'wsgi:application'], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        wait_for(url)
+        if server is not None:
+            sys.path.insert(0, ROOT)
+            from deploy_profile import build_profile
+            profile = build_profile()
+            print(f"gunicorn: {profile['workers']} {profile['worker_class']} workers x {profile['threads']} "
+                  f"threads, pool {profile['pool_size']} + {profile['max_overflow']}")
+
+        samples = {label: [] for label, _ in ROUTES}
+        errors = {}
+        deadline = time.perf_counter() + args.duration
+        threads = [
+            threading.Thread(target=run_client, args=(url, deadline, args.medicines, samples, errors,
+                                                      random.Random(i)))
+            for i in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f'{args.clients} clients for {elapsed:.1f}s')
+    print(f'{"route":<18} {"requests":>9} {"req/s":>8} {"p50 ms":>8} {"p99 ms":>8} {"errors":>7}')
+    total = 0
+    for label, _ in ROUTES:
+        values = sorted(samples[label])
+        total += len(values)
+        print(f'{label:<18} {len(values):>9} {len(values) / elapsed:>8.1f} {percentile(values, 0.5):>8.1f} '
+              f'{percentile(values, 0.99):>8.1f} {errors.get(label, 0):>7}')
+    print(f'{"total":<18} {total:>9} {total / elapsed:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
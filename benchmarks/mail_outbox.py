@@ -0,0 +1,89 @@
+"""
+Benchmark the email outbox against sending mail inside the request.
+
+Starts the local SMTP stand-in (``smtp_stand_in``) so that it takes
+``--smtp-delay-ms`` to accept each message and answers every
+``--reject-every``-th one with a temporary 451 error. It then compares:
+
+- the old request path: ``mail.send()`` per message, one SMTP session each;
+- the new request path: ``mail_queue.enqueue()`` plus commit;
+- draining the outbox with ``mail_queue.drain()``: throughput, SMTP
+  connections used, and whether every temporarily rejected message is
+  eventually delivered.
+
+Usage:
+    python benchmarks/mail_outbox.py [--messages 200] [--smtp-delay-ms 20] [--reject-every 7]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ['FLASK_ENV'] = 'development'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.update(MAIL_SERVER='127.0.0.1', MAIL_USE_TLS='False', MAIL_USE_SSL='False',
+                  MAIL_USERNAME='', MAIL_PASSWORD='', MAIL_DEFAULT_SENDER='pharmacy@example.com',
+                  MAIL_RETRY_BASE_SECONDS='0')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--smtp-delay-ms', type=float, default=20)
+    parser.add_argument('--reject-every', type=int, default=7)
+    args = parser.parse_args()
+
+    from smtp_stand_in import SMTPStandIn
+
+    smtp = SMTPStandIn(args.smtp_delay_ms / 1000, args.reject_every).start()
+    os.environ['MAIL_PORT'] = str(smtp.port)
+
+    from flask_mail import Message
+
+    import mail_queue
+    from app import app
+    from models import db, OutboundEmail
+
+    mail = app.extensions['mail']
+    mail.debug = False
+    with app.app_context():
+        db.create_all()
+
+        # Old request path: one SMTP session per message (no retry on 451)
+        sample = min(args.messages, 20)
+        started = time.perf_counter()
+        for i in range(sample):
+            try:
+                mail.send(Message('Password Reset Request', recipients=[f'user{i}@example.com'], body='link'))
+            except Exception:
+                pass
+        sync_ms = (time.perf_counter() - started) * 1000 / sample
+
+        smtp.connections = smtp.offered = 0
+        smtp.received.clear()
+        started = time.perf_counter()
+        for i in range(args.messages):
+            mail_queue.enqueue('Password Reset Request', [f'user{i}@example.com'], 'link')
+            db.session.commit()
+        enqueue_ms = (time.perf_counter() - started) * 1000 / args.messages
+
+        started = time.perf_counter()
+        totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+        while db.session.query(OutboundEmail).filter(OutboundEmail.status == 'pending').count():
+            for key, value in mail_queue.drain().items():
+                totals[key] += value
+        drain_s = time.perf_counter() - started
+        sent = db.session.query(OutboundEmail).filter(OutboundEmail.status == 'sent').count()
+
+    print(f'request path, synchronous send: {sync_ms:8.2f} ms/message')
+    print(f'request path, enqueue + commit: {enqueue_ms:8.2f} ms/message')
+    print(f'outbox drain: {args.messages} messages in {drain_s:.2f}s '
+          f'({args.messages / drain_s:.0f}/s) over {smtp.connections} SMTP connections; '
+          f'{totals["retrying"]} temporary failures retried, {sent} sent, {totals["failed"]} failed')
+    smtp.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark for the set-based profit/loss report.
+
+Seeds an in-memory SQLite database with a year of sales and times
+``sales_aggregation.profit_and_loss`` against the previous approach of one
+ORM query per day with costs computed in Python.
+
+Usage:
+    python benchmarks/profit_loss_benchmark.py [--days 365] [--sales-per-day 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import func, insert
+
+from app import app
+from models import db, Customer, Medicine, Purchase, PurchaseItem, Sale, SaleItem, Supplier
+from sales_aggregation import profit_and_loss
+
+
+def seed(days, sales_per_day, medicine_count=500, items_per_sale=3):
+    """Bulk insert a synthetic sales history ending today."""
+    rnd = random.Random(42)
+    today = date.today()
+    db.session.execute(insert(Supplier), [{'id': 1, 'name': 'Benchmark Supplier'}])
+    db.session.execute(insert(Customer), [{'id': 1, 'name': 'Walk-in'}])
+    db.session.execute(insert(Medicine), [{
+        'id': i,
+        'name': f'Medicine {i}',
+        'batch_number': f'B{i}',
+        'category': 'General',
+        'quantity': 1000,
+        'expiry_date': today + timedelta(days=365),
+        'price': 10.0 + i % 50,
+        'gst_percent': 12.0,
+        'cost_price': (7.0 + i % 50) if i % 3 else None,
+    } for i in range(1, medicine_count + 1)])
+    db.session.execute(insert(Purchase), [{'id': 1, 'supplier_id': 1, 'total_amount': 0.0}])
+    db.session.execute(insert(PurchaseItem), [{
+        'purchase_id': 1, 'medicine_id': i, 'quantity': 100, 'price_per_unit': 6.5 + i % 50,
+    } for i in range(1, medicine_count + 1)])
+
+    sale_rows, item_rows = [], []
+    sale_id = 0
+    for day_offset in range(days):
+        day = today - timedelta(days=day_offset)
+        for _ in range(sales_per_day):
+            sale_id += 1
+            sale_rows.append({
+                'id': sale_id,
+                'customer_id': 1,
+                'total_amount': 0.0,
+                'gst_amount': 0.0,
+                'created_at': datetime.combine(day, datetime.min.time()) + timedelta(minutes=rnd.randint(0, 1439)),
+            })
+            total = 0.0
+            for medicine_id in rnd.sample(range(1, medicine_count + 1), items_per_sale):
+                quantity = rnd.randint(1, 5)
+                price = 10.0 + medicine_id % 50
+                total += quantity * price
+                item_rows.append({
+                    'sale_id': sale_id, 'medicine_id': medicine_id, 'quantity': quantity,
+                    'price_per_unit': price, 'dispensed_quantity': quantity,
+                })
+            sale_rows[-1]['total_amount'] = total
+            sale_rows[-1]['gst_amount'] = total * 0.12
+    db.session.execute(insert(Sale), sale_rows)
+    db.session.execute(insert(SaleItem), item_rows)
+    db.session.commit()
+    return sale_id, len(item_rows)
+
+
+def per_day_orm(start_date, end_date):
+    """Reference implementation: one ORM query per day, costs summed in Python."""
+    rows = []
+    day = start_date
+    while day <= end_date:
+        sales = Sale.query.filter(func.date(Sale.created_at) == day).all()
+        cogs = 0.0
+        for sale in sales:
+            for item in sale.items:
+                medicine = item.medicine
+                unit_cost = medicine.cost_price
+                if unit_cost is None and medicine.purchase_items:
+                    unit_cost = max(medicine.purchase_items, key=lambda p: p.id).price_per_unit
+                cogs += item.quantity * (unit_cost or 0.0)
+        rows.append((day, sum(sale.total_amount for sale in sales), cogs))
+        day += timedelta(days=1)
+    return rows
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--sales-per-day', type=int, default=200)
+    parser.add_argument('--skip-legacy', action='store_true', help='Do not time the per-day ORM loop')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        sale_count, item_count = seed(args.days, args.sales_per_day)
+        end_date = date.today()
+        start_date = end_date - timedelta(days=args.days - 1)
+        print(f'Seeded {sale_count} sales / {item_count} sale items over {args.days} days')
+
+        rows, elapsed = timed(profit_and_loss, start_date, end_date)
+        print(f'profit_and_loss (set-based): {elapsed:9.1f} ms')
+
+        if not args.skip_legacy:
+            db.session.expunge_all()
+            legacy_rows, legacy_elapsed = timed(per_day_orm, start_date, end_date)
+            print(f'per-day ORM loop:            {legacy_elapsed:9.1f} ms ({legacy_elapsed / elapsed:.0f}x slower)')
+            for row, (day, total_sales, cogs) in zip(rows, legacy_rows):
+                assert row['date'] == day
+                assert abs(row['total_sales'] - total_sales) < 1e-6
+                assert abs(row['cogs'] - cogs) < 1e-6
+            print('Results match the reference implementation.')
+
+
+if __name__ == '__main__':
+    main()
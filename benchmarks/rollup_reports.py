@@ -0,0 +1,81 @@
+"""
+Benchmark for the rollup-backed sales reports.
+
+Seeds an in-memory SQLite database with a year of sales (the sales rollups
+are filled as the rows are bulk inserted), then times month and year views
+of ``sales_aggregation.sales_totals`` and ``profit_and_loss`` against the
+previous GROUP BY over the raw ``sales`` rows, checks both give the same
+totals, and times a full ``rollups.rebuild``.
+
+Usage:
+    python benchmarks/rollup_reports.py [--days 365] [--sales-per-day 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import func
+
+from app import app
+from models import db, Sale
+from profit_loss_benchmark import seed, timed
+import rollups
+from sales_aggregation import as_date, day_bucket, day_range, period_start, profit_and_loss, sales_totals
+
+
+def raw_totals(start_date, end_date, period):
+    """Reference implementation: GROUP BY day over every sale in the range."""
+    range_start, range_end = day_range(start_date, end_date)
+    bucket = day_bucket(Sale.created_at)
+    totals = {}
+    for day, total_sales, sale_count in db.session.query(
+        bucket, func.sum(Sale.total_amount), func.count(Sale.id),
+    ).filter(Sale.created_at >= range_start, Sale.created_at < range_end).group_by(bucket):
+        key = period_start(as_date(day), period)
+        entry = totals.setdefault(key, [0.0, 0])
+        entry[0] += total_sales
+        entry[1] += sale_count
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--sales-per-day', type=int, default=200)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        sale_count, item_count = seed(args.days, args.sales_per_day)
+        print(f'Seeded {sale_count} sales / {item_count} sale items over {args.days} days '
+              f'in {time.perf_counter() - started:.1f}s (rollups maintained on insert)')
+
+        end_date = date.today()
+        for label, days, period in (('month', 30, 'day'), ('year', args.days, 'month')):
+            start_date = end_date - timedelta(days=days - 1)
+            rows, elapsed = timed(sales_totals, start_date, end_date, period)
+            reference, raw_elapsed = timed(raw_totals, start_date, end_date, period)
+            _, pl_elapsed = timed(profit_and_loss, start_date, end_date)
+            print(f'{label:>5} by {period:<5}  rollup: {elapsed:7.1f} ms   raw sales: {raw_elapsed:7.1f} ms   '
+                  f'profit_and_loss: {pl_elapsed:7.1f} ms')
+            for row in rows:
+                total_sales, count = reference.get(row['period'], (0.0, 0))
+                assert row['sale_count'] == count
+                assert abs(row['total_sales'] - total_sales) < 1e-6 * max(1.0, total_sales)
+        print('Rollups match the raw sales.')
+
+        counts, elapsed = timed(rollups.rebuild)
+        db.session.commit()
+        print(f'rollups.rebuild(): {elapsed:9.1f} ms ({counts[0]} daily sales rows, {counts[1]} daily medicine rows)')
+
+
+if __name__ == '__main__':
+    main()
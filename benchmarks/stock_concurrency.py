@@ -0,0 +1,140 @@
+"""
+Stress test concurrent sales against the same medicine.
+
+Starts several threads that each log in and POST sales for one medicine
+until the attempts run out, then checks the invariants the stock ledger
+must uphold:
+
+- stock never goes negative, in total or in any lot;
+- no lost updates: final stock equals initial stock minus the units on
+  recorded sale items;
+- every accepted sale is recorded and every rejected one left no trace;
+- the lots always add up to the medicine's total.
+
+Uses a throwaway SQLite file by default; point DATABASE_URL at a scratch
+PostgreSQL database to test real row locking. Exits non-zero on failure.
+
+Usage:
+    python benchmarks/stock_concurrency.py [--stock 50] [--attempts 200] [--threads 16]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from datetime import date, timedelta
+
+_scratch = tempfile.mkdtemp()
+os.environ['FLASK_ENV'] = 'development'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_scratch, 'stock_concurrency.db'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import func
+
+from app import app, create_default_admin
+from models import db, Customer, Medicine, MedicineBatch, Sale, SaleItem
+
+app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+
+def seed(stock):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        create_default_admin()
+        customer = Customer(name='Counter Customer')
+        medicine = Medicine(
+            name='Contested', batch_number='B1', category='Tablet', quantity=stock,
+            expiry_date=date.today() + timedelta(days=365), price=10.0, gst_percent=12.0,
+        )
+        # Split the stock over two lots so sales also exercise FEFO allocation
+        medicine.batches = [
+            MedicineBatch(batch_number='B1', expiry_date=date.today() + timedelta(days=365), quantity=stock // 2),
+            MedicineBatch(batch_number='B0', expiry_date=date.today() + timedelta(days=30), quantity=stock - stock // 2),
+        ]
+        db.session.add_all([customer, medicine])
+        db.session.commit()
+        return customer.id, medicine.id
+
+
+def worker(attempts, lock, outcomes, customer_id, medicine_id):
+    client = app.test_client()
+    client.post('/login', data={'username': 'Admin', 'password': 'Admin@13'})
+    while True:
+        with lock:
+            if attempts[0] <= 0:
+                return
+            attempts[0] -= 1
+        quantity = random.randint(1, 3)
+        try:
+            response = client.post('/sales', data={
+                'customer': customer_id,
+                'items-0-medicine': medicine_id,
+                'items-0-quantity': quantity,
+            })
+        except Exception as e:
+            print(f'request raised {e!r}')
+            with lock:
+                outcomes.append((False, quantity, 500))
+            continue
+        accepted = response.status_code == 302 and '/bill' in response.headers.get('Location', '')
+        with lock:
+            outcomes.append((accepted, quantity, response.status_code))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    customer_id, medicine_id = seed(args.stock)
+    attempts, lock, outcomes = [args.attempts], threading.Lock(), []
+    threads = [
+        threading.Thread(target=worker, args=(attempts, lock, outcomes, customer_id, medicine_id))
+        for _ in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        final_stock = db.session.get(Medicine, medicine_id).quantity
+        lot_stock = db.session.query(func.sum(MedicineBatch.quantity)).scalar()
+        negative_lots = MedicineBatch.query.filter(MedicineBatch.quantity < 0).count()
+        sold_units = db.session.query(func.coalesce(func.sum(SaleItem.quantity), 0)).scalar()
+        sale_count = Sale.query.count()
+
+    accepted = [quantity for ok, quantity, _ in outcomes if ok]
+    errors = [status for ok, _, status in outcomes if not ok and status != 302]
+    print(f'attempts={len(outcomes)} accepted={len(accepted)} rejected={len(outcomes) - len(accepted)} '
+          f'errors={len(errors)}')
+    print(f'initial={args.stock} final={final_stock} lots={lot_stock} sold_units={sold_units} sales={sale_count}')
+
+    failures = []
+    if final_stock < 0:
+        failures.append('stock went negative')
+    if final_stock != args.stock - sold_units:
+        failures.append('lost update: final stock does not match units sold')
+    if lot_stock != final_stock or negative_lots:
+        failures.append('lot quantities do not add up to the medicine total')
+    if sold_units != sum(accepted) or sale_count != len(accepted):
+        failures.append('accepted sales and recorded sales disagree')
+    if not accepted:
+        failures.append('no sale was accepted')
+    if errors:
+        failures.append(f'{len(errors)} requests failed with HTTP {sorted(set(errors))}')
+
+    for failure in failures:
+        print(f'FAIL: {failure}')
+    if not failures:
+        print('OK')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
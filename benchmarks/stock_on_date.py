@@ -0,0 +1,96 @@
+"""
+Benchmark for point-in-time stock from the stock movement ledger.
+
+Seeds an in-memory SQLite database with a year of stock movements, then
+times ``stock_ledger.stock_on`` for a recent day with no snapshots (every
+movement since the ledger opened is summed) and again after nightly
+snapshots have been taken (only the movements since the latest snapshot
+are summed), and checks both agree with a plain sum over the ledger.
+
+Usage:
+    python benchmarks/stock_on_date.py [--days 365] [--movements-per-day 2000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ['FLASK_ENV'] = 'testing'
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from sqlalchemy import func, insert
+
+from app import app
+from models import db, Medicine, StockMovement
+import rollups
+from stock_ledger import stock_on
+
+
+def seed(days, movements_per_day, medicine_count=500):
+    """Bulk insert medicines and a history of movements ending yesterday."""
+    rnd = random.Random(42)
+    today = datetime.utcnow().date()
+    db.session.execute(insert(Medicine), [{
+        'id': i, 'name': f'Medicine {i}', 'batch_number': f'B{i}', 'category': 'General', 'quantity': 0,
+        'expiry_date': today + timedelta(days=365), 'price': 10.0, 'gst_percent': 12.0,
+    } for i in range(1, medicine_count + 1)])
+    first_day = today - timedelta(days=days)
+    rows = [{'medicine_id': i, 'quantity': 10000, 'reason': 'opening',
+             'created_at': datetime.combine(first_day, datetime.min.time())} for i in range(1, medicine_count + 1)]
+    for day_offset in range(days):
+        day = datetime.combine(first_day + timedelta(days=day_offset), datetime.min.time())
+        for _ in range(movements_per_day):
+            rows.append({
+                'medicine_id': rnd.randint(1, medicine_count),
+                'quantity': rnd.choice((-3, -2, -1, -1, 5)),
+                'reason': 'sale',
+                'created_at': day + timedelta(seconds=rnd.randint(0, 86399)),
+            })
+    for offset in range(0, len(rows), 50000):
+        db.session.execute(insert(StockMovement), rows[offset:offset + 50000])
+    db.session.commit()
+    return len(rows)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--movements-per-day', type=int, default=2000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        print(f'Seeded {seed(args.days, args.movements_per_day)} stock movements over {args.days} days')
+        on_date = datetime.utcnow().date() - timedelta(days=3)
+        end = datetime.combine(on_date + timedelta(days=1), datetime.min.time())
+        reference = dict(db.session.query(StockMovement.medicine_id, func.sum(StockMovement.quantity))
+                         .filter(StockMovement.created_at < end).group_by(StockMovement.medicine_id))
+
+        balances, elapsed = timed(stock_on, on_date)
+        assert balances == reference
+        print(f'stock_on, no snapshots:           {elapsed:8.1f} ms')
+
+        started = time.perf_counter()
+        for day_offset in range(args.days, 0, -1):
+            rollups.snapshot_inventory(on_date + timedelta(days=3) - timedelta(days=day_offset))
+        db.session.commit()
+        print(f'{args.days} nightly snapshots taken in {time.perf_counter() - started:.1f}s')
+
+        balances, elapsed = timed(stock_on, on_date)
+        assert balances == reference
+        print(f'stock_on, from latest snapshot:   {elapsed:8.1f} ms')
+        print('Results match a full sum over the ledger.')
+
+
+if __name__ == '__main__':
+    main()
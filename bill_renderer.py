@@ -0,0 +1,261 @@
+"""
+Sale bill PDF rendering for Medical Management System.
+
+WeasyPrint takes hundreds of milliseconds of CPU per bill, and the bill of
+a sale is printed again and again. Rendering inside the request blocked a
+web worker for that long on every print, so bills are now:
+
+- rendered in a small process pool (``BILL_RENDER_WORKERS`` processes),
+  away from the request thread and the GIL; a burst of checkouts queues
+  in the pool instead of tying up every web worker;
+- cached on disk under ``BILL_CACHE_DIR`` as ``sale_<id>_<hash>.pdf``,
+  where the hash is taken over the bill's rendered HTML. Reprints are
+  served straight from disk, and any change to the sale (or the bill
+  template) produces a new hash and a fresh render;
+- served with ``send_file`` using the hash as ETag, so a browser that
+  already holds the bill gets a 304.
+
+A request waits at most ``BILL_RENDER_WAIT_SECONDS`` for a render. If the
+bill is not ready by then the route answers with a page that reloads
+itself until it is, and the web worker is free for the next customer.
+Concurrent requests for the same bill share one render.
+
+``render_batch()`` feeds a whole list of documents (a day's bills and the
+reports) through a pool of its own and streams the PDFs into one ZIP;
+``flask render-bills`` drives it for end-of-day runs. Pool processes keep
+one WeasyPrint font configuration and cache fetched stylesheets, so only
+the first document in each process pays for font and CSS setup.
+"""
+
+import glob
+import hashlib
+import importlib.util
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, send_file
+
+logger = logging.getLogger(__name__)
+
+# WeasyPrint (and pango/cairo behind it) is only imported by the render pool
+# processes; web workers just check that it is installed
+PDF_GENERATION_AVAILABLE = importlib.util.find_spec('weasyprint') is not None
+if not PDF_GENERATION_AVAILABLE:
+    logger.warning('WeasyPrint is not installed; PDF bills are disabled')
+
+
+class RenderFailed(Exception):
+    """Raised when the render pool could not produce a bill."""
+
+
+_font_config = None
+_fetched = {}
+
+
+def _init_worker():
+    """Pool initializer: one font configuration per process, shared by every render."""
+    global _font_config
+    from weasyprint.text.fonts import FontConfiguration
+    _font_config = FontConfiguration()
+
+
+def _fetch(url, **kwargs):
+    """URL fetcher caching stylesheets and images, so each is fetched once per process."""
+    from weasyprint import default_url_fetcher
+
+    resource = _fetched.get(url)
+    if resource is None:
+        resource = default_url_fetcher(url, **kwargs)
+        if 'file_obj' in resource:
+            resource['string'] = resource.pop('file_obj').read()
+        _fetched[url] = resource
+    return dict(resource)
+
+
+def _write_pdf(html, target=None):
+    from weasyprint import HTML
+    return HTML(string=html, url_fetcher=_fetch).write_pdf(target, font_config=_font_config)
+
+
+def _render_pdf(html, path):
+    """Pool task: render ``html`` to ``path`` and drop older renders of the same sale."""
+    partial = f'{path}.{os.getpid()}.tmp'
+    _write_pdf(html, partial)
+    os.replace(partial, path)
+
+    prefix = path.rsplit('_', 1)[0]
+    for stale in glob.glob(f'{prefix}_*.pdf'):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return path
+
+
+def _new_pool(workers):
+    # spawn, not fork: web workers run threads, and forking them is unsafe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker)
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_pending = {}
+
+
+def _get_pool():
+    """This process's render pool, created on first use (and again after a fork)."""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = _new_pool(current_app.config.get('BILL_RENDER_WORKERS', 2))
+            _pool_pid = os.getpid()
+            _pending.clear()
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pending.clear()
+
+
+def cache_path(sale_id, html):
+    """
+    Where the bill of ``sale_id`` rendered from ``html`` is cached.
+
+    Returns:
+        tuple: (path, content hash); the hash doubles as the ETag.
+    """
+    if 'bill_renderer' not in current_app.extensions:
+        # This module loads with the reports blueprint, on first use
+        init_app(current_app)
+    digest = hashlib.sha256(html.encode('utf-8')).hexdigest()[:32]
+    return os.path.join(current_app.config['BILL_CACHE_DIR'], f'sale_{sale_id}_{digest}.pdf'), digest
+
+
+def submit(sale_id, html):
+    """
+    Queue a render of the bill unless it is cached or already rendering.
+
+    Returns:
+        tuple: (path, content hash, future or None when already cached)
+    """
+    path, digest = cache_path(sale_id, html)
+    if os.path.exists(path):
+        return path, digest, None
+    pool = _get_pool()
+    with _lock:
+        future = _pending.get(path)
+        if future is None:
+            future = pool.submit(_render_pdf, html, path)
+            _pending[path] = future
+            future.add_done_callback(lambda done, path=path: _pending.pop(path, None))
+    return path, digest, future
+
+
+def bill_response(sale_id, html, filename):
+    """
+    Serve the bill PDF for ``html``, rendering it in the pool if needed.
+
+    Args:
+        sale_id (int): Sale the bill belongs to.
+        html (str): The bill rendered from its template.
+        filename (str): Download name shown to the browser.
+
+    Returns:
+        Response or None: The PDF (or a 304), or None if the render is still
+        running after ``BILL_RENDER_WAIT_SECONDS``.
+
+    Raises:
+        RenderFailed: If the render pool failed.
+    """
+    try:
+        path, digest, future = submit(sale_id, html)
+        if future is not None:
+            future.result(timeout=current_app.config.get('BILL_RENDER_WAIT_SECONDS', 3))
+    except TimeoutError:
+        return None
+    except BrokenProcessPool as e:
+        _reset_pool()
+        raise RenderFailed('The bill renderer stopped unexpectedly; please try again.') from e
+    except Exception as e:
+        logger.exception('Rendering the bill of sale %s failed', sale_id)
+        raise RenderFailed('The bill could not be rendered.') from e
+
+    response = send_file(path, mimetype='application/pdf', download_name=filename,
+                         etag=digest, conditional=True, max_age=0)
+    # Revalidate every time: the ETag changes whenever the sale does
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def render_batch(documents, output, workers=None, on_progress=None):
+    """
+    Render documents in parallel and stream the PDFs into a ZIP archive.
+
+    Bills already in the bill cache are copied from it instead of rendered.
+    At most a few documents per process are in flight, so memory stays flat
+    however long the list is.
+
+    Args:
+        documents (iterable): (archive name, html, sale id or None) triples;
+                              may be a generator.
+        output (str or file): Where to write the ZIP archive.
+        workers (int): Render processes; defaults to the CPU count.
+        on_progress (callable): Called with the archive name of each finished
+                                document.
+
+    Returns:
+        tuple: (documents written, seconds taken)
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    # PDF content streams are compressed already
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive, _new_pool(workers) as pool:
+        in_flight = {}
+
+        def collect():
+            nonlocal written
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                archive.writestr(name, future.result())
+                written += 1
+                if on_progress:
+                    on_progress(name)
+
+        for name, html, sale_id in documents:
+            path = cache_path(sale_id, html)[0] if sale_id is not None else None
+            if path and os.path.exists(path):
+                archive.write(path, name)
+                written += 1
+                if on_progress:
+                    on_progress(name)
+                continue
+            in_flight[pool.submit(_write_pdf, html)] = name
+            if len(in_flight) >= workers * 4:
+                collect()
+        while in_flight:
+            collect()
+    return written, time.perf_counter() - started
+
+
+def init_app(app):
+    """Resolve the bill cache directory for ``app``."""
+    cache_dir = app.config.get('BILL_CACHE_DIR') or os.path.join(app.instance_path, 'bill_cache')
+    app.config['BILL_CACHE_DIR'] = os.path.abspath(cache_dir)
+    os.makedirs(app.config['BILL_CACHE_DIR'], exist_ok=True)
+    app.extensions['bill_renderer'] = app.config['BILL_CACHE_DIR']
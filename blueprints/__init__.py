@@ -0,0 +1,96 @@
+"""
+Blueprints for Medical Management System.
+
+The routes are grouped by area, one blueprint per module in this package:
+
+- ``main``: dashboard and the typeahead search API
+- ``auth``: login, registration and password reset
+- ``inventory``: medicines, stock alerts, suppliers and purchases
+- ``sales``: checkout and customers
+- ``prescriptions``, ``patients`` and ``equipment``
+- ``admin``: user management
+- ``reports``: report pages, spreadsheet downloads and sale bill PDFs
+- ``backup``: database backup and restore
+
+Endpoints are named ``<blueprint>.<view>``, e.g.
+``url_for('inventory.add_medicine')``.
+
+``create_app()`` registers them with ``register_blueprints()``; pass it a
+subset to build an app with only some of them (a CLI job or a test of one
+area). The page templates link across areas, so an app that renders pages
+should register them all.
+
+``reports`` and ``backup`` are registered lazily: their URL rules come from
+``LAZY_ROUTES`` and are in place from the start, but the module holding the
+views, and everything it imports (the bill renderer and its process pool,
+the spreadsheet export, pg_dump handling), loads on the first request that
+reaches one of them. A worker that never prints a bill never loads the PDF
+stack.
+"""
+
+import importlib
+from functools import cached_property
+
+from flask import Blueprint
+from werkzeug.utils import import_string
+
+EAGER_BLUEPRINTS = ('main', 'auth', 'inventory', 'sales', 'prescriptions', 'patients', 'equipment', 'admin')
+
+# (rule, view name, methods) for the lazily registered blueprints
+LAZY_ROUTES = {
+    'reports': [
+        ('/reports', 'reports', ['GET']),
+        ('/reports/profit_loss', 'profit_loss_report', ['GET']),
+        ('/reports/stock_on_date', 'stock_on_date', ['GET']),
+        ('/reports/stock_movements', 'stock_movements', ['GET']),
+        ('/download_report/<report_type>', 'download_report', ['GET']),
+        ('/sales/<int:sale_id>/bill', 'generate_bill', ['GET']),
+    ],
+    'backup': [
+        ('/backup', 'backup', ['GET']),
+        ('/restore', 'restore', ['POST']),
+    ],
+}
+
+BLUEPRINTS = EAGER_BLUEPRINTS + tuple(LAZY_ROUTES)
+
+
+class LazyView:
+    """A view function that is imported from ``import_name`` on its first call."""
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def lazy_blueprint(name):
+    """A blueprint holding ``LAZY_ROUTES[name]``, with views from ``blueprints.<name>``."""
+    module = f'{__name__}.{name}'
+    bp = Blueprint(name, module)
+    for rule, view, methods in LAZY_ROUTES[name]:
+        bp.add_url_rule(rule, view_func=LazyView(f'{module}.{view}'), methods=methods)
+    return bp
+
+
+def register_blueprints(app, names=None):
+    """
+    Register blueprints on ``app``.
+
+    Args:
+        app (Flask): The application.
+        names (iterable): Blueprints to register; defaults to all of ``BLUEPRINTS``.
+    """
+    for name in BLUEPRINTS if names is None else names:
+        if name in LAZY_ROUTES:
+            app.register_blueprint(lazy_blueprint(name))
+        elif name in EAGER_BLUEPRINTS:
+            app.register_blueprint(importlib.import_module(f'{__name__}.{name}').bp)
+        else:
+            raise ValueError(f'Unknown blueprint: {name}')
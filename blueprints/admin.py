@@ -0,0 +1,70 @@
+"""
+User management for Medical Management System (admin only).
+"""
+
+from flask import Blueprint, abort, flash, redirect, render_template, url_for
+from flask_login import login_required
+from werkzeug.security import generate_password_hash
+
+from forms import RegistrationForm
+from models import db, User
+from pagination import paginate_request
+from permissions import admin_required
+
+bp = Blueprint('admin', __name__)
+
+
+# Route for listing users (Admin only)
+@bp.route('/admin/users')
+@login_required
+@admin_required
+def list_users():
+    page = paginate_request(User.query, [(User.id, False)])
+    return render_template('admin/users.html', users=page.items, page=page)
+
+
+# Route for adding a new user (Admin only)
+@bp.route('/admin/users/add', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def add_user():
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        hashed_password = generate_password_hash(form.password.data, method='pbkdf2:sha256')
+        new_user = User(username=form.username.data, password_hash=hashed_password, role=form.role.data)
+        db.session.add(new_user)
+        db.session.commit()
+        flash('User added successfully!', 'success')
+        return redirect(url_for('admin.list_users'))
+    return render_template('admin/add_user.html', form=form)
+
+
+# Route for editing a user (Admin only)
+@bp.route('/admin/users/edit/<int:id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def edit_user(id):
+    user = db.session.get(User, id)
+    if not user:
+        abort(404)
+    form = RegistrationForm(obj=user)
+    if form.validate_on_submit():
+        user.username = form.username.data
+        user.role = form.role.data
+        # Password update logic can be added here if needed
+        db.session.commit()
+        flash('User updated successfully!', 'success')
+        return redirect(url_for('admin.list_users'))
+    return render_template('admin/edit_user.html', form=form, user=user)
+
+
+# Route for deleting a user (Admin only)
+@bp.route('/admin/users/delete/<int:id>', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def delete_user(id):
+    user = db.session.get(User, id)
+    db.session.delete(user)
+    db.session.commit()
+    flash('User deleted successfully!', 'success')
+    return redirect(url_for('admin.list_users'))
@@ -0,0 +1,90 @@
+"""
+Login, registration and password reset for Medical Management System.
+"""
+
+import secrets
+
+from flask import Blueprint, flash, redirect, render_template, url_for
+from flask_login import current_user, login_user, logout_user
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import mail_queue
+from forms import LoginForm, PasswordResetForm, PasswordResetRequestForm, RegistrationForm
+from models import db, User
+
+bp = Blueprint('auth', __name__)
+
+
+# Route for user registration
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    form = RegistrationForm()
+    if form.validate_on_submit():
+        hashed_password = generate_password_hash(form.password.data, method='pbkdf2:sha256')
+        new_user = User(username=form.username.data, password_hash=hashed_password, role=form.role.data)
+        db.session.add(new_user)
+        db.session.commit()
+        flash('Your account has been created! You are now able to log in', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('register.html', form=form)
+
+
+# Route for user login
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('main.dashboard'))
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        if user and check_password_hash(user.password_hash, form.password.data):
+            login_user(user, remember=form.remember.data)
+            return redirect(url_for('main.dashboard'))
+        else:
+            flash('Login Unsuccessful. Please check username and password', 'danger')
+    return render_template('login.html', form=form)
+
+
+# Route for user logout
+@bp.route('/logout')
+def logout():
+    logout_user()
+    return redirect(url_for('auth.login'))
+
+
+# Route for requesting a password reset
+@bp.route('/reset_password', methods=['GET', 'POST'])
+def reset_password_request():
+    form = PasswordResetRequestForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        if user:
+            token = secrets.token_urlsafe(32)
+            user.password_reset_token = token
+            # Queued with the token in one commit; the mail worker sends it in the background
+            mail_queue.enqueue('Password Reset Request', [user.username], f'''To reset your password, visit the following link:
+{url_for('auth.reset_password', token=token, _external=True)}
+
+If you did not make this request then simply ignore this email and no changes will be made.
+''')
+            db.session.commit()
+            flash('An email with instructions to reset your password has been sent.', 'info')
+            return redirect(url_for('auth.login'))
+    return render_template('reset_password_request.html', title='Reset Password', form=form)
+
+
+# Route for resetting the password
+@bp.route('/reset_password/<token>', methods=['GET', 'POST'])
+def reset_password(token):
+    user = User.query.filter_by(password_reset_token=token).first_or_404()
+    form = PasswordResetForm()
+    if form.validate_on_submit():
+        hashed_password = generate_password_hash(form.password.data, method='pbkdf2:sha256')
+        user.password_hash = hashed_password
+        user.password_reset_token = None
+        db.session.commit()
+        flash('Your password has been updated! You are now able to log in', 'success')
+        return redirect(url_for('auth.login'))
+    return render_template('reset_password.html', title='Reset Password', form=form)
@@ -0,0 +1,108 @@
+"""
+Database backup and restore for Medical Management System.
+
+Registered lazily (see ``blueprints``): this module loads on the first
+backup or restore request.
+"""
+
+import os
+import subprocess
+
+from flask import flash, redirect, request, send_file, url_for
+from flask_login import login_required
+from werkzeug.utils import secure_filename
+
+from models import db
+
+
+@login_required
+def backup():
+    """Engine-aware backup.
+
+    - PostgreSQL: pg_dump custom format
+    - SQLite: copy database file
+    - Other engines: disabled
+    """
+    from sqlalchemy import inspect
+    engine = db.get_engine()
+    driver = engine.url.drivername
+    backup_file = 'backup.dump'
+    try:
+        if driver.startswith('postgresql'):
+            # Ensure pg_dump exists
+            result = subprocess.run(['which', 'pg_dump'], capture_output=True, text=True)
+            if result.returncode != 0:
+                flash('pg_dump not available in container; cannot backup PostgreSQL.', 'danger')
+                return redirect(url_for('main.dashboard'))
+            env = os.environ.copy()
+            if engine.url.password:
+                env['PGPASSWORD'] = engine.url.password
+            cmd = [
+                'pg_dump', '-h', engine.url.host or 'localhost', '-U', engine.url.username,
+                '-d', engine.url.database, '-F', 'c', '-f', backup_file
+            ]
+            subprocess.run(cmd, check=True, env=env)
+        elif driver.startswith('sqlite'):
+            db_path = engine.url.database
+            if not db_path or not os.path.exists(db_path):
+                flash('SQLite database file not found.', 'danger')
+                return redirect(url_for('main.dashboard'))
+            import shutil
+            shutil.copy2(db_path, backup_file)
+        else:
+            flash(f'Backup not implemented for engine: {driver}', 'warning')
+            return redirect(url_for('main.dashboard'))
+        return send_file(backup_file, as_attachment=True)
+    except Exception as e:
+        flash(f"Error creating backup: {e}", 'danger')
+        return redirect(url_for('main.dashboard'))
+
+
+@login_required
+def restore():
+    """Engine-aware restore.
+
+    WARNING: Restoring will overwrite current data.
+    - PostgreSQL: uses pg_restore for custom format dump
+    - SQLite: replaces database file
+    """
+    if 'backup_file' not in request.files:
+        flash('No file part', 'danger')
+        return redirect(url_for('main.dashboard'))
+    file = request.files['backup_file']
+    if file.filename == '':
+        flash('No selected file', 'danger')
+        return redirect(url_for('main.dashboard'))
+    engine = db.get_engine()
+    driver = engine.url.drivername
+    try:
+        filename = secure_filename(file.filename)
+        temp_path = os.path.join('/tmp', filename)
+        file.save(temp_path)
+        if driver.startswith('postgresql'):
+            result = subprocess.run(['which', 'pg_restore'], capture_output=True, text=True)
+            if result.returncode != 0:
+                flash('pg_restore not available; cannot restore PostgreSQL.', 'danger')
+                return redirect(url_for('main.dashboard'))
+            env = os.environ.copy()
+            if engine.url.password:
+                env['PGPASSWORD'] = engine.url.password
+            cmd = [
+                'pg_restore', '-h', engine.url.host or 'localhost', '-U', engine.url.username,
+                '-d', engine.url.database, '-c', temp_path
+            ]
+            subprocess.run(cmd, check=True, env=env)
+        elif driver.startswith('sqlite'):
+            db_path = engine.url.database
+            import shutil
+            shutil.copy2(temp_path, db_path)
+        else:
+            flash(f'Restore not implemented for engine: {driver}', 'warning')
+            return redirect(url_for('main.dashboard'))
+        flash('Database restored successfully!', 'success')
+    except Exception as e:
+        flash(f"Error restoring database: {e}", 'danger')
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return redirect(url_for('main.dashboard'))
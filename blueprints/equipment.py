@@ -0,0 +1,132 @@
+"""
+Medical equipment for Medical Management System.
+"""
+
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask_login import login_required
+from sqlalchemy import or_
+
+from forms import MedicalEquipmentForm
+from models import db, MedicalEquipment
+from pagination import paginate_request
+
+bp = Blueprint('equipment', __name__)
+
+
+# Medical Equipment Management Routes
+@bp.route('/medical_equipment')
+@login_required
+def medical_equipment():
+    search_query = (request.args.get('search') or '').strip()
+    category_filter = request.args.get('category', '')
+    status_filter = request.args.get('status', '')
+    
+    equipment_query = MedicalEquipment.query
+    
+    if search_query:
+        like_pattern = f"%{search_query}%"
+        equipment_query = equipment_query.filter(
+            or_(
+                MedicalEquipment.name.ilike(like_pattern),
+                MedicalEquipment.serial_number.ilike(like_pattern),
+                MedicalEquipment.model_number.ilike(like_pattern)
+            )
+        )
+    
+    if category_filter:
+        equipment_query = equipment_query.filter(MedicalEquipment.category == category_filter)
+    
+    if status_filter:
+        equipment_query = equipment_query.filter(MedicalEquipment.status == status_filter)
+    
+    page = paginate_request(equipment_query, [(MedicalEquipment.name, False), (MedicalEquipment.id, False)])
+    
+    # Get unique categories for filter dropdown
+    categories = db.session.query(MedicalEquipment.category).distinct().all()
+    categories = [cat[0] for cat in categories]
+    
+    return render_template('medical_equipment.html', 
+                         equipment=page.items, 
+                         page=page,
+                         search_query=search_query,
+                         category_filter=category_filter,
+                         status_filter=status_filter,
+                         categories=categories)
+
+
+@bp.route('/add_equipment', methods=['GET', 'POST'])
+@login_required
+def add_equipment():
+    form = MedicalEquipmentForm()
+    if form.validate_on_submit():
+        supplier_id = form.supplier_id.data if form.supplier_id.data != 0 else None
+        new_equipment = MedicalEquipment(
+            name=form.name.data,
+            model_number=form.model_number.data,
+            serial_number=form.serial_number.data,
+            category=form.category.data,
+            manufacturer=form.manufacturer.data,
+            purchase_date=form.purchase_date.data,
+            purchase_price=form.purchase_price.data,
+            supplier_id=supplier_id,
+            warranty_expiry=form.warranty_expiry.data,
+            status=form.status.data,
+            location=form.location.data,
+            last_maintenance_date=form.last_maintenance_date.data,
+            next_maintenance_date=form.next_maintenance_date.data,
+            maintenance_frequency_days=form.maintenance_frequency_days.data,
+            usage_hours=form.usage_hours.data,
+            last_used_date=form.last_used_date.data,
+            description=form.description.data,
+            notes=form.notes.data
+        )
+        db.session.add(new_equipment)
+        db.session.commit()
+        flash('Medical equipment added successfully!', 'success')
+        return redirect(url_for('equipment.medical_equipment'))
+    return render_template('add_equipment.html', form=form)
+
+
+@bp.route('/edit_equipment/<int:id>', methods=['GET', 'POST'])
+@login_required
+def edit_equipment(id):
+    equipment = db.session.get(MedicalEquipment, id)
+    if not equipment:
+        abort(404)
+    form = MedicalEquipmentForm(obj=equipment)
+    if form.validate_on_submit():
+        supplier_id = form.supplier_id.data if form.supplier_id.data != 0 else None
+        equipment.name = form.name.data
+        equipment.model_number = form.model_number.data
+        equipment.serial_number = form.serial_number.data
+        equipment.category = form.category.data
+        equipment.manufacturer = form.manufacturer.data
+        equipment.purchase_date = form.purchase_date.data
+        equipment.purchase_price = form.purchase_price.data
+        equipment.supplier_id = supplier_id
+        equipment.warranty_expiry = form.warranty_expiry.data
+        equipment.status = form.status.data
+        equipment.location = form.location.data
+        equipment.last_maintenance_date = form.last_maintenance_date.data
+        equipment.next_maintenance_date = form.next_maintenance_date.data
+        equipment.maintenance_frequency_days = form.maintenance_frequency_days.data
+        equipment.usage_hours = form.usage_hours.data
+        equipment.last_used_date = form.last_used_date.data
+        equipment.description = form.description.data
+        equipment.notes = form.notes.data
+        db.session.commit()
+        flash('Medical equipment updated successfully!', 'success')
+        return redirect(url_for('equipment.medical_equipment'))
+    return render_template('edit_equipment.html', form=form, equipment=equipment)
+
+
+@bp.route('/delete_equipment/<int:id>', methods=['POST'])
+@login_required
+def delete_equipment(id):
+    equipment = db.session.get(MedicalEquipment, id)
+    if not equipment:
+        abort(404)
+    db.session.delete(equipment)
+    db.session.commit()
+    flash('Medical equipment deleted successfully!', 'success')
+    return redirect(url_for('equipment.medical_equipment'))
@@ -0,0 +1,511 @@
+"""
+Medicines, stock alerts, suppliers and purchases for Medical Management System.
+"""
+
+from datetime import date, datetime
+
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import delete, func, insert, select
+
+import catalog
+import fulltext
+from alert_engine import stock_status, stock_statuses
+import loading_profiles
+import summary_cache
+from choices import medicine_choices, supplier_choices
+from forms import MedicineForm, PurchaseForm, SupplierForm
+from models import db, InventoryAlert, InventorySnapshot, MedicalEquipment, Medicine, MedicineBatch, Purchase, PurchaseItem, StockMovement, Supplier
+from pagination import paginate_request
+from permissions import pharmacist_required, staff_required
+from stock_ledger import adjust_stock, allocate_stock, load_medicines, lot_expiry_dates, receive_stock, record_movements, remove_stock, InsufficientStock
+
+bp = Blueprint('inventory', __name__)
+
+
+# Route to display all medicines in the inventory using SQLAlchemy
+@bp.route('/inventory')
+@login_required
+@staff_required
+def inventory():
+    from datetime import date, datetime
+    query = request.args.get('query')
+    category = request.args.get('category')
+    batch_number = request.args.get('batch_number')
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+
+    medicines_query = Medicine.query
+
+    if category:
+        medicines_query = medicines_query.filter(Medicine.category.ilike(f'%{category}%'))
+    if batch_number:
+        medicines_query = medicines_query.filter(Medicine.batch_number.ilike(f'%{batch_number}%'))
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        medicines_query = medicines_query.filter(Medicine.expiry_date >= start_date)
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        medicines_query = medicines_query.filter(Medicine.expiry_date <= end_date)
+
+    if query:
+        # Typo-tolerant, ranked lookup in the per-worker catalog index
+        ranked = catalog.search(query, limit=200)
+        medicines = fulltext.load_ranked(medicines_query, Medicine, ranked)
+        return render_template('inventory.html', medicines=medicines, page=None, query=query, category=category, batch_number=batch_number,
+                               stock_statuses=stock_statuses([medicine.id for medicine in medicines]))
+
+    page = paginate_request(medicines_query, [(Medicine.name, False), (Medicine.id, False)])
+
+    return render_template('inventory.html', medicines=page.items, page=page, query=query, category=category, batch_number=batch_number,
+                           stock_statuses=stock_statuses([medicine.id for medicine in page.items]))
+
+
+# Route to add a new medicine to the inventory
+@bp.route('/add_medicine', methods=['GET', 'POST'])
+@login_required
+@pharmacist_required
+def add_medicine():
+    form = MedicineForm()
+    if form.validate_on_submit():
+        supplier_id = form.supplier_id.data if form.supplier_id.data != 0 else None
+        new_medicine = Medicine(
+            name=form.name.data,
+            batch_number=form.batch_number.data,
+            expiry_date=form.expiry_date.data,
+            quantity=form.quantity.data,
+            price=form.price.data,
+            cost_price=form.cost_price.data,
+            category=form.category.data,
+            gst_percent=form.gst_percent.data,
+            minimum_stock_level=form.minimum_stock_level.data,
+            maximum_stock_level=form.maximum_stock_level.data,
+            reorder_point=form.reorder_point.data,
+            location=form.location.data,
+            unit_of_measurement=form.unit_of_measurement.data,
+            manufacturer=form.manufacturer.data,
+            supplier_id=supplier_id,
+            last_restocked_date=form.last_restocked_date.data
+        )
+        # Opening stock is held in the medicine's first lot
+        lot = MedicineBatch(
+            batch_number=form.batch_number.data,
+            expiry_date=form.expiry_date.data,
+            quantity=form.quantity.data,
+            cost_price=form.cost_price.data,
+        )
+        new_medicine.batches.append(lot)
+        db.session.add(new_medicine)
+        db.session.flush()
+        record_movements([(new_medicine.id, lot.id, lot.quantity)], 'opening', ('medicine', new_medicine.id))
+        db.session.commit()
+        flash('Medicine added successfully!', 'success')
+        return redirect(url_for('inventory.inventory'))
+    return render_template('add_medicine.html', form=form)
+
+
+# Route to edit an existing medicine
+@bp.route('/edit_medicine/<int:id>', methods=['GET', 'POST'])
+@login_required
+@pharmacist_required
+def edit_medicine(id):
+    medicine = db.session.get(Medicine, id)
+    if not medicine:
+        abort(404)
+    form = MedicineForm(obj=medicine)
+    if form.validate_on_submit():
+        # A stock correction is applied to the lot named on the form
+        try:
+            adjust_stock(medicine.id, form.batch_number.data, form.expiry_date.data, form.quantity.data,
+                         source=('medicine', medicine.id))
+        except InsufficientStock as e:
+            flash(f'Cannot correct the stock. {e}', 'danger')
+            return render_template('edit_medicine.html', form=form, medicine=medicine)
+        MedicineBatch.query.filter_by(medicine_id=medicine.id, batch_number=form.batch_number.data)\
+                           .update({'expiry_date': form.expiry_date.data}, synchronize_session=False)
+
+        supplier_id = form.supplier_id.data if form.supplier_id.data != 0 else None
+        medicine.name = form.name.data
+        medicine.batch_number = form.batch_number.data
+        medicine.expiry_date = form.expiry_date.data
+        medicine.price = form.price.data
+        medicine.cost_price = form.cost_price.data
+        medicine.category = form.category.data
+        medicine.gst_percent = form.gst_percent.data
+        medicine.minimum_stock_level = form.minimum_stock_level.data
+        medicine.maximum_stock_level = form.maximum_stock_level.data
+        medicine.reorder_point = form.reorder_point.data
+        medicine.location = form.location.data
+        medicine.unit_of_measurement = form.unit_of_measurement.data
+        medicine.manufacturer = form.manufacturer.data
+        medicine.supplier_id = supplier_id
+        medicine.last_restocked_date = form.last_restocked_date.data
+        db.session.commit()
+        flash('Medicine updated successfully!', 'success')
+        return redirect(url_for('inventory.inventory'))
+    return render_template('edit_medicine.html', form=form, medicine=medicine)
+
+
+# Route to delete a medicine
+@bp.route('/delete_medicine/<int:id>', methods=['GET', 'POST'])
+@login_required
+def delete_medicine(id):
+    medicine = db.session.get(Medicine, id)
+    if not medicine:
+        abort(404)
+    # The stock ledger is append-only; a medicine that has moved stays on record
+    has_history = db.session.query(
+        select(StockMovement.id).where(StockMovement.medicine_id == id).exists()
+        | select(InventorySnapshot.id).where(InventorySnapshot.medicine_id == id).exists()
+    ).scalar()
+    if has_history:
+        flash(f'{medicine.name} has stock history and cannot be deleted; correct its quantity to 0 instead.', 'danger')
+        return redirect(url_for('inventory.inventory'))
+    db.session.delete(medicine)
+    db.session.commit()
+    flash('Medicine deleted successfully!', 'success')
+    return redirect(url_for('inventory.inventory'))
+
+
+# Enhanced Inventory Dashboard
+@bp.route('/inventory_dashboard')
+@login_required
+def inventory_dashboard():
+    from datetime import date, timedelta
+    
+    today = date.today()
+
+    def compute_inventory_summary():
+        return {
+            'total_medicines': Medicine.query.count(),
+            'low_stock_medicines': Medicine.query.filter(stock_status().isnot(None)).count(),
+            # Medicines with stock left in an expired / soon-expiring lot
+            'expired_medicines': db.session.query(func.count(func.distinct(MedicineBatch.medicine_id))).filter(
+                MedicineBatch.expiry_date < today, MedicineBatch.quantity > 0
+            ).scalar(),
+            'expiring_soon': db.session.query(func.count(func.distinct(MedicineBatch.medicine_id))).filter(
+                MedicineBatch.expiry_date.between(today, today + timedelta(days=30)), MedicineBatch.quantity > 0
+            ).scalar(),
+            'total_equipment': MedicalEquipment.query.count(),
+            'equipment_needing_maintenance': MedicalEquipment.query.filter(
+                MedicalEquipment.next_maintenance_date <= today
+            ).count(),
+            'active_equipment': MedicalEquipment.query.filter_by(status='Active').count(),
+            # Top categories by value
+            'medicine_categories': [
+                tuple(row) for row in db.session.query(
+                    Medicine.category,
+                    func.sum(Medicine.quantity * Medicine.price).label('total_value'),
+                    func.count(Medicine.id).label('item_count')
+                ).group_by(Medicine.category).order_by(
+                    func.sum(Medicine.quantity * Medicine.price).desc()
+                ).limit(10).all()
+            ],
+        }
+
+    # Counts and valuations are cached until inventory or equipment change
+    inventory_summary = summary_cache.cached(
+        f'inventory_dashboard:{today.isoformat()}', ('inventory', 'equipment'), compute_inventory_summary
+    )
+
+    # Recent alerts
+    recent_alerts = InventoryAlert.query.options(*loading_profiles.ALERT_LIST)\
+                                       .filter_by(is_active=True, is_acknowledged=False)\
+                                       .order_by(InventoryAlert.created_at.desc())\
+                                       .limit(10).all()
+
+    return render_template('inventory_dashboard.html',
+                         recent_alerts=recent_alerts,
+                         **inventory_summary)
+
+
+# Inventory Alerts Management
+@bp.route('/inventory_alerts')
+@login_required
+def inventory_alerts():
+    # Get filter parameters
+    alert_type_filter = request.args.get('alert_type', '')
+    severity_filter = request.args.get('severity', '')
+    show_acknowledged = request.args.get('show_acknowledged', 'false') == 'true'
+    
+    alerts_query = InventoryAlert.query.options(*loading_profiles.ALERT_LIST)
+    
+    if alert_type_filter:
+        alerts_query = alerts_query.filter(InventoryAlert.alert_type == alert_type_filter)
+    
+    if severity_filter:
+        alerts_query = alerts_query.filter(InventoryAlert.severity == severity_filter)
+    
+    if not show_acknowledged:
+        alerts_query = alerts_query.filter(InventoryAlert.is_acknowledged == False)
+    
+    alerts = alerts_query.filter(InventoryAlert.is_active == True).order_by(
+        InventoryAlert.severity.desc(), InventoryAlert.created_at.desc()
+    ).all()
+    
+    return render_template('inventory_alerts.html', 
+                         alerts=alerts,
+                         alert_type_filter=alert_type_filter,
+                         severity_filter=severity_filter,
+                         show_acknowledged=show_acknowledged)
+
+
+@bp.route('/acknowledge_alert/<int:alert_id>', methods=['POST'])
+@login_required
+def acknowledge_alert(alert_id):
+    alert = db.session.get(InventoryAlert, alert_id)
+    if not alert:
+        abort(404)
+    
+    alert.is_acknowledged = True
+    alert.acknowledged_at = datetime.utcnow()
+    alert.acknowledged_by = current_user.username
+    db.session.commit()
+    
+    flash('Alert acknowledged successfully!', 'success')
+    return redirect(url_for('inventory.inventory_alerts'))
+
+
+@bp.route('/dismiss_alert/<int:alert_id>', methods=['POST'])
+@login_required
+def dismiss_alert(alert_id):
+    alert = db.session.get(InventoryAlert, alert_id)
+    if not alert:
+        abort(404)
+    
+    alert.is_active = False
+    db.session.commit()
+    
+    flash('Alert dismissed successfully!', 'success')
+    return redirect(url_for('inventory.inventory_alerts'))
+
+
+@bp.route('/refresh_alerts', methods=['POST'])
+@login_required
+@pharmacist_required
+def refresh_alerts():
+    from alert_engine import refresh_alerts as run_alert_refresh
+
+    counts = run_alert_refresh()
+    flash(f"Alerts refreshed: {counts['created']} new, {counts['updated']} updated, "
+          f"{counts['resolved']} resolved.", 'success')
+    return redirect(url_for('inventory.inventory_alerts'))
+
+
+# Supplier Management Routes
+@bp.route('/suppliers')
+@login_required
+def suppliers():
+    suppliers = Supplier.query.order_by(Supplier.name).all()
+    return render_template('suppliers.html', suppliers=suppliers)
+
+
+@bp.route('/add_supplier', methods=['GET', 'POST'])
+@login_required
+def add_supplier():
+    form = SupplierForm()
+    if form.validate_on_submit():
+        new_supplier = Supplier(
+            name=form.name.data,
+            contact_person=form.contact_person.data,
+            phone_number=form.phone_number.data,
+            email=form.email.data,
+            address=form.address.data
+        )
+        db.session.add(new_supplier)
+        db.session.commit()
+        flash('Supplier added successfully!', 'success')
+        return redirect(url_for('inventory.suppliers'))
+    return render_template('add_supplier.html', form=form)
+
+
+@bp.route('/edit_supplier/<int:id>', methods=['GET', 'POST'])
+@login_required
+def edit_supplier(id):
+    supplier = db.session.get(Supplier, id)
+    if not supplier:
+        abort(404)
+    form = SupplierForm(obj=supplier)
+    if form.validate_on_submit():
+        supplier.name = form.name.data
+        supplier.contact_person = form.contact_person.data
+        supplier.phone_number = form.phone_number.data
+        supplier.email = form.email.data
+        supplier.address = form.address.data
+        db.session.commit()
+        flash('Supplier updated successfully!', 'success')
+        return redirect(url_for('inventory.suppliers'))
+    return render_template('edit_supplier.html', form=form, supplier=supplier)
+
+
+@bp.route('/delete_supplier/<int:id>', methods=['GET', 'POST'])
+@login_required
+def delete_supplier(id):
+    supplier = db.session.get(Supplier, id)
+    db.session.delete(supplier)
+    db.session.commit()
+    flash('Supplier deleted successfully!', 'success')
+    return redirect(url_for('inventory.suppliers'))
+
+
+def _purchase_lines(form, medicines):
+    """
+    Resolve the lot each line of a purchase form is received into.
+
+    Lines without a batch number go to the medicine's default lot. A batch
+    the medicine does not have yet needs its expiry date, and an existing
+    lot keeps the expiry it was received with.
+
+    Returns:
+        list: Lines for ``receive_stock``, or None if a line was rejected
+              (with a field error or a flash message).
+    """
+    items = []
+    for item_form in form.items:
+        medicine = medicines[item_form.medicine.data]
+        items.append((item_form, medicine, (item_form.batch_number.data or '').strip() or medicine.batch_number))
+    lot_expiry = lot_expiry_dates({(medicine.id, batch_number) for _, medicine, batch_number in items})
+
+    lines = []
+    for item_form, medicine, batch_number in items:
+        expiry_date = item_form.expiry_date.data
+        existing = lot_expiry.get((medicine.id, batch_number))
+        if existing is None and expiry_date is None:
+            if batch_number != medicine.batch_number:
+                item_form.expiry_date.errors.append(f'Enter the expiry date of new batch {batch_number}.')
+                return None
+            expiry_date = medicine.expiry_date
+        elif existing is not None:
+            if expiry_date is not None and expiry_date != existing:
+                flash(f'Batch {batch_number} of {medicine.name} expires on {existing.isoformat()}, '
+                      f'not {expiry_date.isoformat()}.', 'danger')
+                return None
+            expiry_date = existing
+        lot_expiry.setdefault((medicine.id, batch_number), expiry_date)
+        lines.append({
+            'medicine_id': medicine.id,
+            'quantity': item_form.quantity.data,
+            'price_per_unit': item_form.price_per_unit.data,
+            'cost_price': item_form.price_per_unit.data,
+            'batch_number': batch_number,
+            'expiry_date': expiry_date,
+        })
+    return lines
+
+
+# Purchase Management Routes
+@bp.route('/purchases', methods=['GET', 'POST'])
+@login_required
+def purchases():
+    from models import Purchase, PurchaseItem
+    form = PurchaseForm()
+    
+    # Populate choices for supplier and medicine fields; all item rows share one cached list
+    form.supplier.choices = supplier_choices()
+    medicines = medicine_choices()
+    for item_form in form.items:
+        item_form.medicine.choices = medicines
+
+    lines = None
+    if form.validate_on_submit():
+        medicines = load_medicines(item_data['medicine'] for item_data in form.items.data)
+        # The choice lists may be older than a deletion; check before anything is written
+        if db.session.get(Supplier, form.supplier.data) is None:
+            flash('That supplier no longer exists.', 'danger')
+            return redirect(url_for('inventory.purchases'))
+        if len(medicines) < len({item_data['medicine'] for item_data in form.items.data}):
+            flash('A medicine on this purchase no longer exists; please choose again.', 'danger')
+            return redirect(url_for('inventory.purchases'))
+        lines = _purchase_lines(form, medicines)
+    if lines is not None:
+        supplier = db.session.get(Supplier, form.supplier.data)
+        total_amount = sum(line['quantity'] * line['price_per_unit'] for line in lines)
+
+        # Create the purchase, then insert all of its items in one batch
+        new_purchase = Purchase(
+            supplier=supplier,
+            total_amount=total_amount
+        )
+        db.session.add(new_purchase)
+        db.session.flush()  # To get the new_purchase.id for the PurchaseItems
+
+        # Receive stock into its lots, then record the items against them in one batch
+        batch_ids = receive_stock(lines, source=('purchase', new_purchase.id))
+        db.session.execute(insert(PurchaseItem), [
+            {
+                'purchase_id': new_purchase.id,
+                'medicine_id': line['medicine_id'],
+                'quantity': line['quantity'],
+                'price_per_unit': line['price_per_unit'],
+                'batch_id': batch_id,
+                'batch_number': line['batch_number'],
+                'expiry_date': line['expiry_date'],
+            }
+            for line, batch_id in zip(lines, batch_ids)
+        ])
+        db.session.commit()
+        
+        flash('Purchase recorded successfully!', 'success')
+        return redirect(url_for('inventory.purchases'))
+
+    # Get filter parameters
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+    supplier_id = request.args.get('supplier_id')
+
+    purchases_query = Purchase.query.options(*loading_profiles.PURCHASE_LIST)
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        purchases_query = purchases_query.filter(Purchase.created_at >= start_date)
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        purchases_query = purchases_query.filter(Purchase.created_at <= end_date)
+
+    if supplier_id:
+        purchases_query = purchases_query.filter_by(supplier_id=supplier_id)
+
+    page = paginate_request(purchases_query, [(Purchase.created_at, True), (Purchase.id, True)])
+    
+    return render_template('purchases.html', form=form, purchases=page.items, page=page)
+
+
+@bp.route('/purchases/<int:purchase_id>')
+@login_required
+def view_purchase(purchase_id):
+    purchase = db.session.get(Purchase, purchase_id, options=loading_profiles.PURCHASE_DETAIL)
+    if not purchase:
+        abort(404)
+    return render_template('view_purchase.html', purchase=purchase)
+
+
+@bp.route('/delete_purchase/<int:id>', methods=['POST'])
+@login_required
+def delete_purchase(id):
+    purchase = db.session.get(Purchase, id)
+    if not purchase:
+        abort(404)
+        
+    # Take back the received stock from the lots it was booked into; items
+    # recorded before stock was kept per lot are taken first-expiry-first-out
+    received = db.session.query(PurchaseItem.medicine_id, PurchaseItem.batch_id, PurchaseItem.quantity)\
+                         .filter(PurchaseItem.purchase_id == purchase.id).all()
+    try:
+        remove_stock((line for line in received if line.batch_id is not None), source=('purchase', purchase.id))
+        allocate_stock(
+            ((line.medicine_id, line.quantity) for line in received if line.batch_id is None),
+            on_date=date.min, reason='purchase_deleted', source=('purchase', purchase.id),
+        )
+    except InsufficientStock as e:
+        flash(f'Cannot delete purchase: stock has already been used. {e}', 'danger')
+        return redirect(url_for('inventory.purchases'))
+    
+    # Items have no delete cascade; remove them in one statement first
+    db.session.execute(delete(PurchaseItem).where(PurchaseItem.purchase_id == purchase.id))
+    db.session.delete(purchase)
+    db.session.commit()
+    flash('Purchase deleted successfully!', 'success')
+    return redirect(url_for('inventory.purchases'))
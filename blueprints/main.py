@@ -0,0 +1,120 @@
+"""
+Dashboard and typeahead search API for Medical Management System.
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import Blueprint, current_app, jsonify, render_template, request
+from flask_login import login_required
+
+import loading_profiles
+import summary_cache
+from alert_engine import low_stock_watchlist
+from models import Customer, InventoryAlert, MedicalEquipment, Medicine, Patient
+from sales_aggregation import sales_totals
+from stock_ledger import expired_lots
+
+bp = Blueprint('main', __name__)
+
+
+# Main Dashboard route
+@bp.route('/')
+@login_required
+def dashboard():
+    today = date.today()
+
+    def compute_stock_summary():
+        return {
+            'medicine_count': Medicine.query.count(),
+            # One entry per expired lot that still holds stock
+            'expired_medicines': [
+                row._asdict() for row in expired_lots(today)
+            ],
+            # Low and out-of-stock medicines, by the alert engine's threshold
+            'low_stock_medicines': [row._asdict() for row in low_stock_watchlist()],
+            'equipment_count': MedicalEquipment.query.count(),
+            'equipment_needing_maintenance': MedicalEquipment.query.filter(
+                MedicalEquipment.next_maintenance_date <= today
+            ).count(),
+            'customer_count': Customer.query.count(),
+            'patient_count': Patient.query.count(),
+        }
+
+    # Counts and watchlists are cached until inventory, equipment or people change
+    stock_summary = summary_cache.cached(
+        f'dashboard:{today.isoformat()}', ('inventory', 'equipment', 'people'), compute_stock_summary
+    )
+
+    # Recent alerts
+    recent_alerts = InventoryAlert.query.options(*loading_profiles.ALERT_LIST)\
+                                       .filter_by(is_active=True, is_acknowledged=False)\
+                                       .order_by(InventoryAlert.created_at.desc())\
+                                       .limit(5).all()
+
+    # Daily and monthly sales summary plus the 7-day chart come from one cached aggregate query
+    first_day_of_month = today.replace(day=1)
+    window_start = min(today - timedelta(days=6), first_day_of_month)
+    daily_totals = summary_cache.cached(
+        f'sales_totals:{window_start.isoformat()}:{today.isoformat()}',
+        ('sales',),
+        lambda: {row['period']: row['total_sales'] for row in sales_totals(window_start, today)},
+    )
+    total_daily_sales = daily_totals[today]
+    total_monthly_sales = sum(total for day, total in daily_totals.items() if day >= first_day_of_month)
+
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+    else:
+        start_date = None
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+    else:
+        end_date = None
+
+    # Prepare sales data for the last 7 days for the dashboard graph
+    sales_labels = []
+    sales_data = []
+    for i in range(6, -1, -1):
+        day = today - timedelta(days=i)
+        sales_labels.append(day.strftime('%a'))
+        sales_data.append(daily_totals[day])
+
+    return render_template(
+        "dashboard.html",
+        **stock_summary,
+        recent_alerts=recent_alerts,
+        total_daily_sales=total_daily_sales,
+        total_monthly_sales=total_monthly_sales,
+        start_date=start_date,
+        end_date=end_date,
+        sales_labels=sales_labels,
+        sales_data=sales_data
+    )
+
+
+# Typeahead search API
+@bp.route('/api/search/<any(medicines, patients, customers):kind>')
+@login_required
+def search_api(kind):
+    from typeahead import search
+
+    filters = ()
+    if kind == 'medicines' and request.args.get('in_stock') == '1':
+        filters = (Medicine.quantity > 0,)
+    return jsonify(search(
+        kind,
+        request.args.get('q', ''),
+        limit=request.args.get('limit', 10, type=int),
+        cursor=request.args.get('cursor'),
+        filters=filters,
+    ))
+
+
+@bp.app_errorhandler(500)
+def internal_error(error):
+    current_app.logger.error(f'Server Error: {error}')
+    return "Something went wrong.", 500
@@ -0,0 +1,202 @@
+"""
+Patients and their medical history for Medical Management System.
+"""
+
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask_login import login_required
+from sqlalchemy import or_
+
+import fulltext
+from forms import MedicalHistoryForm, PatientForm
+from models import db, MedicalHistory, Patient
+from pagination import paginate_request
+
+bp = Blueprint('patients', __name__)
+
+
+# Patient Management Routes
+@bp.route('/patients')
+@login_required
+def patients():
+    search_query = (request.args.get('search') or '').strip()
+    patients_query = Patient.query
+    
+    if search_query and fulltext.available():
+        # Ranked matches on patient details and medical history, best first
+        ranked = fulltext.search_patients(search_query)
+        patients_list = fulltext.load_ranked(patients_query, Patient, ranked)
+        return render_template('patients.html', patients=patients_list, page=None, search_query=search_query)
+    
+    if search_query:
+        like_pattern = f"%{search_query}%"
+        patients_query = patients_query.filter(
+            or_(
+                Patient.first_name.ilike(like_pattern),
+                Patient.last_name.ilike(like_pattern),
+                Patient.phone_number.ilike(like_pattern),
+                Patient.email.ilike(like_pattern)
+            )
+        )
+    
+    page = paginate_request(patients_query, [(Patient.first_name, False), (Patient.last_name, False), (Patient.id, False)])
+    return render_template('patients.html', patients=page.items, page=page, search_query=search_query)
+
+
+@bp.route('/add_patient', methods=['GET', 'POST'])
+@login_required
+def add_patient():
+    form = PatientForm()
+    if form.validate_on_submit():
+        new_patient = Patient(
+            first_name=form.first_name.data,
+            last_name=form.last_name.data,
+            date_of_birth=form.date_of_birth.data,
+            gender=form.gender.data,
+            phone_number=form.phone_number.data,
+            email=form.email.data,
+            address=form.address.data,
+            insurance_provider=form.insurance_provider.data,
+            insurance_policy_number=form.insurance_policy_number.data,
+            insurance_group_number=form.insurance_group_number.data,
+            insurance_expiry_date=form.insurance_expiry_date.data,
+            emergency_contact_name=form.emergency_contact_name.data,
+            emergency_contact_relationship=form.emergency_contact_relationship.data,
+            emergency_contact_phone=form.emergency_contact_phone.data,
+            emergency_contact_email=form.emergency_contact_email.data,
+            blood_group=form.blood_group.data,
+            allergies=form.allergies.data,
+            chronic_conditions=form.chronic_conditions.data,
+            current_medications=form.current_medications.data
+        )
+        db.session.add(new_patient)
+        db.session.commit()
+        flash('Patient added successfully!', 'success')
+        return redirect(url_for('patients.patients'))
+    return render_template('add_patient.html', form=form)
+
+
+@bp.route('/edit_patient/<int:id>', methods=['GET', 'POST'])
+@login_required
+def edit_patient(id):
+    patient = db.session.get(Patient, id)
+    if not patient:
+        abort(404)
+    form = PatientForm(obj=patient)
+    if form.validate_on_submit():
+        patient.first_name = form.first_name.data
+        patient.last_name = form.last_name.data
+        patient.date_of_birth = form.date_of_birth.data
+        patient.gender = form.gender.data
+        patient.phone_number = form.phone_number.data
+        patient.email = form.email.data
+        patient.address = form.address.data
+        patient.insurance_provider = form.insurance_provider.data
+        patient.insurance_policy_number = form.insurance_policy_number.data
+        patient.insurance_group_number = form.insurance_group_number.data
+        patient.insurance_expiry_date = form.insurance_expiry_date.data
+        patient.emergency_contact_name = form.emergency_contact_name.data
+        patient.emergency_contact_relationship = form.emergency_contact_relationship.data
+        patient.emergency_contact_phone = form.emergency_contact_phone.data
+        patient.emergency_contact_email = form.emergency_contact_email.data
+        patient.blood_group = form.blood_group.data
+        patient.allergies = form.allergies.data
+        patient.chronic_conditions = form.chronic_conditions.data
+        patient.current_medications = form.current_medications.data
+        db.session.commit()
+        flash('Patient updated successfully!', 'success')
+        return redirect(url_for('patients.patients'))
+    return render_template('edit_patient.html', form=form, patient=patient)
+
+
+@bp.route('/delete_patient/<int:id>', methods=['POST'])
+@login_required
+def delete_patient(id):
+    patient = db.session.get(Patient, id)
+    if not patient:
+        abort(404)
+    db.session.delete(patient)
+    db.session.commit()
+    flash('Patient deleted successfully!', 'success')
+    return redirect(url_for('patients.patients'))
+
+
+@bp.route('/patient/<int:patient_id>/profile')
+@login_required
+def patient_profile(patient_id):
+    patient = Patient.query.get_or_404(patient_id)
+    medical_history = MedicalHistory.query.filter_by(patient_id=patient_id).order_by(MedicalHistory.visit_date.desc()).all()
+    return render_template('patient_profile.html', patient=patient, medical_history=medical_history)
+
+
+@bp.route('/patient/<int:patient_id>/add_medical_history', methods=['GET', 'POST'])
+@login_required
+def add_medical_history(patient_id):
+    patient = Patient.query.get_or_404(patient_id)
+    form = MedicalHistoryForm()
+    if form.validate_on_submit():
+        new_history = MedicalHistory(
+            patient_id=patient_id,
+            visit_date=form.visit_date.data,
+            chief_complaint=form.chief_complaint.data,
+            symptoms=form.symptoms.data,
+            diagnosis=form.diagnosis.data,
+            treatment=form.treatment.data,
+            prescription=form.prescription.data,
+            temperature=form.temperature.data,
+            blood_pressure_systolic=form.blood_pressure_systolic.data,
+            blood_pressure_diastolic=form.blood_pressure_diastolic.data,
+            heart_rate=form.heart_rate.data,
+            weight=form.weight.data,
+            height=form.height.data,
+            doctor_name=form.doctor_name.data,
+            notes=form.notes.data,
+            follow_up_date=form.follow_up_date.data
+        )
+        db.session.add(new_history)
+        db.session.commit()
+        flash('Medical history added successfully!', 'success')
+        return redirect(url_for('patients.patient_profile', patient_id=patient_id))
+    return render_template('add_medical_history.html', form=form, patient=patient)
+
+
+@bp.route('/patient/<int:patient_id>/medical_history/<int:history_id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_medical_history(patient_id, history_id):
+    patient = Patient.query.get_or_404(patient_id)
+    history = MedicalHistory.query.get_or_404(history_id)
+    if history.patient_id != patient_id:
+        abort(403)
+    form = MedicalHistoryForm(obj=history)
+    if form.validate_on_submit():
+        history.visit_date = form.visit_date.data
+        history.chief_complaint = form.chief_complaint.data
+        history.symptoms = form.symptoms.data
+        history.diagnosis = form.diagnosis.data
+        history.treatment = form.treatment.data
+        history.prescription = form.prescription.data
+        history.temperature = form.temperature.data
+        history.blood_pressure_systolic = form.blood_pressure_systolic.data
+        history.blood_pressure_diastolic = form.blood_pressure_diastolic.data
+        history.heart_rate = form.heart_rate.data
+        history.weight = form.weight.data
+        history.height = form.height.data
+        history.doctor_name = form.doctor_name.data
+        history.notes = form.notes.data
+        history.follow_up_date = form.follow_up_date.data
+        db.session.commit()
+        flash('Medical history updated successfully!', 'success')
+        return redirect(url_for('patients.patient_profile', patient_id=patient_id))
+    return render_template('edit_medical_history.html', form=form, patient=patient, history=history)
+
+
+@bp.route('/patient/<int:patient_id>/medical_history/<int:history_id>/delete', methods=['POST'])
+@login_required
+def delete_medical_history(patient_id, history_id):
+    patient = Patient.query.get_or_404(patient_id)
+    history = MedicalHistory.query.get_or_404(history_id)
+    if history.patient_id != patient_id:
+        abort(403)
+    db.session.delete(history)
+    db.session.commit()
+    flash('Medical history deleted successfully!', 'success')
+    return redirect(url_for('patients.patient_profile', patient_id=patient_id))
@@ -0,0 +1,297 @@
+"""
+Prescriptions and dispensing for Medical Management System.
+"""
+
+from datetime import datetime
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import or_
+
+import fulltext
+import loading_profiles
+from forms import DispenseForm, PrescriptionForm, PrescriptionItemForm
+from models import db, Patient, Prescription, PrescriptionItem, Sale, SaleItem
+from pagination import paginate_request
+from stock_ledger import allocate_stock, take_lots, InsufficientStock
+
+bp = Blueprint('prescriptions', __name__)
+
+
+# Prescription Management Routes
+@bp.route('/prescriptions')
+@login_required
+def prescriptions():
+    search_query = (request.args.get('search') or '').strip()
+    status_filter = request.args.get('status', '')
+    priority_filter = request.args.get('priority', '')
+    
+    prescriptions_query = Prescription.query.options(*loading_profiles.PRESCRIPTION_LIST)
+    
+    if status_filter:
+        prescriptions_query = prescriptions_query.filter(Prescription.status == status_filter)
+    
+    if priority_filter:
+        prescriptions_query = prescriptions_query.filter(Prescription.priority == priority_filter)
+    
+    if search_query and fulltext.available():
+        # Ranked matches on prescription text and patient name, best first
+        ranked = fulltext.search_prescriptions(search_query)
+        return render_template('prescriptions.html',
+                             prescriptions=fulltext.load_ranked(prescriptions_query, Prescription, ranked),
+                             page=None,
+                             search_query=search_query,
+                             status_filter=status_filter,
+                             priority_filter=priority_filter)
+    
+    if search_query:
+        like_pattern = f"%{search_query}%"
+        prescriptions_query = prescriptions_query.join(Patient).filter(
+            or_(
+                Prescription.prescription_number.ilike(like_pattern),
+                Prescription.doctor_name.ilike(like_pattern),
+                Patient.first_name.ilike(like_pattern),
+                Patient.last_name.ilike(like_pattern)
+            )
+        )
+    
+    page = paginate_request(prescriptions_query, [
+        (Prescription.priority, True),
+        (Prescription.prescription_date, True),
+        (Prescription.id, True),
+    ])
+    
+    return render_template('prescriptions.html', 
+                         prescriptions=page.items,
+                         page=page,
+                         search_query=search_query,
+                         status_filter=status_filter,
+                         priority_filter=priority_filter)
+
+
+@bp.route('/add_prescription', methods=['GET', 'POST'])
+@login_required
+def add_prescription():
+    form = PrescriptionForm()
+    
+    if form.validate_on_submit():
+        new_prescription = Prescription(
+            prescription_number=form.prescription_number.data,
+            patient_id=form.patient_id.data,
+            doctor_name=form.doctor_name.data,
+            doctor_license=form.doctor_license.data,
+            doctor_contact=form.doctor_contact.data,
+            clinic_name=form.clinic_name.data,
+            clinic_address=form.clinic_address.data,
+            diagnosis=form.diagnosis.data,
+            symptoms=form.symptoms.data,
+            patient_age=form.patient_age.data,
+            patient_weight=form.patient_weight.data,
+            prescription_date=form.prescription_date.data,
+            valid_until=form.valid_until.data,
+            priority=form.priority.data,
+            is_emergency=form.is_emergency.data,
+            insurance_provider=form.insurance_provider.data,
+            insurance_policy_number=form.insurance_policy_number.data,
+            insurance_approval_number=form.insurance_approval_number.data,
+            special_instructions=form.special_instructions.data,
+            pharmacist_notes=form.pharmacist_notes.data
+        )
+        db.session.add(new_prescription)
+        db.session.commit()
+        flash('Prescription added successfully!', 'success')
+        return redirect(url_for('prescriptions.prescription_detail', prescription_id=new_prescription.id))
+    
+    # Patients and medicines are looked up through /api/search as the user types
+    return render_template('add_prescription.html', form=form)
+
+
+@bp.route('/prescription/<int:prescription_id>')
+@login_required
+def prescription_detail(prescription_id):
+    prescription = Prescription.query.options(*loading_profiles.PRESCRIPTION_DETAIL)\
+                                     .filter_by(id=prescription_id).first_or_404()
+    return render_template('prescription_detail.html', prescription=prescription)
+
+
+@bp.route('/prescription/<int:prescription_id>/add_item', methods=['GET', 'POST'])
+@login_required
+def add_prescription_item(prescription_id):
+    prescription = Prescription.query.get_or_404(prescription_id)
+    form = PrescriptionItemForm()
+    
+    if form.validate_on_submit():
+        medicine_id = form.medicine_id.data if form.medicine_id.data != 0 else None
+        new_item = PrescriptionItem(
+            prescription_id=prescription_id,
+            medicine_id=medicine_id,
+            medicine_name=form.medicine_name.data,
+            medicine_strength=form.medicine_strength.data,
+            medicine_form=form.medicine_form.data,
+            prescribed_quantity=form.prescribed_quantity.data,
+            unit=form.unit.data,
+            dosage=form.dosage.data,
+            frequency=form.frequency.data,
+            duration=form.duration.data,
+            timing=form.timing.data,
+            route=form.route.data,
+            special_instructions=form.special_instructions.data,
+            substitution_allowed=form.substitution_allowed.data
+        )
+        db.session.add(new_item)
+        db.session.commit()
+        flash('Medicine added to prescription successfully!', 'success')
+        return redirect(url_for('prescriptions.prescription_detail', prescription_id=prescription_id))
+    
+    return render_template('add_prescription_item.html', form=form, prescription=prescription)
+
+
+@bp.route('/prescription/<int:prescription_id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_prescription(prescription_id):
+    prescription = Prescription.query.get_or_404(prescription_id)
+    form = PrescriptionForm(obj=prescription)
+    
+    if form.validate_on_submit():
+        prescription.prescription_number = form.prescription_number.data
+        prescription.patient_id = form.patient_id.data
+        prescription.doctor_name = form.doctor_name.data
+        prescription.doctor_license = form.doctor_license.data
+        prescription.doctor_contact = form.doctor_contact.data
+        prescription.clinic_name = form.clinic_name.data
+        prescription.clinic_address = form.clinic_address.data
+        prescription.diagnosis = form.diagnosis.data
+        prescription.symptoms = form.symptoms.data
+        prescription.patient_age = form.patient_age.data
+        prescription.patient_weight = form.patient_weight.data
+        prescription.prescription_date = form.prescription_date.data
+        prescription.valid_until = form.valid_until.data
+        prescription.priority = form.priority.data
+        prescription.is_emergency = form.is_emergency.data
+        prescription.insurance_provider = form.insurance_provider.data
+        prescription.insurance_policy_number = form.insurance_policy_number.data
+        prescription.insurance_approval_number = form.insurance_approval_number.data
+        prescription.special_instructions = form.special_instructions.data
+        prescription.pharmacist_notes = form.pharmacist_notes.data
+        db.session.commit()
+        flash('Prescription updated successfully!', 'success')
+        return redirect(url_for('prescriptions.prescription_detail', prescription_id=prescription_id))
+    
+    return render_template('edit_prescription.html', form=form, prescription=prescription)
+
+
+@bp.route('/prescription/<int:prescription_id>/dispense', methods=['GET', 'POST'])
+@login_required
+def dispense_prescription(prescription_id):
+    prescription = Prescription.query.options(*loading_profiles.PRESCRIPTION_DETAIL)\
+                                     .filter_by(id=prescription_id).first_or_404()
+    
+    if request.method == 'POST':
+        # Process dispensing
+        customer_id = request.form.get('customer_id')
+        payment_method = request.form.get('payment_method', 'Cash')
+        discount_amount = float(request.form.get('discount_amount', 0))
+        insurance_claim_amount = float(request.form.get('insurance_claim_amount', 0))
+        dispensed_by = request.form.get('dispensed_by', current_user.username)
+        dispensing_notes = request.form.get('dispensing_notes', '')
+        
+        # Calculate totals
+        total_amount = 0
+        gst_amount = 0
+        
+        # Create sale
+        sale = Sale(
+            customer_id=customer_id,
+            prescription_id=prescription_id,
+            total_amount=0,  # Will be updated
+            gst_amount=0,
+            discount_amount=discount_amount,
+            payment_method=payment_method,
+            payment_status='Paid',
+            insurance_claim_amount=insurance_claim_amount,
+            sale_type='Prescription Sale',
+            dispensed_by=dispensed_by,
+            notes=dispensing_notes
+        )
+        db.session.add(sale)
+        db.session.flush()
+        
+        # Collect the dispensed quantity of each prescription item
+        dispensed = []
+        for item in prescription.items:
+            medicine = item.medicine
+            if medicine and medicine.quantity > 0:
+                dispensed_qty = int(request.form.get(f'dispensed_qty_{item.id}', 0))
+                if dispensed_qty > 0:
+                    dispensed.append((item, medicine, dispensed_qty))
+        
+        # Take stock for every dispensed line from the earliest-expiring lots
+        try:
+            allocations = allocate_stock(((medicine.id, qty) for _, medicine, qty in dispensed),
+                                         reason='dispense', source=('sale', sale.id))
+        except InsufficientStock as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('prescriptions.dispense_prescription', prescription_id=prescription_id))
+        
+        for item, medicine, dispensed_qty in dispensed:
+            # One sale item per lot the line was filled from
+            for lot, lot_quantity in take_lots(allocations, medicine.id, dispensed_qty):
+                db.session.add(SaleItem(
+                    sale_id=sale.id,
+                    medicine_id=medicine.id,
+                    prescription_item_id=item.id,
+                    quantity=lot_quantity,
+                    dispensed_quantity=lot_quantity,
+                    price_per_unit=medicine.price,
+                    batch_id=lot['batch_id'],
+                    batch_number=lot['batch_number'],
+                    expiry_date=lot['expiry_date'],
+                    dispensing_instructions=f"{item.dosage} {item.frequency} {item.duration}"
+                ))
+            
+            # Update prescription item
+            item.dispensed_quantity += dispensed_qty
+            item.status = 'Fully Dispensed' if item.is_fully_dispensed else 'Partially Dispensed'
+            item.dispensed_at = datetime.utcnow()
+            item.dispensed_by = dispensed_by
+            
+            # Calculate amounts
+            item_total = dispensed_qty * medicine.price
+            item_gst = item_total * (medicine.gst_percent / 100)
+            
+            total_amount += item_total
+            gst_amount += item_gst
+        
+        # Update sale totals
+        sale.total_amount = total_amount
+        sale.gst_amount = gst_amount
+        
+        # Update prescription status
+        if prescription.is_fully_dispensed:
+            prescription.status = 'Fully Dispensed'
+        else:
+            prescription.status = 'Partially Dispensed'
+        prescription.processed_at = datetime.utcnow()
+        prescription.dispensed_by = dispensed_by
+        
+        db.session.commit()
+        flash('Prescription dispensed successfully!', 'success')
+        return redirect(url_for('reports.generate_bill', sale_id=sale.id))
+    
+    # GET request - show dispensing form
+    form = DispenseForm(prescription_id=prescription.id, dispensed_by=current_user.username)
+    return render_template('dispense_prescription.html', prescription=prescription, form=form)
+
+
+@bp.route('/prescription/<int:prescription_id>/delete', methods=['POST'])
+@login_required
+def delete_prescription(prescription_id):
+    prescription = Prescription.query.get_or_404(prescription_id)
+    if prescription.status != 'Pending':
+        flash('Cannot delete a prescription that has been processed.', 'error')
+        return redirect(url_for('prescriptions.prescriptions'))
+    
+    db.session.delete(prescription)
+    db.session.commit()
+    flash('Prescription deleted successfully!', 'success')
+    return redirect(url_for('prescriptions.prescriptions'))
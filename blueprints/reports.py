@@ -0,0 +1,163 @@
+"""
+Report pages, spreadsheet downloads and sale bill PDFs for Medical Management System.
+
+Registered lazily (see ``blueprints``): the URL rules are in place from
+startup, and this module, with the bill renderer and its process pool,
+loads on the first request to one of its pages.
+"""
+
+from datetime import date, datetime, timedelta
+
+from flask import abort, current_app, flash, make_response, redirect, render_template, request, url_for
+from flask_login import login_required
+
+import bill_renderer
+import loading_profiles
+from models import db, Medicine, Sale, StockMovement
+from pagination import paginate_request
+from rollups import inventory_valuation
+from sales_aggregation import PERIODS, profit_and_loss, sales_breakdown, sales_totals, top_medicines
+from stock_ledger import expired_lots, stock_on
+
+
+# Report dates before this are treated as typos
+EARLIEST_REPORT_DATE = date(1900, 1, 1)
+
+
+def _date_arg(name, label):
+    """The YYYY-MM-DD query arg ``name``; None (with a warning) when it is missing or invalid."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        parsed = None
+    if parsed is None or parsed < EARLIEST_REPORT_DATE:
+        flash(f'Ignoring invalid {label} "{value}"; use YYYY-MM-DD.', 'warning')
+        return None
+    # Nothing has happened after today yet
+    return min(parsed, date.today())
+
+
+def _date_range():
+    # Defaults to the last 30 days; longer ranges are capped at REPORT_MAX_DAYS
+    today = date.today()
+    max_days = current_app.config.get('REPORT_MAX_DAYS', 731)
+    end_date = _date_arg('end_date', 'end date') or today
+    start_date = _date_arg('start_date', 'start date') or end_date - timedelta(days=29)
+    if start_date > end_date:
+        flash('Start date must be on or before end date.', 'warning')
+        start_date = end_date - timedelta(days=29)
+    if (end_date - start_date).days >= max_days:
+        start_date = end_date - timedelta(days=max_days - 1)
+        flash(f'Reports cover at most {max_days} days; showing {start_date.isoformat()} to '
+              f'{end_date.isoformat()}.', 'warning')
+    return start_date, end_date
+
+
+# Route for Reports
+@login_required
+def reports():
+    # Sales figures come from the daily rollups, so a year costs 365 rows, not every sale in it
+    start_date, end_date = _date_range()
+    period = request.args.get('period', 'day')
+    if period not in PERIODS:
+        period = 'day'
+    sales_rows = sales_totals(start_date, end_date, period)
+    expired_medicines = expired_lots(date.today())
+    inventory = Medicine.query.all()
+    return render_template('reports.html',
+                         sales_rows=sales_rows,
+                         breakdown=sales_breakdown(start_date, end_date),
+                         top_medicines=top_medicines(start_date, end_date),
+                         valuation=inventory_valuation(start_date, end_date),
+                         expired_medicines=expired_medicines,
+                         inventory=inventory,
+                         start_date=start_date,
+                         end_date=end_date,
+                         period=period,
+                         periods=PERIODS)
+
+
+# Profit/Loss Report Route
+@login_required
+def profit_loss_report():
+    start_date, end_date = _date_range()
+    report_rows = profit_and_loss(start_date, end_date)
+    totals = {
+        key: sum(row[key] for row in report_rows)
+        for key in ('total_sales', 'discount_amount', 'net_sales', 'cogs', 'gross_profit', 'gst_amount')
+    }
+    totals['gross_margin_percent'] = (totals['gross_profit'] / totals['net_sales']) * 100 if totals['net_sales'] else 0.0
+    return render_template('profit_loss_report.html',
+                         report_rows=report_rows,
+                         totals=totals,
+                         start_date=start_date,
+                         end_date=end_date)
+
+
+# Stock on a past date, rebuilt from the stock movement ledger
+@login_required
+def stock_on_date():
+    on_date = _date_arg('date', 'date') or date.today() - timedelta(days=1)
+    balances = stock_on(on_date)
+    medicines = Medicine.query.order_by(Medicine.name).all()
+    rows = [{'medicine': medicine, 'quantity': balances.get(medicine.id, 0)} for medicine in medicines]
+    return render_template('stock_on_date.html', rows=rows, on_date=on_date)
+
+
+# Stock movement journal, optionally for one medicine
+@login_required
+def stock_movements():
+    movements_query = StockMovement.query.options(*loading_profiles.STOCK_MOVEMENT_LIST)
+    medicine_id = request.args.get('medicine_id', type=int)
+    if medicine_id:
+        movements_query = movements_query.filter(StockMovement.medicine_id == medicine_id)
+    start_date, end_date = _date_range()
+    movements_query = movements_query.filter(
+        StockMovement.created_at >= datetime.combine(start_date, datetime.min.time()),
+        StockMovement.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+    )
+    page = paginate_request(movements_query, [(StockMovement.created_at, True), (StockMovement.id, True)])
+    medicine = db.session.get(Medicine, medicine_id) if medicine_id else None
+    return render_template('stock_movements.html', movements=page.items, page=page, medicine=medicine,
+                           start_date=start_date, end_date=end_date)
+
+
+@login_required
+def download_report(report_type):
+    from report_export import REPORTS, csv_response, xlsx_response
+
+    if report_type not in REPORTS:
+        return "Invalid report type", 400
+
+    # Rows are streamed from the database; pass ?format=csv for a chunked CSV download
+    if request.args.get('format') == 'csv':
+        return csv_response(report_type)
+    return xlsx_response(report_type)
+
+
+@login_required
+def generate_bill(sale_id):
+    sale = db.session.get(Sale, sale_id, options=loading_profiles.SALE_BILL)
+    if not sale:
+        abort(404)
+    
+    if not bill_renderer.PDF_GENERATION_AVAILABLE:
+        flash('PDF generation is not available in this deployment.', 'warning')
+        return redirect(url_for('sales.sales'))
+
+    html = render_template('reports/sale_bill.html', sale=sale)
+
+    # Rendered in the bill pool and cached on disk; reprints come straight from the cache
+    try:
+        response = bill_renderer.bill_response(sale_id, html, f'sale_{sale_id}_bill.pdf')
+    except bill_renderer.RenderFailed as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('sales.sales'))
+    if response is None:
+        response = make_response(render_template('reports/bill_pending.html', sale=sale), 202)
+        response.headers['Retry-After'] = '1'
+        response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,180 @@
+"""
+Checkout and customers for Medical Management System.
+"""
+
+from flask import Blueprint, abort, flash, redirect, render_template, request, url_for
+from flask_login import login_required
+from sqlalchemy import insert, or_
+
+import loading_profiles
+from choices import customer_choices, medicine_choices
+from forms import CustomerForm, SaleForm
+from models import db, Customer, Sale
+from pagination import paginate_request
+from stock_ledger import allocate_stock, load_medicines, take_lots, InsufficientStock
+
+bp = Blueprint('sales', __name__)
+
+
+# Route for Sales Management
+@bp.route('/sales', methods=['GET', 'POST'])
+@login_required
+def sales():
+    from datetime import datetime
+    from models import SaleItem
+    form = SaleForm()
+    
+    # Populate choices for customer and medicine fields; all item rows share one cached list
+    form.customer.choices = customer_choices()
+    medicines = medicine_choices()
+    for item_form in form.items:
+        item_form.medicine.choices = medicines
+
+    if form.validate_on_submit():
+        customer = db.session.get(Customer, form.customer.data)
+        if customer is None:
+            flash('That customer no longer exists.', 'danger')
+            return redirect(url_for('sales.sales'))
+        lines = [(item_data['medicine'], item_data['quantity']) for item_data in form.items.data]
+
+        # Price every line from one IN query over the basket's medicines
+        medicines = load_medicines(medicine_id for medicine_id, _ in lines)
+        # The choice list may be older than a deletion; check before anything is written
+        if len(medicines) < len({medicine_id for medicine_id, _ in lines}):
+            flash('A medicine on this sale no longer exists; please choose again.', 'danger')
+            return redirect(url_for('sales.sales'))
+        total_amount = 0
+        gst_amount = 0
+        for medicine_id, quantity in lines:
+            medicine = medicines[medicine_id]
+            item_total = medicine.price * quantity
+            total_amount += item_total
+            gst_amount += item_total * (medicine.gst_percent / 100)
+
+        # Create the sale first, so its stock movements can refer to it
+        new_sale = Sale(
+            customer_id=customer.id,
+            total_amount=total_amount,
+            gst_amount=gst_amount
+        )
+        db.session.add(new_sale)
+        db.session.flush()  # To get the new_sale.id for the SaleItems
+
+        # Take stock for the whole basket from the earliest-expiring lots
+        try:
+            allocations = allocate_stock(lines, source=('sale', new_sale.id))
+        except InsufficientStock as e:
+            flash(str(e), 'danger')
+            return redirect(url_for('sales.sales'))
+
+        # One sale item per lot each line was filled from, inserted in one batch
+        sale_items = []
+        for medicine_id, quantity in lines:
+            for lot, lot_quantity in take_lots(allocations, medicine_id, quantity):
+                sale_items.append({
+                    'sale_id': new_sale.id,
+                    'medicine_id': medicine_id,
+                    'quantity': lot_quantity,
+                    'dispensed_quantity': lot_quantity,
+                    'price_per_unit': medicines[medicine_id].price,
+                    'batch_id': lot['batch_id'],
+                    'batch_number': lot['batch_number'],
+                    'expiry_date': lot['expiry_date'],
+                })
+        db.session.execute(insert(SaleItem), sale_items)
+
+        db.session.commit()
+        
+        flash('Sale created successfully!', 'success')
+        return redirect(url_for('reports.generate_bill', sale_id=new_sale.id))
+
+    start_date_str = request.args.get('start_date')
+    end_date_str = request.args.get('end_date')
+
+    sales_query = Sale.query.options(*loading_profiles.SALE_LIST)
+
+    if start_date_str:
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        sales_query = sales_query.filter(Sale.created_at >= start_date)
+
+    if end_date_str:
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        sales_query = sales_query.filter(Sale.created_at <= end_date)
+
+    page = paginate_request(sales_query, [(Sale.created_at, True), (Sale.id, True)])
+    
+    return render_template('sales.html', form=form, sales=page.items, page=page)
+
+
+@bp.route('/customers', methods=['GET', 'POST'])
+@login_required
+def customers():
+    form = CustomerForm()
+    search_query = (request.args.get('search') or '').strip()
+
+    if form.validate_on_submit():
+        new_customer = Customer(
+            name=form.name.data,
+            phone_number=form.phone_number.data,
+            email=form.email.data,
+            address=form.address.data
+        )
+        db.session.add(new_customer)
+        db.session.commit()
+        flash('Customer added successfully!', 'success')
+        return redirect(url_for('sales.customers'))
+
+    customers_query = Customer.query
+    if search_query:
+        like_pattern = f"%{search_query}%"
+        customers_query = customers_query.filter(
+            or_(
+                Customer.name.ilike(like_pattern),
+                Customer.phone_number.ilike(like_pattern)
+            )
+        )
+
+    page = paginate_request(customers_query, [(Customer.name, False), (Customer.id, False)])
+    return render_template(
+        'customers.html',
+        form=form,
+        customers=page.items,
+        page=page,
+        search_query=search_query
+    )
+
+
+@bp.route('/customer/<int:customer_id>/history')
+@login_required
+def customer_history(customer_id):
+    customer = Customer.query.get_or_404(customer_id)
+    sales = Sale.query.filter_by(customer_id=customer_id).all()
+    return render_template('customer_history.html', customer=customer, sales=sales)
+
+
+@bp.route('/edit_customer/<int:id>', methods=['GET', 'POST'])
+@login_required
+def edit_customer(id):
+    customer = db.session.get(Customer, id)
+    if not customer:
+        abort(404)
+    form = CustomerForm(obj=customer)
+    if form.validate_on_submit():
+        customer.name = form.name.data
+        customer.phone_number = form.phone_number.data
+        customer.email = form.email.data
+        customer.address = form.address.data
+        db.session.commit()
+        flash('Customer updated successfully!', 'success')
+        return redirect(url_for('sales.customers'))
+    return render_template('edit_customer.html', form=form, customer=customer)
+
+
+@bp.route('/delete_customer/<int:id>', methods=['GET', 'POST'])
+@login_required
+def delete_customer(id):
+    customer = db.session.get(Customer, id)
+    db.session.delete(customer)
+    db.session.commit()
+    flash('Customer deleted successfully!', 'success')
+    return redirect(url_for('sales.customers'))
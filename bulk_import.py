@@ -0,0 +1,646 @@
+"""
+Bulk import of medicines, customers, patients and purchases for Medical Management System.
+
+Migrating from another POS or loading distributor invoices means thousands
+of rows at a time, which the one-row-at-a-time forms cannot take. ``flask
+import-data <kind> <file>`` streams a CSV file (``csv``) or an Excel file
+(openpyxl in read-only mode) and imports it in chunks of ``CHUNK_SIZE``
+rows. Each chunk is:
+
+1. parsed and validated row by row; bad rows are reported with their line
+   number and skipped;
+2. resolved against the database with one lookup per table: rows that are
+   already present are skipped, and suppliers and medicines are matched by
+   name;
+3. inserted with one ``executemany`` per table and committed.
+
+Every kind has a natural key, so running the same file again imports
+nothing new, and a run that stopped part way can simply be restarted:
+
+- ``medicines``: name (case-insensitive) and batch number. Each row is one
+  lot: rows for a name already in the inventory add lots to that medicine,
+  and a new name is created from its first row;
+- ``customers``: name (case-insensitive) and phone number;
+- ``patients``: first and last name (case-insensitive) and date of birth;
+- ``purchases``: supplier and invoice number, then medicine and batch
+  number for each line. Each row is one invoice line and the lines of an
+  invoice become one purchase; lines the invoice already has are skipped
+  and the rest are added to it.
+
+Headers are matched case-insensitively with spaces read as underscores
+(``Batch Number`` is ``batch_number``). The columns of each kind are listed
+in ``IMPORTERS`` below; stock brought in by medicines (opening
+``quantity``) and purchases is booked through ``stock_ledger`` into lots and
+the stock movement ledger, as the forms do.
+"""
+
+import csv
+import os
+import time
+from datetime import date, datetime
+
+from sqlalchemy import case, func, insert, tuple_, update
+
+import fulltext
+from models import db, Customer, Medicine, MedicineBatch, Patient, Purchase, PurchaseItem, Supplier
+from stock_ledger import lot_expiry_dates, receive_stock
+
+CHUNK_SIZE = 1000
+# Row errors kept for the report; the rest are only counted
+MAX_ERRORS = 100
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+
+
+class RowError(ValueError):
+    """Raised when a row cannot be imported; the message names the column."""
+
+
+class ImportReport:
+    """Counts and timing of one import run."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.read = 0
+        self.inserted = 0
+        self.skipped = 0
+        self.invalid = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    @property
+    def rows_per_second(self):
+        elapsed = self.elapsed or time.perf_counter() - self.started
+        return self.read / elapsed if elapsed else 0.0
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def summary(self):
+        return (f'{self.kind}: {self.read} rows read, {self.inserted} imported, {self.skipped} already present, '
+                f'{self.invalid} invalid ({self.rows_per_second:.0f} rows/s)')
+
+
+# Reading
+
+def _header(name):
+    return str(name or '').strip().lower().replace(' ', '_')
+
+
+def _cell(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def read_rows(path, file_format=None):
+    """
+    Stream the rows of a CSV or XLSX file.
+
+    Args:
+        path (str): File to read.
+        file_format (str): 'csv' or 'xlsx'; taken from the extension by default.
+
+    Yields:
+        tuple: (line number, dict of normalised header -> cell value);
+               empty cells are None and blank rows are left out.
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if file_format == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            headers = [_header(name) for name in next(reader, [])]
+            for line, values in enumerate(reader, start=2):
+                row = {header: _cell(value) for header, value in zip(headers, values) if header}
+                if any(value is not None for value in row.values()):
+                    yield line, row
+    elif file_format in ('xlsx', 'xlsm'):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_header(name) for name in next(rows, ())]
+            for line, values in enumerate(rows, start=2):
+                row = {header: _cell(value) for header, value in zip(headers, values) if header}
+                if any(value is not None for value in row.values()):
+                    yield line, row
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f'Unsupported file format: {file_format!r} (use csv or xlsx)')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Validation
+
+def _text(row, column, required=False, max_length=None, default=None):
+    value = row.get(column)
+    if value is None:
+        if required:
+            raise RowError(f'{column} is required')
+        return default
+    value = str(value).strip()
+    if isinstance(row.get(column), float) and value.endswith('.0'):
+        value = value[:-2]  # Excel stores numeric codes as floats
+    if max_length and len(value) > max_length:
+        raise RowError(f'{column} is longer than {max_length} characters')
+    return value
+
+
+def _number(row, column, kind, required=False, minimum=None, default=None):
+    value = row.get(column)
+    if value is None:
+        if required:
+            raise RowError(f'{column} is required')
+        return default
+    try:
+        number = kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{column} is not a number: {value!r}')
+    if kind is int and number != float(value):
+        raise RowError(f'{column} is not a whole number: {value!r}')
+    if minimum is not None and number < minimum:
+        raise RowError(f'{column} must be at least {minimum}')
+    return number
+
+
+def _date(row, column, required=False):
+    value = row.get(column)
+    if value is None:
+        if required:
+            raise RowError(f'{column} is required')
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            pass
+    raise RowError(f'{column} is not a date (YYYY-MM-DD or DD/MM/YYYY): {value!r}')
+
+
+# Lookups shared by the importers
+
+def _supplier_ids(names):
+    """{lower-case name: supplier id} for ``names``, creating the suppliers that do not exist."""
+    names = {name.lower(): name for name in names if name}
+    if not names:
+        return {}
+
+    def lookup():
+        found = {}
+        for supplier_id, name in db.session.query(Supplier.id, func.lower(Supplier.name))\
+                                           .filter(func.lower(Supplier.name).in_(names)).order_by(Supplier.id):
+            found.setdefault(name, supplier_id)
+        return found
+
+    ids = lookup()
+    missing = [{'name': names[key]} for key in names if key not in ids]
+    if missing:
+        db.session.execute(insert(Supplier), missing)
+        ids = lookup()
+    return ids
+
+
+def _medicine_ids(names):
+    """{lower-case name: medicine id} for ``names``; medicines added through the form may share a name, the oldest is used."""
+    ids = {}
+    for medicine_id, name in db.session.query(Medicine.id, func.lower(Medicine.name))\
+                                       .filter(func.lower(Medicine.name).in_({name.lower() for name in names}))\
+                                       .order_by(Medicine.id):
+        ids.setdefault(name, medicine_id)
+    return ids
+
+
+class Importer:
+    """
+    Import rows of one kind; subclasses define the columns and the natural key.
+
+    ``parse`` turns a row into column values (raising ``RowError``), ``key``
+    gives the natural key of those values and ``existing`` returns which of
+    a chunk's keys are already in the database.
+    """
+
+    kind = None
+    model = None
+    columns = ()
+
+    def __init__(self):
+        self.seen = set()
+
+    def parse(self, row):
+        raise NotImplementedError
+
+    def key(self, values):
+        raise NotImplementedError
+
+    def existing(self, keys):
+        raise NotImplementedError
+
+    def import_chunk(self, records, report):
+        """Insert the new records of a validated chunk; ``records`` are (line, values) pairs."""
+        fresh = {}
+        for line, values in records:
+            key = self.key(values)
+            if key in self.seen or key in fresh:
+                report.skipped += 1
+            else:
+                fresh[key] = values
+        self.seen.update(fresh)
+        present = self.existing(list(fresh))
+        report.skipped += len(present)
+        new = [values for key, values in fresh.items() if key not in present]
+        if new:
+            self.insert(new)
+        report.inserted += len(new)
+
+    def insert(self, rows):
+        db.session.execute(insert(self.model), rows)
+
+    def finish(self, report):
+        """Called once after the last chunk has been committed."""
+
+
+class MedicineImporter(Importer):
+    """Columns: name, batch_number, category, expiry_date, price, gst_percent (required); quantity,
+    cost_price, minimum_stock_level, maximum_stock_level, reorder_point, location,
+    unit_of_measurement, manufacturer, supplier (name). Only the lot columns (batch_number,
+    expiry_date, quantity, cost_price) are read from rows of a medicine that already exists."""
+
+    kind = 'medicines'
+    model = Medicine
+
+    def parse(self, row):
+        return {
+            'name': _text(row, 'name', required=True, max_length=100),
+            'batch_number': _text(row, 'batch_number', required=True, max_length=50),
+            'category': _text(row, 'category', required=True, max_length=50),
+            'expiry_date': _date(row, 'expiry_date', required=True),
+            'price': _number(row, 'price', float, required=True, minimum=0),
+            'gst_percent': _number(row, 'gst_percent', float, required=True, minimum=0),
+            'quantity': _number(row, 'quantity', int, minimum=0, default=0),
+            'cost_price': _number(row, 'cost_price', float, minimum=0),
+            'minimum_stock_level': _number(row, 'minimum_stock_level', int, minimum=0, default=10),
+            'maximum_stock_level': _number(row, 'maximum_stock_level', int, minimum=1, default=1000),
+            'reorder_point': _number(row, 'reorder_point', int, minimum=0, default=5),
+            'location': _text(row, 'location', max_length=100),
+            'unit_of_measurement': _text(row, 'unit_of_measurement', max_length=20, default='Units'),
+            'manufacturer': _text(row, 'manufacturer', max_length=100),
+            'supplier': _text(row, 'supplier', max_length=100),
+        }
+
+    def key(self, values):
+        return values['name'].lower(), values['batch_number']
+
+    def existing(self, keys):
+        if not keys:
+            return set()
+        columns = (func.lower(Medicine.name), MedicineBatch.batch_number)
+        return set(db.session.query(*columns).join(MedicineBatch, MedicineBatch.medicine_id == Medicine.id)
+                                             .filter(tuple_(*columns).in_(keys)))
+
+    def insert(self, rows):
+        # Each row is a lot; a name the inventory does not have yet is created
+        # from its first row, and every lot is booked under the one medicine
+        ids = _medicine_ids(values['name'] for values in rows)
+        new = {}
+        for values in rows:
+            if values['name'].lower() not in ids:
+                new.setdefault(values['name'].lower(), values)
+        if new:
+            suppliers = _supplier_ids(values['supplier'] for values in new.values())
+            medicines = []
+            for values in new.values():
+                medicine = {column: value for column, value in values.items() if column != 'supplier'}
+                # Stock is booked below, into the medicine's lots
+                medicine['quantity'] = 0
+                medicine['supplier_id'] = suppliers.get((values['supplier'] or '').lower())
+                medicines.append(medicine)
+            db.session.execute(insert(Medicine), medicines)
+            ids.update(_medicine_ids(new))
+
+        receive_stock([{
+            'medicine_id': ids[values['name'].lower()],
+            'batch_number': values['batch_number'],
+            'expiry_date': values['expiry_date'],
+            'quantity': values['quantity'],
+            'cost_price': values['cost_price'],
+            'source': ('medicine', ids[values['name'].lower()]),
+        } for values in rows if values['quantity'] > 0], reason='import')
+        # Empty lots move no stock, but are recorded so the rows count as present
+        empty = [{
+            'medicine_id': ids[values['name'].lower()],
+            'batch_number': values['batch_number'],
+            'expiry_date': values['expiry_date'],
+            'quantity': 0,
+            'cost_price': values['cost_price'],
+        } for values in rows if values['quantity'] == 0]
+        if empty:
+            db.session.execute(insert(MedicineBatch), empty)
+
+
+class CustomerImporter(Importer):
+    """Columns: name (required); phone_number, email, address."""
+
+    kind = 'customers'
+    model = Customer
+
+    def parse(self, row):
+        return {
+            'name': _text(row, 'name', required=True, max_length=100),
+            'phone_number': _text(row, 'phone_number', max_length=20),
+            'email': _text(row, 'email', max_length=100),
+            'address': _text(row, 'address', max_length=200),
+        }
+
+    def key(self, values):
+        return values['name'].lower(), values['phone_number'] or ''
+
+    def existing(self, keys):
+        if not keys:
+            return set()
+        columns = (func.lower(Customer.name), func.coalesce(Customer.phone_number, ''))
+        return set(db.session.query(*columns).filter(tuple_(*columns).in_(keys)))
+
+
+class PatientImporter(Importer):
+    """Columns: first_name, last_name, date_of_birth, gender (required); phone_number, email, address,
+    insurance_provider, insurance_policy_number, insurance_group_number, insurance_expiry_date,
+    emergency_contact_name, emergency_contact_relationship, emergency_contact_phone,
+    emergency_contact_email, blood_group, allergies, chronic_conditions, current_medications."""
+
+    kind = 'patients'
+    model = Patient
+    TEXT_COLUMNS = (
+        ('phone_number', 20), ('email', 100), ('address', None),
+        ('insurance_provider', 100), ('insurance_policy_number', 50), ('insurance_group_number', 50),
+        ('emergency_contact_name', 100), ('emergency_contact_relationship', 50),
+        ('emergency_contact_phone', 20), ('emergency_contact_email', 100),
+        ('blood_group', 5), ('allergies', None), ('chronic_conditions', None), ('current_medications', None),
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.inserted_ids = []
+
+    def parse(self, row):
+        values = {
+            'first_name': _text(row, 'first_name', required=True, max_length=50),
+            'last_name': _text(row, 'last_name', required=True, max_length=50),
+            'date_of_birth': _date(row, 'date_of_birth', required=True),
+            'gender': _text(row, 'gender', required=True, max_length=10),
+            'insurance_expiry_date': _date(row, 'insurance_expiry_date'),
+        }
+        for column, max_length in self.TEXT_COLUMNS:
+            values[column] = _text(row, column, max_length=max_length)
+        return values
+
+    def key(self, values):
+        return values['first_name'].lower(), values['last_name'].lower(), values['date_of_birth']
+
+    def _columns(self):
+        return func.lower(Patient.first_name), func.lower(Patient.last_name), Patient.date_of_birth
+
+    def existing(self, keys):
+        if not keys:
+            return set()
+        return set(db.session.query(*self._columns()).filter(tuple_(*self._columns()).in_(keys)))
+
+    def insert(self, rows):
+        super().insert(rows)
+        # Bulk inserts bypass the search index listeners
+        keys = [self.key(values) for values in rows]
+        ids = [patient_id for patient_id, in db.session.query(Patient.id).filter(tuple_(*self._columns()).in_(keys))]
+        fulltext.index_rows(db.session.connection(), 'patients', ids)
+
+
+class PurchaseImporter(Importer):
+    """Columns: supplier, invoice_number, medicine (name), quantity, price_per_unit (required);
+    batch_number and expiry_date (default: the medicine's), invoice_date. expiry_date is required
+    for a batch the medicine does not have yet and must match the lot's for one it has."""
+
+    kind = 'purchases'
+    model = Purchase
+
+    def __init__(self):
+        super().__init__()
+        # (supplier id, invoice number, medicine id, batch number) -> lines of that key read so far
+        self.occurrences = {}
+
+    def parse(self, row):
+        return {
+            'supplier': _text(row, 'supplier', required=True, max_length=100),
+            'invoice_number': _text(row, 'invoice_number', required=True, max_length=50),
+            'invoice_date': _date(row, 'invoice_date'),
+            'medicine': _text(row, 'medicine', required=True, max_length=100),
+            'batch_number': _text(row, 'batch_number', max_length=50),
+            'expiry_date': _date(row, 'expiry_date'),
+            'quantity': _number(row, 'quantity', int, required=True, minimum=1),
+            'price_per_unit': _number(row, 'price_per_unit', float, required=True, minimum=0),
+        }
+
+    def _medicines(self, names):
+        """{lower-case name: (id, batch number, expiry date)}; the oldest is used, as in ``_medicine_ids``."""
+        medicines = {}
+        for medicine_id, name, batch_number, expiry_date in db.session.query(
+            Medicine.id, func.lower(Medicine.name), Medicine.batch_number, Medicine.expiry_date,
+        ).filter(func.lower(Medicine.name).in_({name.lower() for name in names})).order_by(Medicine.id):
+            medicines.setdefault(name, (medicine_id, batch_number, expiry_date))
+        return medicines
+
+    def _purchase_ids(self, keys):
+        return {
+            (supplier_id, invoice_number): purchase_id
+            for purchase_id, supplier_id, invoice_number in db.session.query(
+                Purchase.id, Purchase.supplier_id, Purchase.invoice_number,
+            ).filter(tuple_(Purchase.supplier_id, Purchase.invoice_number).in_(keys))
+        }
+
+    def _item_counts(self, purchase_ids):
+        """{(purchase id, medicine id, batch number): number of items} for ``purchase_ids``."""
+        if not purchase_ids:
+            return {}
+        return {
+            (purchase_id, medicine_id, batch_number): count
+            for purchase_id, medicine_id, batch_number, count in db.session.query(
+                PurchaseItem.purchase_id, PurchaseItem.medicine_id, PurchaseItem.batch_number, func.count(PurchaseItem.id),
+            ).filter(PurchaseItem.purchase_id.in_(purchase_ids)).group_by(
+                PurchaseItem.purchase_id, PurchaseItem.medicine_id, PurchaseItem.batch_number,
+            )
+        }
+
+    def import_chunk(self, records, report):
+        medicines = self._medicines(values['medicine'] for _, values in records)
+
+        resolved = []
+        for line, values in records:
+            medicine = medicines.get(values['medicine'].lower())
+            if medicine is None:
+                report.error(line, f"medicine {values['medicine']!r} is not in the inventory")
+                continue
+            resolved.append((line, values, medicine, values['batch_number'] or medicine[1]))
+        lots = lot_expiry_dates({(medicine[0], batch_number) for _, _, medicine, batch_number in resolved})
+
+        valid = []
+        for line, values, (medicine_id, default_batch, default_expiry), batch_number in resolved:
+            # A new batch needs its expiry date; an existing lot keeps the one it has
+            expiry_date = values['expiry_date']
+            lot_expiry = lots.get((medicine_id, batch_number))
+            if lot_expiry is None and expiry_date is None:
+                if batch_number != default_batch:
+                    report.error(line, f'expiry_date is required for new batch {batch_number!r}')
+                    continue
+                expiry_date = default_expiry
+            elif lot_expiry is not None:
+                if expiry_date is not None and expiry_date != lot_expiry:
+                    report.error(line, f'expiry_date {expiry_date.isoformat()} does not match batch '
+                                       f'{batch_number!r}, which expires on {lot_expiry.isoformat()}')
+                    continue
+                expiry_date = lot_expiry
+            lots.setdefault((medicine_id, batch_number), expiry_date)
+            valid.append((values, medicine_id, batch_number, expiry_date))
+
+        # Suppliers are only created for lines that are imported
+        suppliers = _supplier_ids(values['supplier'] for values, *_ in valid)
+        invoices = {}
+        for values, medicine_id, batch_number, expiry_date in valid:
+            key = (suppliers[values['supplier'].lower()], values['invoice_number'])
+            # The n-th line of an invoice for a medicine and batch is present if the
+            # invoice already has n items for them
+            line_key = key + (medicine_id, batch_number)
+            self.occurrences[line_key] = self.occurrences.get(line_key, 0) + 1
+            invoices.setdefault(key, []).append({
+                'medicine_id': medicine_id,
+                'quantity': values['quantity'],
+                'price_per_unit': values['price_per_unit'],
+                'cost_price': values['price_per_unit'],
+                'batch_number': batch_number,
+                'expiry_date': expiry_date,
+                'invoice_date': values['invoice_date'],
+                'occurrence': self.occurrences[line_key],
+            })
+        if not invoices:
+            return
+
+        # Only the lines an invoice does not have yet are imported, so a run that
+        # stopped part way through an invoice completes it when restarted
+        purchase_ids = self._purchase_ids(list(invoices))
+        counts = self._item_counts(list(purchase_ids.values()))
+        for key in list(invoices):
+            if key not in purchase_ids:
+                continue
+            missing = [line for line in invoices[key] if line['occurrence'] > counts.get(
+                (purchase_ids[key], line['medicine_id'], line['batch_number']), 0)]
+            report.skipped += len(invoices[key]) - len(missing)
+            if missing:
+                invoices[key] = missing
+            else:
+                del invoices[key]
+        if not invoices:
+            return
+
+        new_keys = [key for key in invoices if key not in purchase_ids]
+        if new_keys:
+            purchases = []
+            for supplier_id, invoice_number in new_keys:
+                invoice_lines = invoices[(supplier_id, invoice_number)]
+                invoice_date = invoice_lines[0]['invoice_date']
+                purchases.append({
+                    'supplier_id': supplier_id,
+                    'invoice_number': invoice_number,
+                    'total_amount': sum(line['quantity'] * line['price_per_unit'] for line in invoice_lines),
+                    'created_at': datetime.combine(invoice_date, datetime.min.time()) if invoice_date
+                                  else datetime.utcnow(),
+                })
+            db.session.execute(insert(Purchase), purchases)
+            purchase_ids.update(self._purchase_ids(new_keys))
+
+        # Lines added to an invoice that already existed are added to its total
+        continued = {purchase_ids[key]: sum(line['quantity'] * line['price_per_unit'] for line in invoices[key])
+                     for key in invoices if key not in new_keys}
+        if continued:
+            db.session.execute(
+                update(Purchase)
+                .where(Purchase.id.in_(continued))
+                .values(total_amount=Purchase.total_amount + case(continued, value=Purchase.id))
+                .execution_options(synchronize_session=False)
+            )
+
+        lines = []
+        for key, invoice_lines in invoices.items():
+            for line in invoice_lines:
+                line['purchase_id'] = purchase_ids[key]
+                line['source'] = ('purchase', purchase_ids[key])
+                lines.append(line)
+        batch_ids = receive_stock(lines)
+        db.session.execute(insert(PurchaseItem), [{
+            'purchase_id': line['purchase_id'],
+            'medicine_id': line['medicine_id'],
+            'quantity': line['quantity'],
+            'price_per_unit': line['price_per_unit'],
+            'batch_id': batch_id,
+            'batch_number': line['batch_number'],
+            'expiry_date': line['expiry_date'],
+        } for line, batch_id in zip(lines, batch_ids)])
+        report.inserted += len(lines)
+
+
+IMPORTERS = {importer.kind: importer for importer in (
+    MedicineImporter, CustomerImporter, PatientImporter, PurchaseImporter,
+)}
+
+
+def run_import(kind, path, file_format=None, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Import a CSV or XLSX file of ``kind`` rows, committing after each chunk.
+
+    Args:
+        kind (str): One of ``IMPORTERS``.
+        path (str): File to import.
+        file_format (str): 'csv' or 'xlsx'; taken from the extension by default.
+        chunk_size (int): Rows validated, resolved and inserted together.
+        on_chunk (callable): Called with the report after each chunk commits.
+
+    Returns:
+        ImportReport: Row counts, errors and throughput.
+    """
+    if kind not in IMPORTERS:
+        raise ValueError(f'Unknown import kind: {kind!r}')
+    importer = IMPORTERS[kind]()
+    report = ImportReport(kind)
+    for chunk in _chunks(read_rows(path, file_format), chunk_size):
+        records = []
+        for line, row in chunk:
+            report.read += 1
+            try:
+                records.append((line, importer.parse(row)))
+            except RowError as e:
+                report.error(line, str(e))
+        if records:
+            importer.import_chunk(records, report)
+        db.session.commit()
+        if on_chunk:
+            on_chunk(report)
+    importer.finish(report)
+    report.finish()
+    return report
@@ -0,0 +1,243 @@
+"""
+In-memory medicine catalog index with trigram fuzzy matching.
+
+Counter staff mistype brand names, and ``name LIKE '%term%'`` neither
+forgives typos nor ranks, and it scans the table on every keystroke. Each
+app therefore keeps a compact in-memory index of its catalogue (name,
+manufacturer, category, batch number), in ``app.extensions['catalog']``, and
+answers ranked fuzzy lookups from memory:
+
+- every word is split into padded trigrams (``"  p", " pa", "par", ...``,
+  as pg_trgm does), and an inverted index maps each trigram to an
+  ``array('i')`` of row slots, separately for the name and the other fields;
+- a lookup counts shared trigrams per slot and ranks by similarity to the
+  name plus how much of the query the row contains, so ``paracetmol`` still
+  finds ``Paracetamol 500mg`` and ``cipla`` finds that manufacturer's items.
+
+The index refreshes incrementally: at most every ``CATALOG_REFRESH_SECONDS``
+it re-reads only medicines whose ``updated_at`` moved past its watermark,
+and compares row counts to drop deleted medicines. Changed rows are
+tombstoned and re-appended; the index is rebuilt from scratch once
+tombstones outnumber live rows or after ``CATALOG_REBUILD_SECONDS``.
+Commits in this process that touch medicines trigger a refresh of that
+app's index on the next lookup.
+"""
+
+import heapq
+import re
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func
+
+from models import db, Medicine
+
+FIELDS = ('name', 'manufacturer', 'category', 'batch_number')
+
+# Minimum share of the query's trigrams a row must contain to be a match
+MIN_CONTAINMENT = 0.5
+# Weight of trigrams matched in manufacturer/category/batch against the name
+OTHER_FIELD_WEIGHT = 0.8
+# Trigrams present in more than this share of rows (and more than the floor)
+# are ignored when the query has more selective ones
+COMMON_TRIGRAM_SHARE = 0.2
+COMMON_TRIGRAM_FLOOR = 1000
+# Rows updated this close to the watermark are re-read, covering transactions
+# that committed after a refresh but stamped an earlier updated_at
+WATERMARK_OVERLAP = timedelta(seconds=5)
+
+_WORD = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def trigrams(text):
+    """Set of padded, lower-cased word trigrams of ``text``."""
+    grams = set()
+    for word in _WORD.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CatalogIndex:
+    """Trigram inverted index over one snapshot of the medicine catalogue."""
+
+    def __init__(self):
+        self.ids = array('i')            # slot -> medicine id
+        self.alive = bytearray()         # slot -> 1 while the slot is current
+        self.name_sizes = array('H')     # slot -> number of name trigrams
+        self.values = []                 # slot -> indexed field values
+        self.name_postings = {}          # trigram -> array of slots (name)
+        self.other_postings = {}         # trigram -> array of slots (other fields)
+        self.slot_of = {}                # medicine id -> current slot
+        self.watermark = None
+        self.built_at = time.monotonic()
+
+    @property
+    def dead(self):
+        return len(self.ids) - len(self.slot_of)
+
+    def _add(self, medicine_id, values):
+        slot = len(self.ids)
+        name_grams = trigrams(values[0])
+        other_grams = set().union(*(trigrams(value) for value in values[1:])) - name_grams
+        for gram in name_grams:
+            self.name_postings.setdefault(gram, array('i')).append(slot)
+        for gram in other_grams:
+            self.other_postings.setdefault(gram, array('i')).append(slot)
+        self.ids.append(medicine_id)
+        self.name_sizes.append(min(len(name_grams), 0xFFFF))
+        self.values.append(values)
+        self.alive.append(1)
+        self.slot_of[medicine_id] = slot
+
+    def _remove(self, medicine_id):
+        slot = self.slot_of.pop(medicine_id, None)
+        if slot is not None:
+            self.alive[slot] = 0
+
+    def apply(self, rows):
+        """Index ``(id, name, manufacturer, category, batch_number, updated_at)`` rows."""
+        for medicine_id, *values, updated_at in rows:
+            values = tuple(values)
+            slot = self.slot_of.get(medicine_id)
+            if slot is None or self.values[slot] != values:
+                self._remove(medicine_id)
+                self._add(medicine_id, values)
+            if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+                self.watermark = updated_at
+
+    def load(self):
+        """Index the whole catalogue."""
+        self.apply(db.session.query(*_columns()).yield_per(5000))
+
+    def refresh(self):
+        """Apply medicines changed since the watermark and drop deleted ones."""
+        query = db.session.query(*_columns())
+        if self.watermark is not None:
+            query = query.filter(Medicine.updated_at >= self.watermark - WATERMARK_OVERLAP)
+        self.apply(query.yield_per(5000))
+
+        if db.session.query(func.count(Medicine.id)).scalar() != len(self.slot_of):
+            current = {medicine_id for medicine_id, in db.session.query(Medicine.id)}
+            for medicine_id in set(self.slot_of) - current:
+                self._remove(medicine_id)
+            missing = current - set(self.slot_of)
+            if missing:
+                self.apply(db.session.query(*_columns()).filter(Medicine.id.in_(missing)))
+
+    def search(self, term, limit=50):
+        """
+        Rank indexed medicines against ``term``.
+
+        Returns:
+            list: (medicine id, score) pairs, best match first; scores are in (0, 1].
+        """
+        query = trigrams(term)
+        if not query:
+            return []
+        # Trigrams found in most rows (the "B0" of every batch number, common
+        # suffixes) only inflate the candidate set, so leave them out when the
+        # query has more selective ones. Trigrams no row has still count
+        # towards the query size, which is what penalises typos.
+        common = max(COMMON_TRIGRAM_SHARE * len(self.slot_of), COMMON_TRIGRAM_FLOOR)
+        frequency = {
+            gram: len(self.name_postings.get(gram, ())) + len(self.other_postings.get(gram, ()))
+            for gram in query
+        }
+        if any(0 < count <= common for count in frequency.values()):
+            query = {gram for gram, count in frequency.items() if count <= common}
+
+        # Shared trigram counts per slot; Counter.update walks the posting arrays in C
+        name_hits, other_hits = Counter(), Counter()
+        for gram in query:
+            name_hits.update(self.name_postings.get(gram, ()))
+            other_hits.update(self.other_postings.get(gram, ()))
+
+        size = len(query)
+        needed = MIN_CONTAINMENT * size
+        alive, name_sizes, ids = self.alive, self.name_sizes, self.ids
+        scored = []
+        for slot, shared in name_hits.items():
+            contained = shared + OTHER_FIELD_WEIGHT * other_hits.pop(slot, 0)
+            if contained >= needed and alive[slot]:
+                similarity = shared / (size + name_sizes[slot] - shared)
+                scored.append((0.6 * contained / size + 0.4 * similarity, ids[slot]))
+        # Slots left in other_hits matched on manufacturer/category/batch only
+        other_needed = needed / OTHER_FIELD_WEIGHT
+        for slot, shared in other_hits.items():
+            if shared >= other_needed and alive[slot]:
+                scored.append((0.6 * OTHER_FIELD_WEIGHT * shared / size, ids[slot]))
+        return [(medicine_id, round(score, 4)) for score, medicine_id in heapq.nsmallest(
+            limit, scored, key=lambda pair: (-pair[0], pair[1])
+        )]
+
+
+def _columns():
+    return [Medicine.id] + [getattr(Medicine, field) for field in FIELDS] + [Medicine.updated_at]
+
+
+def _stale(index):
+    rebuild_after = current_app.config.get('CATALOG_REBUILD_SECONDS', 3600)
+    return index.dead > len(index.slot_of) or time.monotonic() - index.built_at > rebuild_after
+
+
+class Catalog:
+    """One app's catalog index and when it was last checked against the database."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.checked_at = 0.0
+
+    def get_index(self):
+        interval = current_app.config.get('CATALOG_REFRESH_SECONDS', 5)
+        if self.index is not None and time.monotonic() - self.checked_at < interval:
+            return self.index
+        with self.lock:
+            if self.index is None or _stale(self.index):
+                index = CatalogIndex()
+                index.load()
+                self.index = index
+            elif time.monotonic() - self.checked_at >= interval:
+                self.index.refresh()
+            self.checked_at = time.monotonic()
+        return self.index
+
+
+def get_index():
+    """The current app's catalog index, built or refreshed as needed."""
+    return current_app.extensions['catalog'].get_index()
+
+
+def search(term, limit=50):
+    """Fuzzy, ranked catalogue lookup; (medicine id, score) pairs, best first."""
+    return get_index().search(term, limit)
+
+
+def _record_flush(session, flush_context):
+    if any(isinstance(obj, Medicine) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info['catalog_changed'] = True
+
+
+def _apply_after_commit(session):
+    if session.info.pop('catalog_changed', False) and has_app_context():
+        state = current_app.extensions.get('catalog')
+        if state is not None:
+            state.checked_at = 0.0
+
+
+def _discard_after_rollback(session):
+    session.info.pop('catalog_changed', None)
+
+
+def init_app(app):
+    """Give the app its own catalog index, refreshed promptly after this process changes medicines."""
+    app.extensions['catalog'] = Catalog()
+    if not event.contains(db.session, 'after_flush', _record_flush):
+        event.listen(db.session, 'after_flush', _record_flush)
+        event.listen(db.session, 'after_commit', _apply_after_commit)
+        event.listen(db.session, 'after_rollback', _discard_after_rollback)
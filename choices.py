@@ -0,0 +1,160 @@
+"""
+Cached dropdown choices for Medical Management System.
+
+Select fields need ``(id, label)`` pairs for every medicine, customer,
+supplier or patient. Building them from full ORM rows on every request, and
+once per entry of a FieldList, grows with the catalogue. The providers here
+fetch only the id and label columns and keep the list per process, so all
+entries of a form share one list and repeated requests reuse it.
+
+A cached list is rebuilt when:
+
+- this process commits an insert, update or delete on the table (a version
+  counter bumped from SQLAlchemy session events);
+- the table's highest id or row count changes, which catches rows added
+  or deleted by other worker processes with one aggregate query, so a
+  freshly added item never fails choice validation on another worker and
+  a deleted one drops out of the list at once;
+- it is older than ``CHOICES_CACHE_TTL`` seconds, which bounds how long
+  renames made elsewhere stay visible.
+
+Each cached list also keeps an id -> label map; templates use it through
+``choice_label`` to show the selected entry without scanning the list.
+"""
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, func
+
+from models import db, Customer, Medicine, Patient, Supplier
+
+_PENDING_KEY = 'choices_tables'
+
+_lock = threading.Lock()
+_versions = {}
+_lists = {}
+# id(list) -> (list, {value: label}) for every cached list
+_labels = {}
+
+
+def _record_flush(session, flush_context):
+    tables = {
+        obj.__tablename__
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, '__tablename__')
+    }
+    if tables:
+        session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+
+def _record_bulk_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table is not None:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).add(mapper.local_table.name)
+
+
+def _apply_after_commit(session):
+    tables = session.info.pop(_PENDING_KEY, None)
+    if tables:
+        with _lock:
+            for table in tables:
+                _versions[table] = _versions.get(table, 0) + 1
+
+
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    """Hook choice list invalidation into the session and expose ``choice_label`` to templates."""
+    app.jinja_env.globals['choice_label'] = choice_label
+    if not event.contains(db.session, 'after_flush', _record_flush):
+        event.listen(db.session, 'after_flush', _record_flush)
+        event.listen(db.session, 'do_orm_execute', _record_bulk_statement)
+        event.listen(db.session, 'after_commit', _apply_after_commit)
+        event.listen(db.session, 'after_rollback', _discard_after_rollback)
+
+
+def _cached(name, model, build):
+    """Return the list ``name`` built by ``build``, rebuilding it when ``model`` changed."""
+    table = model.__tablename__
+    fingerprint = (_versions.get(table, 0),) + tuple(
+        db.session.query(func.max(model.id), func.count(model.id)).one()
+    )
+    now = time.monotonic()
+    ttl = current_app.config.get('CHOICES_CACHE_TTL', 300)
+
+    entry = _lists.get(name)
+    if entry is not None and entry[0] == fingerprint and entry[1] > now:
+        return entry[2]
+
+    choices = build()
+    with _lock:
+        if entry is not None:
+            _labels.pop(id(entry[2]), None)
+        _lists[name] = (fingerprint, now + ttl, choices)
+        _labels[id(choices)] = (choices, dict(choices))
+    return choices
+
+
+def choice_label(choices, value):
+    """
+    The label of ``value`` in ``choices``, or '' when it is not there.
+
+    Lists from the providers below are looked up in their cached map;
+    other lists are scanned.
+    """
+    if value is None or value == '':
+        return ''
+    entry = _labels.get(id(choices))
+    if entry is not None and entry[0] is choices:
+        return entry[1].get(value, '')
+    return next((label for choice, label in choices or () if choice == value), '')
+
+
+def medicine_choices():
+    """(id, name) pairs for every medicine, ordered by name."""
+    return _cached('medicines', Medicine, lambda: [
+        (medicine_id, name)
+        for medicine_id, name in db.session.query(Medicine.id, Medicine.name).order_by(Medicine.name)
+    ])
+
+
+def medicine_batch_choices():
+    """(id, "name - batch") pairs for every medicine, after a 'Select Medicine' placeholder."""
+    return _cached('medicine_batches', Medicine, lambda: [(0, 'Select Medicine')] + [
+        (medicine_id, f'{name} - {batch_number}')
+        for medicine_id, name, batch_number in db.session.query(
+            Medicine.id, Medicine.name, Medicine.batch_number
+        ).order_by(Medicine.name)
+    ])
+
+
+def customer_choices():
+    """(id, name) pairs for every customer, ordered by name."""
+    return _cached('customers', Customer, lambda: [
+        (customer_id, name)
+        for customer_id, name in db.session.query(Customer.id, Customer.name).order_by(Customer.name)
+    ])
+
+
+def supplier_choices(placeholder=False):
+    """(id, name) pairs for every supplier, optionally after a 'Select Supplier' placeholder."""
+    suppliers = _cached('suppliers', Supplier, lambda: [
+        (supplier_id, name)
+        for supplier_id, name in db.session.query(Supplier.id, Supplier.name).order_by(Supplier.name)
+    ])
+    return [(0, 'Select Supplier')] + suppliers if placeholder else suppliers
+
+
+def patient_choices():
+    """(id, full name) pairs for every patient, ordered by first and last name."""
+    return _cached('patients', Patient, lambda: [
+        (patient_id, f'{first_name} {last_name}')
+        for patient_id, first_name, last_name in db.session.query(
+            Patient.id, Patient.first_name, Patient.last_name
+        ).order_by(Patient.first_name, Patient.last_name)
+    ])
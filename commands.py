@@ -0,0 +1,229 @@
+"""
+Maintenance commands for Medical Management System.
+
+``init_app`` adds these to the ``flask`` CLI. Each command imports what it
+needs when it runs, so ``flask send-mail`` does not load the PDF renderer
+and ``flask render-bills`` does not load the mail queue.
+"""
+
+from datetime import date, timedelta
+
+import click
+from flask import current_app, render_template
+from flask.cli import with_appcontext
+
+from models import db
+
+
+@click.command('refresh-alerts')
+@with_appcontext
+def refresh_alerts_command():
+    """Regenerate inventory alerts from current stock, expiry and maintenance data."""
+    from alert_engine import refresh_alerts as run_alert_refresh
+
+    counts = run_alert_refresh()
+    click.echo(f"Alerts refreshed: {counts['created']} new, {counts['updated']} updated, "
+               f"{counts['resolved']} resolved.")
+
+
+@click.command('backfill-batches')
+@with_appcontext
+def backfill_batches_command():
+    """Create a default stock lot for every medicine that has none."""
+    from stock_ledger import backfill_batches
+
+    created = backfill_batches()
+    db.session.commit()
+    click.echo(f"Created {created} batches.")
+
+
+@click.command('prestart')
+@click.option('--skip-migrations', is_flag=True, help='Only ensure the default admin exists.')
+@with_appcontext
+def prestart_command(skip_migrations):
+    """Apply migrations and create the default admin, once per deployment."""
+    import startup
+
+    startup.prestart(current_app._get_current_object(), migrate=not skip_migrations)
+    click.echo("Pre-start complete.")
+
+
+@click.command('send-mail')
+@click.option('--loop', is_flag=True, help='Keep running and deliver new mail as it is queued.')
+@click.option('--interval', type=float, default=5, show_default=True, help='Seconds between polls with --loop.')
+@with_appcontext
+def send_mail_command(loop, interval):
+    """Deliver queued email from the outbox."""
+    import time
+
+    import mail_queue
+
+    while True:
+        counts = mail_queue.drain()
+        if any(counts.values()) or not loop:
+            click.echo(f"Mail sent: {counts['sent']}, retrying: {counts['retrying']}, failed: {counts['failed']}.")
+        if not loop:
+            return
+        time.sleep(interval)
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Create and refill the full-text search tables (SQLite; PostgreSQL indexes itself)."""
+    import fulltext
+
+    fulltext.rebuild(db.session.connection())
+    db.session.commit()
+    click.echo("Search index rebuilt.")
+
+
+@click.command('render-bills')
+@click.option('--start', type=click.DateTime(['%Y-%m-%d']), help='First day (default: today).')
+@click.option('--end', type=click.DateTime(['%Y-%m-%d']), help='Last day (default: --start).')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True),
+              help='ZIP file to write (default: bills_<start>_<end>.zip).')
+@click.option('--workers', type=int, help='Render processes (default: CPU count).')
+@click.option('--no-reports', is_flag=True, help='Only render the sale bills.')
+@with_appcontext
+def render_bills_command(start, end, output, workers, no_reports):
+    """Render a date range of sale bills and the PDF reports into one ZIP archive."""
+    from sqlalchemy import func
+
+    import bill_renderer
+    import loading_profiles
+    from models import Medicine, Sale
+    from stock_ledger import expired_lots
+
+    if not bill_renderer.PDF_GENERATION_AVAILABLE:
+        raise click.ClickException('WeasyPrint is not installed.')
+    start = start.date() if start else date.today()
+    end = end.date() if end else start
+    output = output or f'bills_{start:%Y%m%d}_{end:%Y%m%d}.zip'
+
+    in_range = (Sale.created_at >= start, Sale.created_at < end + timedelta(days=1))
+    bill_count = db.session.query(func.count(Sale.id)).filter(*in_range).scalar()
+
+    def documents():
+        # Bills in chunks; each chunk loads its customers, items and medicines in a few queries
+        sale_ids = [sale_id for sale_id, in db.session.query(Sale.id).filter(*in_range).order_by(Sale.id)]
+        for offset in range(0, len(sale_ids), 200):
+            chunk = sale_ids[offset:offset + 200]
+            for sale in Sale.query.options(*loading_profiles.SALE_BILL).filter(Sale.id.in_(chunk)).order_by(Sale.id):
+                html = render_template('reports/sale_bill.html', sale=sale)
+                yield f'bills/sale_{sale.id}_bill.pdf', html, sale.id
+            db.session.expunge_all()
+        if no_reports:
+            return
+        # Report rows are streamed as plain column tuples, so memory does not grow with the range;
+        # each template iterates its query afresh
+        sales = db.session.query(Sale.id, Sale.total_amount, Sale.gst_amount, Sale.created_at)\
+                          .filter(*in_range).order_by(Sale.created_at, Sale.id).yield_per(1000)
+        inventory = db.session.query(Medicine.name, Medicine.batch_number, Medicine.category, Medicine.quantity,
+                                     Medicine.price).order_by(Medicine.name).yield_per(1000)
+        reports = {
+            'sales_report': {'sales': sales},
+            'gst_report': {'sales': sales},
+            'inventory_report': {'inventory': inventory},
+            'expiry_report': {'expired_medicines': expired_lots(date.today())},
+        }
+        for name, context in reports.items():
+            yield f'reports/{name}.pdf', render_template(f'reports/{name}.html', **context), None
+
+    total = bill_count + (0 if no_reports else 4)
+    with current_app.test_request_context(), click.progressbar(length=total, label='Rendering') as progress:
+        written, elapsed = bill_renderer.render_batch(
+            documents(), output, workers=workers, on_progress=lambda name: progress.update(1),
+        )
+    click.echo(f"Wrote {written} PDFs ({bill_count} bills) to {output} in {elapsed:.1f}s "
+               f"({bill_count / elapsed if elapsed else 0:.1f} bills/s).")
+
+
+@click.command('rebuild-rollups')
+@click.option('--start', type=click.DateTime(['%Y-%m-%d']), help='First day to rebuild (default: first sale).')
+@click.option('--end', type=click.DateTime(['%Y-%m-%d']), help='Last day to rebuild (default: last sale).')
+@with_appcontext
+def rebuild_rollups_command(start, end):
+    """Recompute the daily sales rollups from the raw sales."""
+    import rollups
+    import summary_cache
+
+    daily_sales, daily_medicines = rollups.rebuild(start and start.date(), end and end.date())
+    db.session.commit()
+    summary_cache.invalidate('sales')
+    click.echo(f"Rollups rebuilt: {daily_sales} daily sales rows, {daily_medicines} daily medicine rows.")
+
+
+@click.command('snapshot-inventory')
+@click.option('--date', 'snapshot_date', type=click.DateTime(['%Y-%m-%d']), help='Day to record (default: yesterday).')
+@with_appcontext
+def snapshot_inventory_command(snapshot_date):
+    """Record the closing stock and valuation of a past day; run nightly from cron."""
+    import rollups
+
+    try:
+        recorded = rollups.snapshot_inventory(snapshot_date and snapshot_date.date())
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    db.session.commit()
+    click.echo(f"Inventory snapshot taken for {recorded} medicines.")
+
+
+@click.command('audit-stock')
+@with_appcontext
+def audit_stock_command():
+    """List medicines whose stock differs from the stock movement ledger."""
+    from stock_ledger import stock_discrepancies
+
+    discrepancies = stock_discrepancies()
+    for row in discrepancies:
+        click.echo(f"{row['name']} (#{row['medicine_id']}): quantity {row['quantity']}, ledger {row['ledger_quantity']}")
+    if discrepancies:
+        raise click.ClickException(f'{len(discrepancies)} medicines differ from the stock ledger.')
+    click.echo("Stock matches the ledger.")
+
+
+@click.command('import-data')
+@click.argument('kind', type=click.Choice(['medicines', 'customers', 'patients', 'purchases']))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'xlsx']),
+              help='File format (default: from the file extension).')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows validated and inserted per transaction.')
+@with_appcontext
+def import_data_command(kind, path, file_format, chunk_size):
+    """Bulk import medicines, customers, patients or purchase invoice lines from CSV or XLSX."""
+    import bulk_import
+
+    try:
+        report = bulk_import.run_import(
+            kind, path, file_format, chunk_size,
+            on_chunk=lambda report: click.echo(f"  {report.read} rows read, {report.inserted} imported "
+                                               f"({report.rows_per_second:.0f} rows/s)"),
+        )
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for line, message in report.errors:
+        click.echo(f"Line {line}: {message}")
+    if report.invalid > len(report.errors):
+        click.echo(f"... and {report.invalid - len(report.errors)} more invalid rows")
+    click.echo(report.summary())
+
+
+COMMANDS = (
+    refresh_alerts_command,
+    backfill_batches_command,
+    prestart_command,
+    send_mail_command,
+    rebuild_search_index_command,
+    render_bills_command,
+    rebuild_rollups_command,
+    snapshot_inventory_command,
+    audit_stock_command,
+    import_data_command,
+)
+
+
+def init_app(app):
+    """Add the maintenance commands to ``app.cli``."""
+    for command in COMMANDS:
+        app.cli.add_command(command)
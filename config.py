@@ -10,6 +10,8 @@ This module provides configuration classes for different environments:
 import os
 from datetime import timedelta
 
+from deploy_profile import engine_options
+
 class Config:
     """Base configuration class with common settings."""
     
@@ -20,11 +22,15 @@ class Config:
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///medical_management.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SQLALCHEMY_RECORD_QUERIES = True
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_recycle': 300,
-        'pool_pre_ping': True
-    }
+    # Pool size follows the gunicorn thread count; see deploy_profile.py
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    
+    # SQL profiling (Server-Timing headers, per-request stats, slow query log).
+    # Query recording is only switched on with profiling so it costs nothing otherwise.
+    SQL_PROFILING = os.environ.get('SQL_PROFILING', 'False').lower() == 'true'
+    SQLALCHEMY_RECORD_QUERIES = SQL_PROFILING
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'slow_queries.log')
     
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=int(os.environ.get('SESSION_LIFETIME_HOURS', 8)))
@@ -45,8 +51,44 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
     
+    # Outbound mail queue: seconds between outbox polls by each web process's mail
+    # thread (0 disables it; run `flask send-mail --loop` instead), batch size and retries
+    MAIL_QUEUE_POLL_SECONDS = int(os.environ.get('MAIL_QUEUE_POLL_SECONDS', 10))
+    MAIL_QUEUE_BATCH_SIZE = int(os.environ.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    MAIL_MAX_ATTEMPTS = int(os.environ.get('MAIL_MAX_ATTEMPTS', 6))
+    MAIL_RETRY_BASE_SECONDS = int(os.environ.get('MAIL_RETRY_BASE_SECONDS', 30))
+    MAIL_RETRY_MAX_SECONDS = int(os.environ.get('MAIL_RETRY_MAX_SECONDS', 3600))
+    
+    # Dashboard summary cache: in-process by default, Redis when SUMMARY_CACHE_URL is set
+    SUMMARY_CACHE_URL = os.environ.get('SUMMARY_CACHE_URL')
+    SUMMARY_CACHE_TTL = int(os.environ.get('SUMMARY_CACHE_TTL', 60))
+    SUMMARY_CACHE_MAX_ENTRIES = int(os.environ.get('SUMMARY_CACHE_MAX_ENTRIES', 256))
+    # Seconds to wait for Redis before computing a summary uncached
+    SUMMARY_CACHE_TIMEOUT = float(os.environ.get('SUMMARY_CACHE_TIMEOUT', 0.5))
+    
+    # Longest date range a report may cover (days)
+    REPORT_MAX_DAYS = int(os.environ.get('REPORT_MAX_DAYS', 731))
+    
+    # Dropdown choice lists are rebuilt at least this often (seconds)
+    CHOICES_CACHE_TTL = int(os.environ.get('CHOICES_CACHE_TTL', 300))
+    
+    # Time budget for one typeahead search request (milliseconds)
+    TYPEAHEAD_BUDGET_MS = int(os.environ.get('TYPEAHEAD_BUDGET_MS', 150))
+    
+    # In-memory medicine catalog index: delta refresh and full rebuild intervals (seconds)
+    CATALOG_REFRESH_SECONDS = int(os.environ.get('CATALOG_REFRESH_SECONDS', 5))
+    CATALOG_REBUILD_SECONDS = int(os.environ.get('CATALOG_REBUILD_SECONDS', 3600))
+    
+    # Sale bill PDFs: render pool size, disk cache (default: instance/bill_cache) and how
+    # long a request waits for a render before showing a self-refreshing "preparing" page
+    BILL_RENDER_WORKERS = int(os.environ.get('BILL_RENDER_WORKERS', 2))
+    BILL_CACHE_DIR = os.environ.get('BILL_CACHE_DIR')
+    BILL_RENDER_WAIT_SECONDS = float(os.environ.get('BILL_RENDER_WAIT_SECONDS', 3))
+    
     # Application settings
     ITEMS_PER_PAGE = int(os.environ.get('ITEMS_PER_PAGE', 20))
+    # Seconds between background alert refreshes; 0 disables the thread (use `flask refresh-alerts`)
+    ALERT_REFRESH_INTERVAL_SECONDS = int(os.environ.get('ALERT_REFRESH_INTERVAL_SECONDS', 0))
     LANGUAGES = ['en']
     
     # Security headers
@@ -88,6 +130,7 @@ class ProductionConfig(Config):
     if _db_url.startswith('postgres://'):
         _db_url = _db_url.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = _db_url
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(_db_url)
 
 class TestingConfig(Config):
     """Testing environment configuration."""
@@ -97,6 +140,7 @@ class TestingConfig(Config):
     
     # In-memory database for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     
     # Disable CSRF for testing
     WTF_CSRF_ENABLED = False
@@ -104,6 +148,9 @@ class TestingConfig(Config):
     # Fast password hashing for tests
     BCRYPT_LOG_ROUNDS = 4
     
+    # Tests deliver queued mail themselves
+    MAIL_QUEUE_POLL_SECONDS = 0
+    
     # No session timeout for tests
     PERMANENT_SESSION_LIFETIME = timedelta(days=1)
 
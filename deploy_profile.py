@@ -0,0 +1,116 @@
+"""
+Deployment profile for Medical Management System.
+
+Gunicorn's worker settings and the SQLAlchemy connection pool have to be
+sized together: every request thread may hold one database connection, and
+every worker process has its own pool. This module derives both from the
+CPU count and the environment, so ``gunicorn.conf.py`` and ``config.py``
+agree:
+
+- ``WEB_CONCURRENCY`` worker processes (default: CPUs + 1, at least 2 and
+  at most ``GUNICORN_MAX_WORKERS``);
+- the ``gthread`` worker class with ``GUNICORN_THREADS`` threads (default
+  4). Requests spend most of their time waiting on the database, so
+  threads overlap that wait without needing an async database driver.
+  On SQLite, which lets one writer in at a time, the default is one
+  thread, i.e. plain ``sync`` workers;
+- a pool of one connection per thread (``DB_POOL_SIZE``) plus
+  ``DB_MAX_OVERFLOW`` extra for the mail and alert background threads;
+- the total, workers x (pool size + overflow), kept under
+  ``DB_MAX_CONNECTIONS`` minus ``DB_RESERVED_CONNECTIONS`` (left for
+  migrations, cron jobs and psql). Overflow and then pool size are reduced
+  to fit, and the profile says so in ``warnings``.
+
+Run ``python deploy_profile.py`` to print the profile for this machine.
+"""
+
+import os
+
+
+def _int(env, name, default):
+    value = env.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def build_profile(env=None, cpu_count=None):
+    """
+    Derive gunicorn and connection pool settings.
+
+    Args:
+        env (dict): Environment to read; defaults to ``os.environ``.
+        cpu_count (int): CPUs available; defaults to ``os.cpu_count()``.
+
+    Returns:
+        dict: workers, worker_class, threads, timeout, graceful_timeout,
+              max_requests, pool_size, max_overflow, pool_timeout,
+              connections (the most the app can open) and warnings.
+    """
+    env = os.environ if env is None else env
+    cpus = cpu_count or os.cpu_count() or 1
+
+    workers = _int(env, 'WEB_CONCURRENCY', min(max(cpus + 1, 2), _int(env, 'GUNICORN_MAX_WORKERS', 8)))
+    # SQLite serialises writers, so extra threads only queue on its lock
+    sqlite = env.get('DATABASE_URL', 'sqlite').startswith('sqlite')
+    threads = max(_int(env, 'GUNICORN_THREADS', 1 if sqlite else 4), 1)
+    worker_class = env.get('GUNICORN_WORKER_CLASS') or ('gthread' if threads > 1 else 'sync')
+    if worker_class == 'sync':
+        threads = 1
+
+    pool_size = _int(env, 'DB_POOL_SIZE', threads)
+    max_overflow = _int(env, 'DB_MAX_OVERFLOW', 2)
+    budget = _int(env, 'DB_MAX_CONNECTIONS', 100) - _int(env, 'DB_RESERVED_CONNECTIONS', 10)
+
+    warnings = []
+    if workers * (pool_size + max_overflow) > budget:
+        max_overflow = max(budget // workers - pool_size, 0)
+        if workers * (pool_size + max_overflow) > budget:
+            pool_size = max(budget // workers, 1)
+        warnings.append(
+            f'{workers} workers x {threads} threads exceed the connection budget of {budget}; '
+            f'pool reduced to {pool_size} + {max_overflow} overflow per worker'
+        )
+    if pool_size < threads:
+        warnings.append(f'pool_size {pool_size} < {threads} threads: requests may wait for a connection')
+
+    return {
+        'workers': workers,
+        'worker_class': worker_class,
+        'threads': threads,
+        'timeout': _int(env, 'GUNICORN_TIMEOUT', 120),
+        'graceful_timeout': _int(env, 'GUNICORN_GRACEFUL_TIMEOUT', 30),
+        # Recycle workers now and then so slow leaks (PDF rendering, caches) cannot build up
+        'max_requests': _int(env, 'GUNICORN_MAX_REQUESTS', 2000),
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': _int(env, 'DB_POOL_TIMEOUT', 10),
+        'connections': workers * (pool_size + max_overflow),
+        'warnings': warnings,
+    }
+
+
+def engine_options(database_url, env=None):
+    """
+    ``SQLALCHEMY_ENGINE_OPTIONS`` for ``database_url`` under the current profile.
+
+    SQLite keeps SQLAlchemy's default pool, which does not take these sizes.
+    """
+    options = {
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    }
+    if database_url and not database_url.startswith('sqlite'):
+        profile = build_profile(env)
+        options.update(
+            pool_size=profile['pool_size'],
+            max_overflow=profile['max_overflow'],
+            pool_timeout=profile['pool_timeout'],
+        )
+    return options
+
+
+if __name__ == '__main__':
+    for key, value in build_profile().items():
+        if key != 'warnings':
+            print(f'{key:>17}: {value}')
+    for warning in build_profile()['warnings']:
+        print(f'Warning: {warning}')
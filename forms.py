@@ -31,8 +31,8 @@ class MedicineForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(MedicineForm, self).__init__(*args, **kwargs)
         # Populate supplier choices
-        from models import Supplier
-        self.supplier_id.choices = [(0, 'Select Supplier')] + [(s.id, s.name) for s in Supplier.query.order_by('name').all()]
+        from choices import supplier_choices
+        self.supplier_id.choices = supplier_choices(placeholder=True)
 
 class RegistrationForm(FlaskForm):
     username = StringField('Username', validators=[DataRequired(), Length(min=2, max=20)])
@@ -90,6 +90,9 @@ class PurchaseItemForm(FlaskForm):
     medicine = SelectField('Medicine', coerce=int, validators=[DataRequired()])
     quantity = IntegerField('Quantity', validators=[DataRequired(), NumberRange(min=1)])
     price_per_unit = FloatField('Price per Unit', validators=[DataRequired(), NumberRange(min=0)])
+    # Left blank, the medicine's default batch and expiry are used
+    batch_number = StringField('Batch Number', validators=[Optional(), Length(max=50)])
+    expiry_date = DateField('Expiry Date', validators=[Optional()])
 
 class PurchaseForm(FlaskForm):
     supplier = SelectField('Supplier', coerce=int, validators=[DataRequired()])
@@ -198,8 +201,8 @@ class MedicalEquipmentForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(MedicalEquipmentForm, self).__init__(*args, **kwargs)
         # Populate supplier choices
-        from models import Supplier
-        self.supplier_id.choices = [(0, 'Select Supplier')] + [(s.id, s.name) for s in Supplier.query.order_by('name').all()]
+        from choices import supplier_choices
+        self.supplier_id.choices = supplier_choices(placeholder=True)
 
 class InventoryAlertForm(FlaskForm):
     alert_type = SelectField('Alert Type', 
@@ -253,8 +256,8 @@ class PrescriptionForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(PrescriptionForm, self).__init__(*args, **kwargs)
         # Populate patient choices
-        from models import Patient
-        self.patient_id.choices = [(p.id, p.full_name) for p in Patient.query.order_by(Patient.first_name, Patient.last_name).all()]
+        from choices import patient_choices
+        self.patient_id.choices = patient_choices()
 
 class PrescriptionItemForm(FlaskForm):
     medicine_id = SelectField('Medicine', coerce=int, validators=[Optional()])
@@ -290,8 +293,8 @@ class PrescriptionItemForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(PrescriptionItemForm, self).__init__(*args, **kwargs)
         # Populate medicine choices
-        from models import Medicine
-        self.medicine_id.choices = [(0, 'Select Medicine')] + [(m.id, f"{m.name} - {m.batch_number}") for m in Medicine.query.order_by('name').all()]
+        from choices import medicine_batch_choices
+        self.medicine_id.choices = medicine_batch_choices()
 
 class EnhancedSaleForm(FlaskForm):
     customer_id = SelectField('Customer', coerce=int, validators=[DataRequired()])
@@ -322,8 +325,9 @@ class EnhancedSaleForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(EnhancedSaleForm, self).__init__(*args, **kwargs)
         # Populate customer and prescription choices
-        from models import Customer, Prescription
-        self.customer_id.choices = [(c.id, c.name) for c in Customer.query.order_by('name').all()]
+        from models import Prescription
+        from choices import customer_choices
+        self.customer_id.choices = customer_choices()
         self.prescription_id.choices = [(0, 'No Prescription')] + [(p.id, f"{p.prescription_number} - {p.patient.full_name}") for p in Prescription.query.filter_by(status='Pending').order_by(Prescription.prescription_date.desc()).all()]
 
 class DispenseForm(FlaskForm):
@@ -347,9 +351,11 @@ class DispenseForm(FlaskForm):
     def __init__(self, *args, **kwargs):
         super(DispenseForm, self).__init__(*args, **kwargs)
         # Populate choices
-        from models import Customer, Prescription
-        self.customer_id.choices = [(c.id, c.name) for c in Customer.query.order_by('name').all()]
-        self.prescription_id.choices = [(p.id, f"{p.prescription_number} - {p.patient.full_name}") for p in Prescription.query.filter(Prescription.status.in_(['Pending', 'Partially Dispensed'])).order_by(Prescription.prescription_date.desc()).all()]
+        from sqlalchemy.orm import joinedload
+        from models import Prescription
+        from choices import customer_choices
+        self.customer_id.choices = customer_choices()
+        self.prescription_id.choices = [(p.id, f"{p.prescription_number} - {p.patient.full_name}") for p in Prescription.query.options(joinedload(Prescription.patient)).filter(Prescription.status.in_(['Pending', 'Partially Dispensed'])).order_by(Prescription.prescription_date.desc()).all()]
 
 class AdminUserForm(FlaskForm):
     """Admin form for user management - includes all roles"""
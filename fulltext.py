@@ -0,0 +1,256 @@
+"""
+Full-text search for patients, prescriptions and medical history.
+
+``ilike('%term%')`` chains cannot use an index and cannot rank, and the
+free-text clinical fields were not searchable at all. This module keeps one
+search document per row and answers ranked prefix queries against it:
+
+- PostgreSQL: a GIN index over ``to_tsvector(config, col1 || ' ' || ...)``.
+  The index is maintained by the database itself; queries use the same
+  expression with a prefix ``tsquery`` and rank with ``ts_rank``.
+- SQLite (development): an FTS5 table ``<table>_fts`` per index, keyed by
+  the row id and ranked with ``bm25``. Rows are kept in sync from mapper
+  events inside the same transaction as the change.
+
+Every term is matched as a prefix and all terms must match. When the FTS5
+tables have not been created yet, ``available()`` is False and callers fall
+back to their ``ilike`` filters; ``flask rebuild-search-index`` creates and
+fills them.
+"""
+
+import re
+
+from sqlalchemy import bindparam, event, func, inspect, literal_column, text
+import sqlalchemy.dialects.postgresql  # noqa: F401 - registers the typed to_tsvector/to_tsquery functions
+
+from models import db, MedicalHistory, Patient, Prescription
+
+# name -> (model, text search configuration, indexed columns)
+INDEXES = {
+    'patients': (Patient, 'simple', ('first_name', 'last_name', 'phone_number', 'email')),
+    'prescriptions': (Prescription, 'english', (
+        'prescription_number', 'doctor_name', 'clinic_name', 'diagnosis', 'symptoms',
+    )),
+    'medical_history': (MedicalHistory, 'english', (
+        'chief_complaint', 'symptoms', 'diagnosis', 'treatment', 'prescription', 'doctor_name', 'notes',
+    )),
+}
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+_ready_binds = set()
+
+
+def _tokens(term):
+    return _TOKEN.findall((term or '').lower())
+
+
+def fts_table(name):
+    return f'{INDEXES[name][0].__tablename__}_fts'
+
+
+def document(name):
+    """The tsvector expression indexed on PostgreSQL for index ``name``."""
+    model, config, columns = INDEXES[name]
+    body = None
+    for column in columns:
+        part = func.coalesce(getattr(model, column), literal_column("''"))
+        body = part if body is None else body.op('||')(literal_column("' '")).op('||')(part)
+    return func.to_tsvector(literal_column(f"'{config}'"), body)
+
+
+# GIN indexes over the search documents; PostgreSQL only (SQLite uses FTS5 tables)
+for _name, (_model, _config, _columns) in INDEXES.items():
+    db.Index(f'ix_{_model.__tablename__}_fts', document(_name), postgresql_using='gin',
+             _table=_model.__table__)\
+      .ddl_if(dialect='postgresql')
+
+
+def _fts_ready(connection):
+    """Whether the FTS5 tables exist on this SQLite connection's database."""
+    key = str(connection.engine.url)
+    if key not in _ready_binds:
+        existing = {row[0] for row in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table'")
+        )}
+        if all(fts_table(name) in existing for name in INDEXES):
+            _ready_binds.add(key)
+    return key in _ready_binds
+
+
+def available():
+    """Whether full-text search can be used on the current database."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return True
+    return dialect == 'sqlite' and _fts_ready(db.session.connection())
+
+
+def search(name, term, limit=200):
+    """
+    Rank rows of index ``name`` against ``term``.
+
+    Args:
+        name (str): One of INDEXES.
+        term (str): Free text; every word is matched as a prefix.
+        limit (int): Maximum number of matches.
+
+    Returns:
+        list: (row id, rank) pairs, best match first. Ranks are only
+              comparable within one call.
+    """
+    tokens = _tokens(term)
+    if not tokens:
+        return []
+
+    model, config, columns = INDEXES[name]
+    if db.session.get_bind().dialect.name == 'postgresql':
+        query = func.to_tsquery(literal_column(f"'{config}'"), ' & '.join(f'{token}:*' for token in tokens))
+        rank = func.ts_rank(document(name), query)
+        rows = db.session.query(model.id, rank).filter(document(name).op('@@')(query))\
+                         .order_by(rank.desc(), model.id.desc()).limit(limit).all()
+        return [(row_id, float(score)) for row_id, score in rows]
+
+    table = fts_table(name)
+    match = ' '.join(f'"{token}"*' for token in tokens)
+    rows = db.session.execute(
+        text(f'SELECT rowid, bm25({table}) AS score FROM {table} WHERE {table} MATCH :match '
+             f'ORDER BY score, rowid DESC LIMIT :limit'),
+        {'match': match, 'limit': limit},
+    ).all()
+    # bm25 is lower-is-better; negate so every backend ranks higher-is-better
+    return [(row_id, -score) for row_id, score in rows]
+
+
+def search_patients(term, limit=200):
+    """
+    Rank patients by their own details and by their medical history.
+
+    Returns:
+        list: (patient id, rank) pairs, best match first.
+    """
+    ranks = dict(search('patients', term, limit))
+    history = dict(search('medical_history', term, limit))
+    if history:
+        owners = db.session.query(MedicalHistory.id, MedicalHistory.patient_id)\
+                           .filter(MedicalHistory.id.in_(history)).all()
+        for history_id, patient_id in owners:
+            ranks[patient_id] = max(ranks.get(patient_id, float('-inf')), history[history_id])
+    return sorted(ranks.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+
+
+def search_prescriptions(term, limit=200):
+    """
+    Rank prescriptions by their own text and by the patient's name.
+
+    Returns:
+        list: (prescription id, rank) pairs, best match first.
+    """
+    ranks = dict(search('prescriptions', term, limit))
+    patients = dict(search('patients', term, limit))
+    if patients:
+        owned = db.session.query(Prescription.id, Prescription.patient_id)\
+                          .filter(Prescription.patient_id.in_(patients)).all()
+        for prescription_id, patient_id in owned:
+            ranks[prescription_id] = max(ranks.get(prescription_id, float('-inf')), patients[patient_id])
+    return sorted(ranks.items(), key=lambda pair: pair[1], reverse=True)[:limit]
+
+
+def load_ranked(query, model, ranked):
+    """
+    Load the rows of ``ranked`` that also satisfy ``query``, best match first.
+
+    Args:
+        query: A query over ``model`` carrying any further filters.
+        model: The model the ranked ids belong to.
+        ranked (list): (id, rank) pairs from one of the search functions.
+
+    Returns:
+        list: Matching model instances in rank order.
+    """
+    if not ranked:
+        return []
+    order = {row_id: position for position, (row_id, _) in enumerate(ranked)}
+    rows = query.filter(model.id.in_(order)).all()
+    return sorted(rows, key=lambda row: order[row.id])
+
+
+def create_tables(connection):
+    """Create the SQLite FTS5 tables if missing (no-op on other databases)."""
+    if connection.dialect.name != 'sqlite':
+        return
+    for name, (model, config, columns) in INDEXES.items():
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table(name)} "
+            f"USING fts5({', '.join(columns)}, tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+
+
+def rebuild(connection):
+    """Create the SQLite FTS5 tables and refill them from the source tables."""
+    if connection.dialect.name != 'sqlite':
+        return
+    create_tables(connection)
+    for name, (model, config, columns) in INDEXES.items():
+        table = fts_table(name)
+        column_list = ', '.join(columns)
+        connection.execute(text(f'DELETE FROM {table}'))
+        connection.execute(text(
+            f'INSERT INTO {table} (rowid, {column_list}) '
+            f'SELECT id, {column_list} FROM {model.__tablename__}'
+        ))
+    _ready_binds.add(str(connection.engine.url))
+
+
+def index_rows(connection, name, ids):
+    """
+    Add rows inserted in bulk to index ``name``.
+
+    Bulk ``insert()`` statements do not fire the mapper events that keep the
+    SQLite FTS5 tables in sync, so bulk loaders call this with the new ids
+    (no-op on PostgreSQL or before the FTS5 tables exist).
+    """
+    if connection.dialect.name != 'sqlite' or not ids or not _fts_ready(connection):
+        return
+    model, config, columns = INDEXES[name]
+    column_list = ', '.join(columns)
+    connection.execute(
+        text(f'INSERT INTO {fts_table(name)} (rowid, {column_list}) '
+             f'SELECT id, {column_list} FROM {model.__tablename__} WHERE id IN :ids')
+        .bindparams(bindparam('ids', expanding=True)),
+        {'ids': list(ids)},
+    )
+
+
+def _sync_listener(name, action):
+    model, config, columns = INDEXES[name]
+    table = fts_table(name)
+    placeholders = ', '.join(f':{column}' for column in columns)
+    column_list = ', '.join(columns)
+
+    def sync(mapper, connection, target):
+        if connection.dialect.name != 'sqlite' or not _fts_ready(connection):
+            return
+        if action == 'update' and not any(
+            inspect(target).attrs[column].history.has_changes() for column in columns
+        ):
+            return
+        if action != 'insert':
+            connection.execute(text(f'DELETE FROM {table} WHERE rowid = :id'), {'id': target.id})
+        if action != 'delete':
+            values = {column: getattr(target, column) for column in columns}
+            connection.execute(
+                text(f'INSERT INTO {table} (rowid, {column_list}) VALUES (:id, {placeholders})'),
+                {'id': target.id, **values},
+            )
+    return sync
+
+
+def init_app(app):
+    """Register the FTS5 sync listeners and table creation hook."""
+    if getattr(init_app, 'registered', False):
+        return
+    for name, (model, config, columns) in INDEXES.items():
+        for action in ('insert', 'update', 'delete'):
+            event.listen(model, f'after_{action}', _sync_listener(name, action))
+    event.listen(db.metadata, 'after_create', lambda target, connection, **kw: create_tables(connection))
+    init_app.registered = True
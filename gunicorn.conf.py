@@ -0,0 +1,73 @@
+"""
+Gunicorn settings for Medical Management System.
+
+Worker count, worker class, threads and timeouts come from
+``deploy_profile`` so they stay in step with the database pool size (see
+that module for the environment variables). Gunicorn loads this file
+automatically when started from the project directory:
+
+    gunicorn wsgi:application
+
+Startup is split so that nothing heavy repeats per worker:
+
+- the master runs ``flask prestart`` (migrations, default admin) once,
+  in a child process, before any worker starts; ``RUN_MIGRATIONS=0``
+  skips the migrations, e.g. when a release step already ran them;
+- with ``GUNICORN_PRELOAD=1`` (the default) the master imports the app
+  once and workers share it copy-on-write, so starting or recycling a
+  worker costs a fork instead of a full import;
+- each worker drops any database connection inherited from the master and
+  then starts its own background threads (``startup.start_background_workers``).
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from deploy_profile import build_profile
+
+_profile = build_profile()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = _profile['workers']
+worker_class = _profile['worker_class']
+threads = _profile['threads']
+timeout = _profile['timeout']
+graceful_timeout = _profile['graceful_timeout']
+max_requests = _profile['max_requests']
+max_requests_jitter = max_requests // 10
+keepalive = 5
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+
+def on_starting(server):
+    server.log.info(
+        'Profile: %s %s workers x %s threads, DB pool %s + %s overflow (%s connections max)',
+        workers, worker_class, threads, _profile['pool_size'], _profile['max_overflow'], _profile['connections'],
+    )
+    for warning in _profile['warnings']:
+        server.log.warning(warning)
+
+    args = [sys.executable, '-m', 'flask', '--app', 'app', 'prestart']
+    if os.environ.get('RUN_MIGRATIONS', '1') != '1':
+        args.append('--skip-migrations')
+    result = subprocess.run(args, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode:
+        server.log.error('Pre-start step failed (exit code %s); starting anyway', result.returncode)
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared between processes
+    app_module = sys.modules.get('app')
+    if app_module is not None:
+        from models import db
+        with app_module.app.app_context():
+            db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from startup import start_background_workers
+    from wsgi import app
+    start_background_workers(app)
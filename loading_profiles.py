@@ -0,0 +1,63 @@
+"""
+Relationship loading profiles for list and detail views.
+
+Every relationship in models.py is lazy, so a template that touches
+``sale.customer`` or ``prescription.items`` issues one query per row. Each
+view applies the profile below that matches what its template reads, so
+the number of statements per request stays constant as tables grow.
+
+Many-to-one relationships use ``joinedload`` (one extra JOIN); collections
+use ``selectinload`` (one extra ``IN`` query per relationship).
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import InventoryAlert, Prescription, PrescriptionItem, Purchase, PurchaseItem, Sale, SaleItem, StockMovement
+
+# sales.html: customer name per row
+SALE_LIST = (
+    joinedload(Sale.customer),
+)
+
+# reports/sale_bill.html: customer plus every line item and its medicine
+SALE_BILL = (
+    joinedload(Sale.customer),
+    selectinload(Sale.items).joinedload(SaleItem.medicine),
+)
+
+# prescriptions.html: patient, item count and estimated total (item medicines)
+PRESCRIPTION_LIST = (
+    selectinload(Prescription.patient),
+    selectinload(Prescription.items).joinedload(PrescriptionItem.medicine),
+)
+
+# prescription_detail.html / dispense_prescription.html
+PRESCRIPTION_DETAIL = (
+    joinedload(Prescription.patient),
+    selectinload(Prescription.items).joinedload(PrescriptionItem.medicine),
+    selectinload(Prescription.sales),
+)
+
+# purchases.html: supplier name and item count per row
+PURCHASE_LIST = (
+    joinedload(Purchase.supplier),
+    selectinload(Purchase.items),
+)
+
+# view_purchase.html: supplier plus every line item and its medicine
+PURCHASE_DETAIL = (
+    joinedload(Purchase.supplier),
+    selectinload(Purchase.items).joinedload(PurchaseItem.medicine),
+)
+
+# inventory_alerts.html, dashboards: item_name/item_type read both sides
+ALERT_LIST = (
+    joinedload(InventoryAlert.medicine),
+    joinedload(InventoryAlert.equipment),
+)
+
+# stock_movements.html: medicine name and batch number per row
+STOCK_MOVEMENT_LIST = (
+    joinedload(StockMovement.medicine),
+    joinedload(StockMovement.batch),
+)
@@ -0,0 +1,259 @@
+"""
+Background email delivery for Medical Management System.
+
+Sending mail over SMTP inside a request makes the user wait on the mail
+server, and a slow or unreachable server stalls the web worker. Requests
+therefore only ``enqueue()`` a message: it becomes a row in
+``email_outbox`` and is committed together with the change that caused it
+(the reset token of a password reset, for example).
+
+Delivery happens in ``send_due()``, run by a daemon thread in each web
+process (``MAIL_QUEUE_POLL_SECONDS``) or by ``flask send-mail --loop`` as a
+separate process:
+
+- due messages are claimed with a conditional UPDATE, so several workers
+  can drain the same outbox without sending a message twice; claims left
+  behind by a crashed worker expire after ``CLAIM_TIMEOUT``;
+- a batch of up to ``MAIL_QUEUE_BATCH_SIZE`` messages is sent over one
+  SMTP connection;
+- each message records its outcome: ``sent`` with ``sent_at``, or another
+  attempt after an exponential backoff (``MAIL_RETRY_BASE_SECONDS``
+  doubling up to ``MAIL_RETRY_MAX_SECONDS``) with ``last_error``. Messages
+  the server rejects permanently (5xx), or that run out of
+  ``MAIL_MAX_ATTEMPTS``, end up ``failed``.
+
+A commit that enqueues mail wakes this process's worker thread, so messages
+go out right away rather than at the next poll.
+"""
+
+import json
+import logging
+import random
+import smtplib
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_mail import BadHeaderError, Message
+from sqlalchemy import and_, event, or_, select, update
+
+from models import db, OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Claimed messages not finished within this long were abandoned by a dead worker
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_PENDING_KEY = 'mail_queued'
+_wakeup = threading.Event()
+
+
+def enqueue(subject, recipients, body, html=None, sender=None):
+    """
+    Add a message to the outbox. It is sent once the caller commits.
+
+    Args:
+        subject (str): Subject line.
+        recipients (list): Recipient addresses.
+        body (str): Plain text body.
+        html (str): Optional HTML body.
+        sender (str): From address; defaults to ``MAIL_DEFAULT_SENDER`` or
+                      ``MAIL_USERNAME``.
+
+    Returns:
+        OutboundEmail: The queued (not yet committed) message.
+    """
+    config = current_app.config
+    email = OutboundEmail(
+        subject=subject,
+        sender=sender or config.get('MAIL_DEFAULT_SENDER') or config.get('MAIL_USERNAME'),
+        recipients=json.dumps(list(recipients)),
+        body=body,
+        html=html,
+        status='pending',
+        attempts=0,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.session.add(email)
+    db.session.info[_PENDING_KEY] = True
+    return email
+
+
+def _due(now):
+    return or_(
+        and_(OutboundEmail.status == 'pending', OutboundEmail.next_attempt_at <= now),
+        and_(OutboundEmail.status == 'sending', OutboundEmail.claimed_at < now - CLAIM_TIMEOUT),
+    )
+
+
+def claim(limit):
+    """Claim up to ``limit`` due messages for this worker and return them."""
+    token = uuid.uuid4().hex
+    now = datetime.utcnow()
+    ids = db.session.scalars(
+        select(OutboundEmail.id).where(_due(now)).order_by(OutboundEmail.next_attempt_at).limit(limit)
+    ).all()
+    if not ids:
+        return []
+    # Re-checking the condition makes the claim atomic: another worker that
+    # picked the same ids updates no rows
+    db.session.execute(
+        update(OutboundEmail).where(OutboundEmail.id.in_(ids), _due(now))
+        .values(status='sending', claimed_by=token, claimed_at=now),
+        execution_options={'synchronize_session': False},
+    )
+    db.session.commit()
+    return db.session.scalars(
+        select(OutboundEmail).where(OutboundEmail.claimed_by == token, OutboundEmail.status == 'sending')
+        .order_by(OutboundEmail.id)
+    ).all()
+
+
+def _message(email):
+    return Message(
+        subject=email.subject,
+        sender=email.sender,
+        recipients=json.loads(email.recipients),
+        body=email.body,
+        html=email.html,
+    )
+
+
+def _permanent(error):
+    """True if retrying ``error`` cannot succeed."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return isinstance(error, (BadHeaderError, AssertionError, ValueError))
+
+
+def _record_sent(email):
+    email.status = 'sent'
+    email.sent_at = datetime.utcnow()
+    email.attempts += 1
+    email.claimed_by = email.claimed_at = email.last_error = None
+
+
+def _record_failure(email, error):
+    config = current_app.config
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'[:2000]
+    email.claimed_by = email.claimed_at = None
+    if _permanent(error) or email.attempts >= config.get('MAIL_MAX_ATTEMPTS', 6):
+        email.status = 'failed'
+        logger.warning('Giving up on email %s to %s: %s', email.id, email.recipients, email.last_error)
+        return 'failed'
+    delay = min(config.get('MAIL_RETRY_BASE_SECONDS', 30) * 2 ** (email.attempts - 1),
+                config.get('MAIL_RETRY_MAX_SECONDS', 3600))
+    # Jitter keeps messages that failed together from retrying in lockstep
+    email.status = 'pending'
+    email.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay * random.uniform(0.8, 1.2))
+    return 'retrying'
+
+
+# Errors that concern one message; anything else from SMTP means the connection is gone
+_MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError,
+    BadHeaderError, AssertionError, ValueError,
+)
+
+
+def send_due(limit=None):
+    """
+    Send one batch of due messages over a single SMTP connection.
+
+    Returns:
+        dict: Number of messages 'sent', 'retrying' and 'failed'.
+    """
+    counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+    batch = claim(limit or current_app.config.get('MAIL_QUEUE_BATCH_SIZE', 50))
+    if not batch:
+        return counts
+
+    mail = current_app.extensions['mail']
+    remaining = list(batch)
+    try:
+        with mail.connect() as connection:
+            while remaining:
+                email = remaining[0]
+                try:
+                    connection.send(_message(email))
+                except _MESSAGE_ERRORS as e:
+                    counts[_record_failure(email, e)] += 1
+                else:
+                    _record_sent(email)
+                    counts['sent'] += 1
+                remaining.pop(0)
+                db.session.commit()
+    except Exception as e:
+        # Could not connect, or the connection dropped: retry what was not sent
+        logger.warning('SMTP delivery interrupted: %s', e)
+        db.session.rollback()
+        for email in remaining:
+            counts[_record_failure(email, e)] += 1
+        db.session.commit()
+    return counts
+
+
+def drain():
+    """Send batches until nothing is due; returns the summed counts."""
+    totals = {'sent': 0, 'retrying': 0, 'failed': 0}
+    while True:
+        counts = send_due()
+        if not any(counts.values()):
+            return totals
+        for key, value in counts.items():
+            totals[key] += value
+
+
+def start_mail_worker(app, interval_seconds):
+    """
+    Deliver queued mail from a daemon thread.
+
+    The thread drains the outbox every ``interval_seconds``, and immediately
+    after this process commits new mail.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    counts = drain()
+                    if any(counts.values()):
+                        logger.info('Mail outbox: %s', counts)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Mail delivery failed')
+            _wakeup.wait(interval_seconds)
+            _wakeup.clear()
+
+    def halt():
+        stop.set()
+        _wakeup.set()
+
+    thread = threading.Thread(target=run, name='mail-outbox', daemon=True)
+    thread.stop = halt
+    thread.start()
+    return thread
+
+
+def _apply_after_commit(session):
+    if session.info.pop(_PENDING_KEY, False):
+        _wakeup.set()
+
+
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    """Wake the mail worker when this process commits new mail."""
+    if not event.contains(db.session, 'after_commit', _apply_after_commit):
+        event.listen(db.session, 'after_commit', _apply_after_commit)
+        event.listen(db.session, 'after_rollback', _discard_after_rollback)
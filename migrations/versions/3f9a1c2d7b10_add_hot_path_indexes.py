@@ -0,0 +1,62 @@
+"""add composite indexes for hot query paths
+
+Revision ID: 3f9a1c2d7b10
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns) - kept in sync with __table_args__ in models.py
+INDEXES = [
+    ('ix_medicines_name', 'medicines', ['name']),
+    ('ix_medicines_expiry_date', 'medicines', ['expiry_date']),
+    ('ix_medicines_quantity_reorder_point', 'medicines', ['quantity', 'reorder_point']),
+    ('ix_customers_name', 'customers', ['name']),
+    ('ix_sales_created_at', 'sales', ['created_at']),
+    ('ix_sales_customer_id_created_at', 'sales', ['customer_id', 'created_at']),
+    ('ix_sale_items_sale_id', 'sale_items', ['sale_id']),
+    ('ix_sale_items_medicine_id', 'sale_items', ['medicine_id']),
+    ('ix_purchases_created_at', 'purchases', ['created_at']),
+    ('ix_purchases_supplier_id_created_at', 'purchases', ['supplier_id', 'created_at']),
+    ('ix_purchase_items_purchase_id', 'purchase_items', ['purchase_id']),
+    ('ix_purchase_items_medicine_id_id', 'purchase_items', ['medicine_id', 'id']),
+    ('ix_patients_name', 'patients', ['first_name', 'last_name']),
+    ('ix_medical_history_patient_id_visit_date', 'medical_history', ['patient_id', 'visit_date']),
+    ('ix_medical_equipment_next_maintenance_date', 'medical_equipment', ['next_maintenance_date']),
+    ('ix_medical_equipment_status', 'medical_equipment', ['status']),
+    ('ix_inventory_alerts_active_ack_created_at', 'inventory_alerts', ['is_active', 'is_acknowledged', 'created_at']),
+    ('ix_prescriptions_status_priority_date', 'prescriptions', ['status', 'priority', 'prescription_date']),
+    ('ix_prescriptions_patient_id', 'prescriptions', ['patient_id']),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    # Databases bootstrapped with db.create_all() already carry these indexes,
+    # so only create what is missing on tables that exist.
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, columns in INDEXES:
+        if table in tables and name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in _existing_indexes(inspector, table):
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,46 @@
+"""keep the stock ledger when a medicine is deleted
+
+Revision ID: 5c1e9d3a7f20
+Revises: e2a7c5d19b46
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e9d3a7f20'
+down_revision = 'e2a7c5d19b46'
+branch_labels = None
+depends_on = None
+
+
+# Append-only history: deleting a medicine must not take its movements or snapshots with it
+TABLES = ('stock_movements', 'inventory_snapshots')
+
+
+def _set_ondelete(ondelete):
+    # SQLite does not enforce foreign keys here (no PRAGMA foreign_keys), so
+    # only the other databases need their constraints rebuilt
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        return
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table in TABLES:
+        if table not in tables:
+            continue
+        for foreign_key in inspector.get_foreign_keys(table):
+            if foreign_key['referred_table'] != 'medicines' or foreign_key['constrained_columns'] != ['medicine_id']:
+                continue
+            op.drop_constraint(foreign_key['name'], table, type_='foreignkey')
+            op.create_foreign_key(foreign_key['name'], table, 'medicines', ['medicine_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _set_ondelete('RESTRICT')
+
+
+def downgrade():
+    _set_ondelete('CASCADE')
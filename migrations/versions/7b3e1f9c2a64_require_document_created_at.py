@@ -0,0 +1,55 @@
+"""make sales.created_at and purchases.created_at NOT NULL
+
+Revision ID: 7b3e1f9c2a64
+Revises: 5c1e9d3a7f20
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e1f9c2a64'
+down_revision = '5c1e9d3a7f20'
+branch_labels = None
+depends_on = None
+
+
+# Keyset pagination orders these lists on created_at, which must not be NULL
+TABLES = {'sales': 'sale', 'purchases': 'purchase'}
+
+
+def _backfill(table, source_type, has_movements):
+    # Rows without a timestamp take that of their stock movements, else that of
+    # the row before them, else now
+    candidates = []
+    if has_movements:
+        candidates.append(
+            f"(SELECT MIN(m.created_at) FROM stock_movements m "
+            f"WHERE m.source_type = '{source_type}' AND m.source_id = {table}.id)"
+        )
+    candidates.append(f"(SELECT MAX(p.created_at) FROM {table} p WHERE p.id < {table}.id)")
+    candidates.append('CURRENT_TIMESTAMP')
+    op.execute(f"UPDATE {table} SET created_at = COALESCE({', '.join(candidates)}) WHERE created_at IS NULL")
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, source_type in TABLES.items():
+        if table not in tables:
+            continue
+        _backfill(table, source_type, 'stock_movements' in tables)
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table in TABLES:
+        if table not in tables:
+            continue
+        with op.batch_alter_table(table) as batch:
+            batch.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,45 @@
+"""add expression indexes for typeahead search
+
+Revision ID: 8c4e2b7a9d31
+Revises: 3f9a1c2d7b10
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b7a9d31'
+down_revision = '3f9a1c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, expression) - kept in sync with the search keys in models.py
+INDEXES = [
+    ('ix_medicines_name_lower', 'medicines', "lower(name)"),
+    ('ix_customers_name_lower', 'customers', "lower(name)"),
+    ('ix_patients_full_name_lower', 'patients', "lower(first_name || ' ' || last_name)"),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, expression in INDEXES:
+        # SQLite does not reflect expression indexes, so also guard in the DDL itself
+        if table in tables and name not in _existing_indexes(inspector, table):
+            op.create_index(name, table, [sa.text(expression)], if_not_exists=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for name, table, expression in reversed(INDEXES):
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,69 @@
+"""add full-text search indexes for patients, prescriptions and medical history
+
+Revision ID: b7d2e5f0c143
+Revises: 8c4e2b7a9d31
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2e5f0c143'
+down_revision = '8c4e2b7a9d31'
+branch_labels = None
+depends_on = None
+
+
+# (table, text search configuration, columns) - kept in sync with fulltext.INDEXES
+INDEXES = [
+    ('patients', 'simple', ['first_name', 'last_name', 'phone_number', 'email']),
+    ('prescriptions', 'english', ['prescription_number', 'doctor_name', 'clinic_name', 'diagnosis', 'symptoms']),
+    ('medical_history', 'english', [
+        'chief_complaint', 'symptoms', 'diagnosis', 'treatment', 'prescription', 'doctor_name', 'notes',
+    ]),
+]
+
+
+def _existing_indexes(inspector, table):
+    return {index['name'] for index in inspector.get_indexes(table)}
+
+
+def _document(config, columns):
+    body = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('{config}', {body})"
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table, config, columns in INDEXES:
+        if table not in tables:
+            continue
+        if bind.dialect.name == 'postgresql':
+            name = f'ix_{table}_fts'
+            if name not in _existing_indexes(inspector, table):
+                op.create_index(name, table, [sa.text(_document(config, columns))], postgresql_using='gin')
+        elif bind.dialect.name == 'sqlite':
+            column_list = ', '.join(columns)
+            op.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts "
+                f"USING fts5({column_list}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            op.execute(f'DELETE FROM {table}_fts')
+            op.execute(f'INSERT INTO {table}_fts (rowid, {column_list}) SELECT id, {column_list} FROM {table}')
+
+
+def downgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    for table, config, columns in reversed(INDEXES):
+        if bind.dialect.name == 'postgresql':
+            name = f'ix_{table}_fts'
+            if table in tables and name in _existing_indexes(inspector, table):
+                op.drop_index(name, table_name=table)
+        elif bind.dialect.name == 'sqlite':
+            op.execute(f'DROP TABLE IF EXISTS {table}_fts')
@@ -0,0 +1,39 @@
+"""add invoice_number to purchases for idempotent bulk imports
+
+Revision ID: b83d6f2a1c70
+Revises: f17a3c9e5b28
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83d6f2a1c70'
+down_revision = 'f17a3c9e5b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'purchases' not in inspector.get_table_names():
+        return
+    if 'invoice_number' not in {column['name'] for column in inspector.get_columns('purchases')}:
+        with op.batch_alter_table('purchases') as batch:
+            batch.add_column(sa.Column('invoice_number', sa.String(length=50), nullable=True))
+    if 'ix_purchases_supplier_id_invoice_number' not in {index['name'] for index in inspector.get_indexes('purchases')}:
+        op.create_index('ix_purchases_supplier_id_invoice_number', 'purchases', ['supplier_id', 'invoice_number'],
+                        unique=True)
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    if 'purchases' not in inspector.get_table_names():
+        return
+    if 'ix_purchases_supplier_id_invoice_number' in {index['name'] for index in inspector.get_indexes('purchases')}:
+        op.drop_index('ix_purchases_supplier_id_invoice_number', table_name='purchases')
+    if 'invoice_number' in {column['name'] for column in inspector.get_columns('purchases')}:
+        with op.batch_alter_table('purchases') as batch:
+            batch.drop_column('invoice_number')
@@ -0,0 +1,87 @@
+"""add daily sales rollups and inventory snapshots
+
+Revision ID: c52e8f1a7d94
+Revises: a9c4d7e1f053
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e8f1a7d94'
+down_revision = 'a9c4d7e1f053'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+
+    if 'daily_sales' not in tables:
+        op.create_table(
+            'daily_sales',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('payment_method', sa.String(length=50), nullable=False),
+            sa.Column('sale_type', sa.String(length=30), nullable=False),
+            sa.Column('sale_count', sa.Integer(), nullable=False),
+            sa.Column('total_amount', sa.Float(), nullable=False),
+            sa.Column('gst_amount', sa.Float(), nullable=False),
+            sa.Column('discount_amount', sa.Float(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('day', 'payment_method', 'sale_type', name='uq_daily_sales_day_payment_method_sale_type'),
+        )
+    if 'daily_medicine_sales' not in tables:
+        op.create_table(
+            'daily_medicine_sales',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('medicine_id', sa.Integer(), nullable=False),
+            sa.Column('units', sa.Integer(), nullable=False),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('day', 'medicine_id', name='uq_daily_medicine_sales_day_medicine_id'),
+        )
+        op.create_index('ix_daily_medicine_sales_medicine_id_day', 'daily_medicine_sales', ['medicine_id', 'day'])
+    if 'inventory_snapshots' not in tables:
+        op.create_table(
+            'inventory_snapshots',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('snapshot_date', sa.Date(), nullable=False),
+            sa.Column('medicine_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('stock_value', sa.Float(), nullable=False),
+            sa.Column('cost_value', sa.Float(), nullable=False),
+            sa.Column('taken_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('snapshot_date', 'medicine_id', name='uq_inventory_snapshots_snapshot_date_medicine_id'),
+        )
+
+    # Existing sales are rolled up once here; the app keeps the rollups current from now on
+    if 'sales' not in tables or 'sale_items' not in tables:
+        return
+    day = 'DATE(sales.created_at)' if bind.dialect.name == 'sqlite' else 'CAST(sales.created_at AS DATE)'
+    op.execute("DELETE FROM daily_sales")
+    op.execute(
+        "INSERT INTO daily_sales (day, payment_method, sale_type, sale_count, total_amount, gst_amount, discount_amount) "
+        f"SELECT {day}, payment_method, sale_type, COUNT(id), SUM(total_amount), SUM(gst_amount), SUM(discount_amount) "
+        f"FROM sales GROUP BY {day}, payment_method, sale_type"
+    )
+    op.execute("DELETE FROM daily_medicine_sales")
+    op.execute(
+        "INSERT INTO daily_medicine_sales (day, medicine_id, units, revenue) "
+        f"SELECT {day}, sale_items.medicine_id, SUM(sale_items.quantity), SUM(sale_items.quantity * sale_items.price_per_unit) "
+        f"FROM sale_items JOIN sales ON sales.id = sale_items.sale_id GROUP BY {day}, sale_items.medicine_id"
+    )
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ('inventory_snapshots', 'daily_medicine_sales', 'daily_sales'):
+        if table in tables:
+            op.drop_table(table)
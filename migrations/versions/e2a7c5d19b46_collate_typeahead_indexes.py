@@ -0,0 +1,44 @@
+"""sort the typeahead search indexes by byte order on PostgreSQL
+
+Revision ID: e2a7c5d19b46
+Revises: b83d6f2a1c70
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a7c5d19b46'
+down_revision = 'b83d6f2a1c70'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, expression) - kept in sync with the search keys in models.py
+INDEXES = [
+    ('ix_medicines_name_lower', 'medicines', "lower(name)"),
+    ('ix_customers_name_lower', 'customers', "lower(name)"),
+    ('ix_patients_full_name_lower', 'patients', "lower(first_name || ' ' || last_name)"),
+]
+
+
+def _rebuild(collation):
+    # SQLite compares with BINARY (byte order) already; only PostgreSQL's locale collations need this
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    tables = set(sa.inspect(bind).get_table_names())
+    for name, table, expression in INDEXES:
+        if table in tables:
+            op.drop_index(name, table_name=table, if_exists=True)
+            op.create_index(name, table, [sa.text(f'({expression}){collation}')])
+
+
+def upgrade():
+    _rebuild(' COLLATE "C"')
+
+
+def downgrade():
+    _rebuild('')
@@ -0,0 +1,80 @@
+"""add per-lot stock in medicine_batches
+
+Revision ID: e6b3f9a2c418
+Revises: d41a8c6e2f57
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b3f9a2c418'
+down_revision = 'd41a8c6e2f57'
+branch_labels = None
+depends_on = None
+
+
+# (table, column) pairs added to record which lot a line moved stock in or out of
+ITEM_COLUMNS = [
+    ('sale_items', sa.Column('batch_id', sa.Integer(), nullable=True)),
+    ('purchase_items', sa.Column('batch_id', sa.Integer(), nullable=True)),
+    ('purchase_items', sa.Column('batch_number', sa.String(length=50), nullable=True)),
+    ('purchase_items', sa.Column('expiry_date', sa.Date(), nullable=True)),
+]
+
+
+def _existing_columns(inspector, table):
+    return {column['name'] for column in inspector.get_columns(table)}
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    if 'medicine_batches' not in tables:
+        op.create_table(
+            'medicine_batches',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('medicine_id', sa.Integer(), nullable=False),
+            sa.Column('batch_number', sa.String(length=50), nullable=False),
+            sa.Column('expiry_date', sa.Date(), nullable=False),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.Column('cost_price', sa.Float(), nullable=True),
+            sa.Column('received_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('medicine_id', 'batch_number', name='uq_medicine_batches_medicine_id_batch_number'),
+        )
+        op.create_index('ix_medicine_batches_medicine_id_expiry_date', 'medicine_batches',
+                        ['medicine_id', 'expiry_date'])
+        op.create_index('ix_medicine_batches_expiry_date', 'medicine_batches', ['expiry_date'])
+
+    for table, column in ITEM_COLUMNS:
+        if table in tables and column.name not in _existing_columns(inspector, table):
+            with op.batch_alter_table(table) as batch:
+                batch.add_column(column.copy())
+                if column.name == 'batch_id':
+                    batch.create_foreign_key(f'fk_{table}_batch_id', 'medicine_batches', ['batch_id'], ['id'])
+
+    # Existing stock becomes one lot per medicine, from its batch number and expiry
+    if 'medicines' not in tables:
+        return
+    op.execute(
+        "INSERT INTO medicine_batches (medicine_id, batch_number, expiry_date, quantity, cost_price, received_at) "
+        "SELECT id, batch_number, expiry_date, quantity, cost_price, CURRENT_TIMESTAMP FROM medicines "
+        "WHERE NOT EXISTS (SELECT 1 FROM medicine_batches WHERE medicine_batches.medicine_id = medicines.id)"
+    )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    for table, column in reversed(ITEM_COLUMNS):
+        if table in tables and column.name in _existing_columns(inspector, table):
+            # Dropping batch_id also drops its foreign key
+            with op.batch_alter_table(table) as batch:
+                batch.drop_column(column.name)
+    if 'medicine_batches' in tables:
+        op.drop_table('medicine_batches')
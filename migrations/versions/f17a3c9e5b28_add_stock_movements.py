@@ -0,0 +1,62 @@
+"""add stock_movements ledger
+
+Revision ID: f17a3c9e5b28
+Revises: c52e8f1a7d94
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f17a3c9e5b28'
+down_revision = 'c52e8f1a7d94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'stock_movements' in tables:
+        return
+    op.create_table(
+        'stock_movements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('medicine_id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(length=30), nullable=False),
+        sa.Column('source_type', sa.String(length=30), nullable=True),
+        sa.Column('source_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['medicine_id'], ['medicines.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['batch_id'], ['medicine_batches.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stock_movements_medicine_id_created_at', 'stock_movements', ['medicine_id', 'created_at'])
+    op.create_index('ix_stock_movements_created_at', 'stock_movements', ['created_at'])
+    op.create_index('ix_stock_movements_source_type_source_id', 'stock_movements', ['source_type', 'source_id'])
+
+    # The ledger opens with the current stock of every lot (or of the medicine,
+    # if it has no lots yet). Earlier inventory snapshots were not ledger
+    # balances, so they are dropped rather than used as starting points.
+    if 'inventory_snapshots' in tables:
+        op.execute("DELETE FROM inventory_snapshots")
+    if 'medicines' not in tables or 'medicine_batches' not in tables:
+        return
+    op.execute(
+        "INSERT INTO stock_movements (medicine_id, batch_id, quantity, reason, created_at) "
+        "SELECT medicine_id, id, quantity, 'opening', CURRENT_TIMESTAMP FROM medicine_batches WHERE quantity <> 0"
+    )
+    op.execute(
+        "INSERT INTO stock_movements (medicine_id, batch_id, quantity, reason, created_at) "
+        "SELECT id, NULL, quantity, 'opening', CURRENT_TIMESTAMP FROM medicines WHERE quantity <> 0 "
+        "AND NOT EXISTS (SELECT 1 FROM medicine_batches WHERE medicine_batches.medicine_id = medicines.id)"
+    )
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'stock_movements' in tables:
+        op.drop_table('stock_movements')
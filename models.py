@@ -1,6 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 from flask_login import UserMixin
+from sqlalchemy import String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
 
 db = SQLAlchemy()
 
@@ -64,6 +67,12 @@ class User(db.Model, UserMixin):
 
 class Medicine(db.Model):
     __tablename__ = 'medicines'
+    __table_args__ = (
+        db.Index('ix_medicines_name', 'name'),
+        db.Index('ix_medicines_expiry_date', 'expiry_date'),
+        db.Index('ix_medicines_quantity_reorder_point', 'quantity', 'reorder_point'),
+        db.Index('ix_medicines_updated_at', 'updated_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -94,19 +103,6 @@ class Medicine(db.Model):
     supplier = db.relationship('Supplier', backref='medicines')
     alerts = db.relationship('InventoryAlert', back_populates='medicine', cascade='all, delete-orphan')
 
-    @property
-    def stock_status(self):
-        if self.quantity == 0:
-            return 'Out of Stock'
-        elif self.quantity <= self.reorder_point:
-            return 'Critical'
-        elif self.quantity <= self.minimum_stock_level:
-            return 'Low'
-        elif self.quantity >= self.maximum_stock_level:
-            return 'Overstock'
-        else:
-            return 'Normal'
-    
     @property
     def is_expired(self):
         from datetime import date
@@ -126,8 +122,45 @@ class Medicine(db.Model):
     def __repr__(self):
         return f'<Medicine {self.name}>'
 
+class MedicineBatch(db.Model):
+    """
+    One lot of a medicine with its own expiry and remaining quantity.
+
+    ``Medicine.quantity`` is the total over a medicine's batches; both are
+    only changed through ``stock_ledger``. ``Medicine.batch_number`` and
+    ``expiry_date`` name the lot used when stock is entered without batch
+    details.
+    """
+    __tablename__ = 'medicine_batches'
+    __table_args__ = (
+        db.UniqueConstraint('medicine_id', 'batch_number', name='uq_medicine_batches_medicine_id_batch_number'),
+        db.Index('ix_medicine_batches_medicine_id_expiry_date', 'medicine_id', 'expiry_date'),
+        db.Index('ix_medicine_batches_expiry_date', 'expiry_date'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=False)
+    batch_number = db.Column(db.String(50), nullable=False)
+    expiry_date = db.Column(db.Date, nullable=False)
+    quantity = db.Column(db.Integer, default=0, nullable=False)
+    cost_price = db.Column(db.Float, nullable=True)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    medicine = db.relationship('Medicine', backref=db.backref('batches', lazy=True, cascade='all, delete-orphan'))
+
+    @property
+    def is_expired(self):
+        from datetime import date
+        return self.expiry_date < date.today()
+
+    def __repr__(self):
+        return f'<MedicineBatch {self.batch_number} MedicineID: {self.medicine_id}>'
+
 class Customer(db.Model):
     __tablename__ = 'customers'
+    __table_args__ = (
+        db.Index('ix_customers_name', 'name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -142,6 +175,10 @@ class Customer(db.Model):
 
 class Sale(db.Model):
     __tablename__ = 'sales'
+    __table_args__ = (
+        db.Index('ix_sales_created_at', 'created_at'),
+        db.Index('ix_sales_customer_id_created_at', 'customer_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=False)
@@ -161,7 +198,7 @@ class Sale(db.Model):
     dispensed_by = db.Column(db.String(100), nullable=True)  # Pharmacist who dispensed
     notes = db.Column(db.Text, nullable=True)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
     customer = db.relationship('Customer', back_populates='sales', lazy=True)
@@ -181,6 +218,10 @@ class Sale(db.Model):
 
 class SaleItem(db.Model):
     __tablename__ = 'sale_items'
+    __table_args__ = (
+        db.Index('ix_sale_items_sale_id', 'sale_id'),
+        db.Index('ix_sale_items_medicine_id', 'medicine_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sale_id = db.Column(db.Integer, db.ForeignKey('sales.id'), nullable=False)
@@ -192,6 +233,7 @@ class SaleItem(db.Model):
     
     # Dispensing information
     dispensed_quantity = db.Column(db.Integer, nullable=False)  # May be different from prescribed quantity
+    batch_id = db.Column(db.Integer, db.ForeignKey('medicine_batches.id'), nullable=True)
     batch_number = db.Column(db.String(50), nullable=True)
     expiry_date = db.Column(db.Date, nullable=True)
     dispensing_instructions = db.Column(db.Text, nullable=True)
@@ -232,11 +274,17 @@ class Supplier(db.Model):
 
 class Purchase(db.Model):
     __tablename__ = 'purchases'
+    __table_args__ = (
+        db.Index('ix_purchases_created_at', 'created_at'),
+        db.Index('ix_purchases_supplier_id_created_at', 'supplier_id', 'created_at'),
+        db.Index('ix_purchases_supplier_id_invoice_number', 'supplier_id', 'invoice_number', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     supplier_id = db.Column(db.Integer, db.ForeignKey('suppliers.id'), nullable=False)
+    invoice_number = db.Column(db.String(50), nullable=True)  # Supplier's invoice; set by bulk imports
     total_amount = db.Column(db.Float, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     items = db.relationship('PurchaseItem', backref='purchase', lazy=True)
 
     def __repr__(self):
@@ -244,12 +292,19 @@ class Purchase(db.Model):
 
 class PurchaseItem(db.Model):
     __tablename__ = 'purchase_items'
+    __table_args__ = (
+        db.Index('ix_purchase_items_purchase_id', 'purchase_id'),
+        db.Index('ix_purchase_items_medicine_id_id', 'medicine_id', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     purchase_id = db.Column(db.Integer, db.ForeignKey('purchases.id'), nullable=False)
     medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     price_per_unit = db.Column(db.Float, nullable=False)
+    batch_id = db.Column(db.Integer, db.ForeignKey('medicine_batches.id'), nullable=True)
+    batch_number = db.Column(db.String(50), nullable=True)
+    expiry_date = db.Column(db.Date, nullable=True)
     medicine = db.relationship('Medicine', backref=db.backref('purchase_items', lazy=True))
 
     def __repr__(self):
@@ -257,6 +312,9 @@ class PurchaseItem(db.Model):
 
 class Patient(db.Model):
     __tablename__ = 'patients'
+    __table_args__ = (
+        db.Index('ix_patients_name', 'first_name', 'last_name'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     # Personal Information
@@ -302,6 +360,9 @@ class Patient(db.Model):
 
 class MedicalHistory(db.Model):
     __tablename__ = 'medical_history'
+    __table_args__ = (
+        db.Index('ix_medical_history_patient_id_visit_date', 'patient_id', 'visit_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
@@ -345,6 +406,10 @@ class MedicalHistory(db.Model):
 
 class MedicalEquipment(db.Model):
     __tablename__ = 'medical_equipment'
+    __table_args__ = (
+        db.Index('ix_medical_equipment_next_maintenance_date', 'next_maintenance_date'),
+        db.Index('ix_medical_equipment_status', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -403,6 +468,9 @@ class MedicalEquipment(db.Model):
 
 class InventoryAlert(db.Model):
     __tablename__ = 'inventory_alerts'
+    __table_args__ = (
+        db.Index('ix_inventory_alerts_active_ack_created_at', 'is_active', 'is_acknowledged', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     alert_type = db.Column(db.String(50), nullable=False)  # LOW_STOCK, EXPIRED, EXPIRING_SOON, MAINTENANCE_DUE, OUT_OF_STOCK
@@ -445,6 +513,10 @@ class InventoryAlert(db.Model):
 
 class Prescription(db.Model):
     __tablename__ = 'prescriptions'
+    __table_args__ = (
+        db.Index('ix_prescriptions_status_priority_date', 'status', 'priority', 'prescription_date'),
+        db.Index('ix_prescriptions_patient_id', 'patient_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     prescription_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -584,3 +656,152 @@ class PrescriptionItem(db.Model):
 
     def __repr__(self):
         return f'<PrescriptionItem {self.medicine_name} - {self.prescribed_quantity} {self.unit}>'
+
+class OutboundEmail(db.Model):
+    """An email waiting in (or sent from) the outbox; see mail_queue.py."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255), nullable=True)
+    recipients = db.Column(db.Text, nullable=False)  # JSON list of addresses
+    body = db.Column(db.Text, nullable=False)
+    html = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    claimed_by = db.Column(db.String(64), nullable=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<OutboundEmail {self.id} {self.status}>'
+
+class DailySales(db.Model):
+    """Sales totals for one day, payment method and sale type; a rollup kept by rollups.py."""
+    __tablename__ = 'daily_sales'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'payment_method', 'sale_type', name='uq_daily_sales_day_payment_method_sale_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    payment_method = db.Column(db.String(50), nullable=False)
+    sale_type = db.Column(db.String(30), nullable=False)
+    sale_count = db.Column(db.Integer, default=0, nullable=False)
+    total_amount = db.Column(db.Float, default=0.0, nullable=False)
+    gst_amount = db.Column(db.Float, default=0.0, nullable=False)
+    discount_amount = db.Column(db.Float, default=0.0, nullable=False)
+
+    def __repr__(self):
+        return f'<DailySales {self.day} {self.payment_method} {self.sale_type}>'
+
+class DailyMedicineSales(db.Model):
+    """Units and revenue of one medicine sold on one day; a rollup kept by rollups.py."""
+    __tablename__ = 'daily_medicine_sales'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'medicine_id', name='uq_daily_medicine_sales_day_medicine_id'),
+        db.Index('ix_daily_medicine_sales_medicine_id_day', 'medicine_id', 'day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id'), nullable=False)
+    units = db.Column(db.Integer, default=0, nullable=False)
+    revenue = db.Column(db.Float, default=0.0, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyMedicineSales {self.day} MedicineID: {self.medicine_id}>'
+
+class StockMovement(db.Model):
+    """
+    One change to a medicine's stock, with the document that caused it.
+
+    Appended by ``stock_ledger`` whenever ``Medicine.quantity`` changes and
+    never updated, so the movements of a medicine add up to its stock.
+    A medicine with movements cannot be deleted.
+    """
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_medicine_id_created_at', 'medicine_id', 'created_at'),
+        db.Index('ix_stock_movements_created_at', 'created_at'),
+        db.Index('ix_stock_movements_source_type_source_id', 'source_type', 'source_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id', ondelete='RESTRICT'), nullable=False)
+    batch_id = db.Column(db.Integer, db.ForeignKey('medicine_batches.id', ondelete='SET NULL'), nullable=True)
+    quantity = db.Column(db.Integer, nullable=False)  # Positive when received, negative when taken
+    reason = db.Column(db.String(30), nullable=False)  # opening, purchase, purchase_deleted, sale, dispense, adjustment, import
+    source_type = db.Column(db.String(30), nullable=True)  # sale, purchase, medicine
+    source_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    medicine = db.relationship('Medicine')
+    batch = db.relationship('MedicineBatch')
+
+    def __repr__(self):
+        return f'<StockMovement {self.reason} {self.quantity:+d} MedicineID: {self.medicine_id}>'
+
+class InventorySnapshot(db.Model):
+    """
+    Stock and valuation of one medicine at the end of a day; taken by rollups.snapshot_inventory().
+
+    ``quantity`` is the stock ledger balance at midnight (UTC) ending
+    ``snapshot_date``, so ``stock_ledger.stock_on`` can start from the
+    latest snapshot and add only the movements since.
+    """
+    __tablename__ = 'inventory_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('snapshot_date', 'medicine_id', name='uq_inventory_snapshots_snapshot_date_medicine_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    medicine_id = db.Column(db.Integer, db.ForeignKey('medicines.id', ondelete='RESTRICT'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    stock_value = db.Column(db.Float, nullable=False)  # quantity x selling price
+    cost_value = db.Column(db.Float, nullable=False)  # quantity x unit cost
+    taken_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<InventorySnapshot {self.snapshot_date} MedicineID: {self.medicine_id}>'
+
+class byte_order(FunctionElement):
+    """
+    Compare and sort a string expression byte by byte.
+
+    Typeahead prefix matches are range scans (``key >= 'abc' AND key < 'abd'``),
+    which only find every match when the index sorts by code point. SQLite's
+    default BINARY collation already does; PostgreSQL needs ``COLLATE "C"``,
+    as its database collation usually follows the locale.
+    """
+
+    type = String()
+    inherit_cache = True
+
+
+@compiles(byte_order)
+def _compile_byte_order(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(byte_order, 'postgresql')
+def _compile_byte_order_postgresql(element, compiler, **kw):
+    return f'({compiler.process(element.clauses, **kw)}) COLLATE "C"'
+
+
+# Expression indexes for case-insensitive prefix lookups (typeahead search).
+# Queries must use these exact expressions for the indexes to apply.
+medicine_search_key = byte_order(db.func.lower(Medicine.name))
+customer_search_key = byte_order(db.func.lower(Customer.name))
+patient_search_key = byte_order(db.func.lower(Patient.first_name + db.literal_column("' '") + Patient.last_name))
+
+db.Index('ix_medicines_name_lower', medicine_search_key)
+db.Index('ix_customers_name_lower', customer_search_key)
+db.Index('ix_patients_full_name_lower', patient_search_key)
@@ -0,0 +1,166 @@
+"""
+Keyset (seek) pagination for list views.
+
+Offset pagination gets slower the deeper you page because the database
+still has to walk every skipped row. Keyset pagination instead remembers
+the sort key of the last row shown and asks for rows strictly after it, so
+every page is an index range scan of ``per_page + 1`` rows.
+
+Cursors are opaque URL-safe strings encoding the sort key of a boundary
+row. Ordering columns must be non-nullable and the ordering must end with
+a unique column (normally the primary key) so it is total and stable.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+
+from flask import current_app, request, url_for
+from sqlalchemy import and_, or_
+
+DIRECTIONS = ('next', 'prev')
+
+
+class Page:
+    """One page of results plus the cursors needed to move around it."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return ['dt', value.isoformat()]
+    if isinstance(value, date):
+        return ['d', value.isoformat()]
+    return ['v', value]
+
+
+def _decode_value(pair):
+    kind, value = pair
+    if kind == 'dt':
+        return datetime.fromisoformat(value)
+    if kind == 'd':
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values):
+    """Encode a tuple of sort-key values as an opaque cursor string."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Returns:
+        list: The sort-key values, or None if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return [_decode_value(pair) for pair in json.loads(base64.urlsafe_b64decode(padded))]
+    except (ValueError, TypeError):
+        return None
+
+
+def _seek_condition(ordering, values, forward):
+    """
+    Build ``(c1, c2, ...) > (v1, v2, ...)`` honouring per-column direction.
+
+    Expanded into OR/AND terms so columns may mix ascending and descending
+    order, which row-value comparison cannot express.
+    """
+    clauses = []
+    for position, (column, descending) in enumerate(ordering):
+        after = (column < values[position]) if descending == forward else (column > values[position])
+        equal_prefix = [ordering[i][0] == values[i] for i in range(position)]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+
+def keyset_paginate(query, ordering, cursor=None, direction='next', per_page=None):
+    """
+    Fetch one page of ``query`` using keyset pagination.
+
+    Args:
+        query (Query): Filtered query without ORDER BY, LIMIT or OFFSET.
+        ordering (list): (column, descending) pairs ending with a unique
+                         column, usually the primary key.
+        cursor (str): Cursor from a previous Page, or None for the first page.
+        direction (str): 'next' for rows after the cursor, 'prev' for rows
+                         before it.
+        per_page (int): Page size; defaults to ITEMS_PER_PAGE.
+
+    Returns:
+        Page: The rows in display order with next/prev cursors.
+    """
+    per_page = per_page or current_app.config.get('ITEMS_PER_PAGE', 20)
+    if direction not in DIRECTIONS:
+        direction = 'next'
+    forward = direction == 'next'
+
+    values = decode_cursor(cursor) if cursor else None
+    if values is not None and len(values) != len(ordering):
+        values = None
+    if values is None:
+        forward = True
+
+    if values is not None:
+        query = query.filter(_seek_condition(ordering, values, forward))
+
+    order_by = []
+    for column, descending in ordering:
+        order_by.append(column.desc() if descending == forward else column.asc())
+    rows = query.order_by(*order_by).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def key_of(row):
+        return encode_cursor([getattr(row, column.key) for column, _ in ordering])
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if (has_more if forward else values is not None):
+            next_cursor = key_of(rows[-1])
+        if (values is not None if forward else has_more):
+            prev_cursor = key_of(rows[0])
+    return Page(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def paginate_request(query, ordering, per_page=None):
+    """Paginate ``query`` using the ``cursor`` and ``direction`` request args."""
+    return keyset_paginate(
+        query,
+        ordering,
+        cursor=request.args.get('cursor'),
+        direction=request.args.get('direction', 'next'),
+        per_page=per_page,
+    )
+
+
+def page_url(cursor, direction):
+    """Build a URL for the current view with a new cursor, keeping other filters."""
+    args = request.args.to_dict()
+    args.update(cursor=cursor, direction=direction)
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
@@ -0,0 +1,88 @@
+"""
+Login and role checks for Medical Management System.
+
+``init_app`` attaches Flask-Login to the app; the decorators below guard
+views by role and are shared by every blueprint. Each one sends anonymous
+users to the login page and signed-in users without the role back to the
+dashboard with a message.
+"""
+
+from functools import wraps
+
+from flask import flash, redirect, url_for
+from flask_login import LoginManager, current_user
+
+from models import db, User
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message = 'Please log in to access this page.'
+login_manager.login_message_category = 'info'
+
+
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+
+def init_app(app):
+    """Attach Flask-Login to ``app``."""
+    login_manager.init_app(app)
+
+
+def admin_required(f):
+    """Decorator that requires admin role"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            flash('Please log in to access this page.', 'warning')
+            return redirect(url_for('auth.login'))
+        if not current_user.is_admin():
+            flash('Admin access required. You do not have permission to access this page.', 'error')
+            return redirect(url_for('main.dashboard'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def pharmacist_required(f):
+    """Decorator that requires pharmacist or admin role"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            flash('Please log in to access this page.', 'warning')
+            return redirect(url_for('auth.login'))
+        if not current_user.can_manage_inventory():
+            flash('Pharmacist access required. You do not have permission to access this page.', 'error')
+            return redirect(url_for('main.dashboard'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def staff_required(f):
+    """Decorator that requires staff access (admin or pharmacist)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            flash('Please log in to access this page.', 'warning')
+            return redirect(url_for('auth.login'))
+        if current_user.is_customer():
+            flash('Staff access required. You do not have permission to access this page.', 'error')
+            return redirect(url_for('main.dashboard'))
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def role_required(*roles):
+    """Decorator that requires one of the specified roles"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not current_user.is_authenticated:
+                flash('Please log in to access this page.', 'warning')
+                return redirect(url_for('auth.login'))
+            if not current_user.role in roles:
+                flash(f'Access denied. Required role: {" or ".join(roles)}', 'error')
+                return redirect(url_for('main.dashboard'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,108 @@
+"""
+Per-request SQL profiling for Medical Management System.
+
+When ``SQLALCHEMY_RECORD_QUERIES`` is enabled (``SQL_PROFILING=true`` in the
+environment), Flask-SQLAlchemy records every statement executed during a
+request. This module reads those records after each request and:
+
+- adds a ``Server-Timing`` header with DB time, query count, template
+  render time and total time, which browsers show in their dev tools;
+- writes one structured (JSON) log line per request to the
+  ``medical.profiling`` logger;
+- appends statements slower than ``SLOW_QUERY_THRESHOLD_MS`` to the slow
+  query log together with the route that issued them.
+
+When recording is disabled nothing is registered, so production pays no
+cost until profiling is switched on.
+"""
+
+import json
+import logging
+import time
+
+from flask import g, request, before_render_template, template_rendered
+from flask_sqlalchemy.record_queries import get_recorded_queries
+
+logger = logging.getLogger('medical.profiling')
+slow_query_logger = logging.getLogger('medical.slow_queries')
+
+SLOWEST_REPORTED = 3
+
+
+def init_app(app):
+    """Register profiling hooks on ``app`` if query recording is enabled."""
+    if not app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+        return
+
+    threshold_ms = float(app.config.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    log_path = app.config.get('SLOW_QUERY_LOG')
+    if log_path and not slow_query_logger.handlers:
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+        slow_query_logger.propagate = False
+
+    @app.before_request
+    def start_profiling():
+        g.profiling_started = time.perf_counter()
+        g.profiling_render_ms = 0.0
+
+    def render_started(sender, template, context, **extra):
+        g.profiling_render_started = time.perf_counter()
+
+    def render_finished(sender, template, context, **extra):
+        started = g.pop('profiling_render_started', None)
+        if started is not None:
+            g.profiling_render_ms = g.get('profiling_render_ms', 0.0) + (time.perf_counter() - started) * 1000
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.after_request
+    def finish_profiling(response):
+        started = g.get('profiling_started')
+        if started is None:
+            return response
+
+        total_ms = (time.perf_counter() - started) * 1000
+        render_ms = g.get('profiling_render_ms', 0.0)
+        queries = get_recorded_queries()
+        durations = [query.duration * 1000 for query in queries]
+        db_ms = sum(durations)
+        route = request.url_rule.rule if request.url_rule else request.path
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.1f};desc="{len(queries)} queries", '
+            f'render;dur={render_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+
+        slowest = sorted(zip(durations, queries), key=lambda pair: pair[0], reverse=True)[:SLOWEST_REPORTED]
+        logger.info(json.dumps({
+            'method': request.method,
+            'route': route,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': len(queries),
+            'db_ms': round(db_ms, 2),
+            'render_ms': round(render_ms, 2),
+            'total_ms': round(total_ms, 2),
+            'slowest': [
+                {'ms': round(duration, 2), 'location': query.location, 'statement': query.statement[:200]}
+                for duration, query in slowest
+            ],
+        }))
+
+        for duration, query in zip(durations, queries):
+            if duration < threshold_ms:
+                continue
+            slow_query_logger.warning(json.dumps({
+                'route': route,
+                'method': request.method,
+                'ms': round(duration, 2),
+                'location': query.location,
+                'statement': query.statement,
+                'parameters': repr(query.parameters)[:500],
+            }))
+        return response
@@ -0,0 +1,34 @@
+"""
+SQL statement counting for Medical Management System.
+
+``QueryCounter`` hooks SQLAlchemy's ``before_cursor_execute`` event on an
+engine and records every statement executed while it is active. It is used
+to check that a view issues a fixed number of queries no matter how many
+rows it renders (see tests/test_query_counts.py).
+"""
+
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Context manager recording the SQL statements run on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
@@ -0,0 +1,144 @@
+"""
+Streaming report exports for Medical Management System.
+
+Reports are produced as plain row tuples read through ``yield_per`` (a
+server-side cursor on PostgreSQL), so no ORM objects are built and memory
+use stays flat regardless of table size. CSV is streamed to the client in
+chunks as rows arrive; Excel files use an openpyxl write-only workbook that
+spills rows to a temporary file which is then sent from disk.
+"""
+
+import csv
+import io
+import tempfile
+from datetime import date
+
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import and_, func, select
+
+from models import db, Customer, Medicine, MedicineBatch, Sale, SaleItem
+
+YIELD_PER = 1000
+CSV_FLUSH_ROWS = 500
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def _stream(statement):
+    """Execute ``statement`` and yield result rows in batches of YIELD_PER."""
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+    for row in result:
+        yield tuple(row)
+
+
+def _sales_rows():
+    statement = select(
+        Sale.id,
+        Sale.created_at,
+        func.coalesce(Customer.name, 'N/A'),
+        Sale.total_amount,
+        Sale.gst_amount,
+    ).outerjoin(Customer, Customer.id == Sale.customer_id).order_by(Sale.id)
+    for sale_id, created_at, customer_name, total_amount, gst_amount in _stream(statement):
+        yield sale_id, created_at.strftime('%Y-%m-%d'), customer_name, total_amount, gst_amount
+
+
+def _medicine_rows(expired_only):
+    # One row per lot with stock left; medicines with no stock keep one row
+    # showing their default batch and a zero quantity.
+    lots = and_(MedicineBatch.medicine_id == Medicine.id, MedicineBatch.quantity > 0)
+    statement = select(
+        Medicine.name,
+        func.coalesce(MedicineBatch.batch_number, Medicine.batch_number),
+        func.coalesce(MedicineBatch.expiry_date, Medicine.expiry_date),
+        func.coalesce(MedicineBatch.quantity, 0),
+        Medicine.price,
+    ).outerjoin(MedicineBatch, lots).order_by(Medicine.id, MedicineBatch.expiry_date, MedicineBatch.id)
+    if expired_only:
+        statement = select(
+            Medicine.name, MedicineBatch.batch_number, MedicineBatch.expiry_date, MedicineBatch.quantity, Medicine.price,
+        ).join(MedicineBatch, lots).where(MedicineBatch.expiry_date < date.today())\
+         .order_by(MedicineBatch.expiry_date, MedicineBatch.id)
+    return _stream(statement)
+
+
+def _gst_rows():
+    # The GST rate shown is that of the first item on each sale, resolved with
+    # a join instead of loading sale.items[0].medicine per row.
+    first_items = select(
+        SaleItem.sale_id.label('sale_id'),
+        func.min(SaleItem.id).label('sale_item_id'),
+    ).group_by(SaleItem.sale_id).subquery()
+
+    statement = select(
+        Sale.id,
+        Sale.created_at,
+        Medicine.gst_percent,
+        Sale.gst_amount,
+        Sale.total_amount,
+    ).outerjoin(
+        first_items, first_items.c.sale_id == Sale.id
+    ).outerjoin(
+        SaleItem, SaleItem.id == first_items.c.sale_item_id
+    ).outerjoin(
+        Medicine, Medicine.id == SaleItem.medicine_id
+    ).order_by(Sale.id)
+    for sale_id, created_at, gst_percent, gst_amount, total_amount in _stream(statement):
+        yield (
+            sale_id,
+            created_at.strftime('%Y-%m-%d'),
+            gst_percent if gst_percent is not None else 'N/A',
+            gst_amount,
+            total_amount,
+        )
+
+
+REPORTS = {
+    'sales': (['Sale ID', 'Date', 'Customer', 'Total Amount', 'GST Amount'], _sales_rows),
+    'expiry': (['Medicine', 'Batch', 'Expiry Date', 'Quantity', 'Price'], lambda: _medicine_rows(True)),
+    'inventory': (['Medicine', 'Batch', 'Expiry Date', 'Quantity', 'Price'], lambda: _medicine_rows(False)),
+    'gst': (['Sale ID', 'Date', 'GST Percentage', 'GST Amount', 'Total Amount'], _gst_rows),
+}
+
+
+def csv_response(report_type):
+    """Stream a report as CSV, flushing every CSV_FLUSH_ROWS rows."""
+    headers, rows = REPORTS[report_type]
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(headers)
+        for count, row in enumerate(rows(), start=1):
+            writer.writerow(row)
+            if count % CSV_FLUSH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={report_type}_report.csv'
+    return response
+
+
+def xlsx_response(report_type):
+    """Build a report with a write-only workbook and send it from a temp file."""
+    from openpyxl import Workbook
+
+    headers, rows = REPORTS[report_type]
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(headers)
+    for row in rows():
+        ws.append(row)
+
+    # TemporaryFile is removed when send_file's wrapper closes it
+    output = tempfile.TemporaryFile()
+    wb.save(output)
+    output.seek(0)
+    return send_file(
+        output,
+        mimetype=XLSX_MIMETYPE,
+        as_attachment=True,
+        download_name=f'{report_type}_report.xlsx',
+    )
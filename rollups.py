@@ -0,0 +1,363 @@
+"""
+Daily sales and inventory rollups for Medical Management System.
+
+Reports and charts used to recompute history from raw ``sales`` and
+``sale_items`` rows on every view, so a month or year cost a scan of every
+sale in it. They now read three rollup tables, whose size grows with the
+number of days rather than the number of sales:
+
+- ``DailySales``: sale count, total, GST and discount per day, payment
+  method and sale type;
+- ``DailyMedicineSales``: units and revenue per day and medicine;
+- ``InventorySnapshot``: closing stock, selling value and cost value of
+  every medicine per day, taken by ``flask snapshot-inventory`` (run it
+  nightly from cron, after midnight UTC, for the day that just ended).
+
+The sales rollups are kept current incrementally. Session events turn each
+flushed insert, update or delete of a ``Sale`` or ``SaleItem``, and each
+bulk ``insert(Sale)`` / ``insert(SaleItem)`` executemany, into per-row
+deltas, and add them with one ``INSERT ... ON CONFLICT DO UPDATE SET
+total = total + delta`` per table in the same transaction. The rollups
+therefore commit or roll back with the sales, and concurrent checkouts add
+to the same row instead of overwriting each other. Days are the UTC dates
+of ``Sale.created_at``, as in ``sales_aggregation``.
+
+Changes made outside the ORM session (raw SQL, bulk UPDATE or DELETE
+statements on sales) are not tracked; ``flask rebuild-rollups`` recomputes
+the sales rollups from the raw rows, for all of history or a range of days.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, literal, select, update
+
+from models import db, DailyMedicineSales, DailySales, InventorySnapshot, Medicine, Sale, SaleItem
+from sales_aggregation import day_bucket, unit_costs
+from stock_ledger import stock_balances
+
+logger = logging.getLogger(__name__)
+
+SALE_KEY = ('day', 'payment_method', 'sale_type')
+SALE_TOTALS = ('sale_count', 'total_amount', 'gst_amount', 'discount_amount')
+MEDICINE_KEY = ('day', 'medicine_id')
+MEDICINE_TOTALS = ('units', 'revenue')
+
+# Attributes a rollup row is computed from
+_SALE_ATTRS = ('created_at', 'payment_method', 'sale_type', 'total_amount', 'gst_amount', 'discount_amount')
+_ITEM_ATTRS = ('sale_id', 'medicine_id', 'quantity', 'price_per_unit')
+
+_DELETED_KEY = 'rollup_deleted'
+# Sale ids per IN (...) lookup of sale days
+_LOOKUP_CHUNK = 500
+
+
+def _day(created_at):
+    return (created_at or datetime.utcnow()).date()
+
+
+class _Deltas:
+    """Changes to the sales rollups, summed per rollup row."""
+
+    def __init__(self):
+        self.sales = defaultdict(lambda: [0, 0.0, 0.0, 0.0])
+        self.medicines = defaultdict(lambda: [0, 0.0])
+
+    def add_sale(self, values, sign):
+        totals = self.sales[(_day(values['created_at']), values['payment_method'], values['sale_type'])]
+        totals[0] += sign
+        totals[1] += sign * (values['total_amount'] or 0.0)
+        totals[2] += sign * (values['gst_amount'] or 0.0)
+        totals[3] += sign * (values['discount_amount'] or 0.0)
+
+    def add_item(self, day, values, sign):
+        totals = self.medicines[(day, values['medicine_id'])]
+        totals[0] += sign * values['quantity']
+        totals[1] += sign * values['quantity'] * values['price_per_unit']
+
+    def apply(self, connection):
+        _add(connection, DailySales.__table__, SALE_KEY, SALE_TOTALS, self.sales)
+        _add(connection, DailyMedicineSales.__table__, MEDICINE_KEY, MEDICINE_TOTALS, self.medicines)
+
+
+def _add(connection, table, key_columns, total_columns, deltas):
+    """Add ``deltas`` ({key: totals}) onto the rows of ``table``, creating missing rows."""
+    # Sorted so concurrent transactions lock rollup rows in the same order
+    rows = [
+        {**dict(zip(key_columns, key)), **dict(zip(total_columns, totals))}
+        for key, totals in sorted(deltas.items()) if any(totals)
+    ]
+    if not rows:
+        return
+
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        statement = upsert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + statement.excluded[column] for column in total_columns},
+        )
+        connection.execute(statement, rows)
+        return
+
+    for row in rows:
+        matches = and_(*(table.c[column] == row[column] for column in key_columns))
+        updated = connection.execute(
+            update(table).where(matches).values({column: table.c[column] + row[column] for column in total_columns})
+        )
+        if not updated.rowcount:
+            connection.execute(insert(table).values(row))
+
+
+def _values(obj, attrs, old=False):
+    """``attrs`` of ``obj``, as they were before the current flush if ``old``."""
+    state = inspect(obj)
+    values = {}
+    for attr in attrs:
+        history = state.attrs[attr].history
+        values[attr] = history.deleted[0] if old and history.deleted else getattr(obj, attr)
+    return values
+
+
+def _changed(obj, attrs):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _sale_days(connection, sale_ids, known=None):
+    """{sale id: day} for ``sale_ids``, looking up those not in ``known``."""
+    days = dict(known or {})
+    missing = sorted({sale_id for sale_id in sale_ids if sale_id not in days})
+    for offset in range(0, len(missing), _LOOKUP_CHUNK):
+        chunk = missing[offset:offset + _LOOKUP_CHUNK]
+        for sale_id, created_at in connection.execute(select(Sale.id, Sale.created_at).where(Sale.id.in_(chunk))):
+            days[sale_id] = _day(created_at)
+    return days
+
+
+def _record_deletes(session, flush_context, instances):
+    # Deleted rows are read before the flush removes them
+    sales = [obj for obj in session.deleted if isinstance(obj, Sale)]
+    items = {obj for obj in session.deleted if isinstance(obj, SaleItem)}
+    for sale in sales:
+        items.update(sale.items)
+    if not sales and not items:
+        return
+
+    deltas = _Deltas()
+    known = {}
+    for sale in sales:
+        values = _values(sale, _SALE_ATTRS, old=True)
+        known[sale.id] = _day(values['created_at'])
+        deltas.add_sale(values, -1)
+    item_values = [_values(item, _ITEM_ATTRS, old=True) for item in items]
+    days = _sale_days(session.connection(), [values['sale_id'] for values in item_values], known)
+    for values in item_values:
+        deltas.add_item(days[values['sale_id']], values, -1)
+    flush_context.attributes[_DELETED_KEY] = deltas
+
+
+def _record_flush(session, flush_context):
+    deltas = flush_context.attributes.pop(_DELETED_KEY, None) or _Deltas()
+    new_sales = [obj for obj in session.new if isinstance(obj, Sale)]
+    new_items = [obj for obj in session.new if isinstance(obj, SaleItem)]
+    dirty_sales = [obj for obj in session.dirty if isinstance(obj, Sale) and _changed(obj, _SALE_ATTRS)]
+    dirty_items = [obj for obj in session.dirty if isinstance(obj, SaleItem) and _changed(obj, _ITEM_ATTRS)]
+
+    known = {}
+    old_days = {}  # sale id -> day before this flush, for sales moved to another day
+    for sale in new_sales:
+        values = _values(sale, _SALE_ATTRS)
+        known[sale.id] = _day(values['created_at'])
+        deltas.add_sale(values, 1)
+    for sale in dirty_sales:
+        old_values, values = _values(sale, _SALE_ATTRS, old=True), _values(sale, _SALE_ATTRS)
+        known[sale.id] = _day(values['created_at'])
+        if _day(old_values['created_at']) != known[sale.id]:
+            old_days[sale.id] = _day(old_values['created_at'])
+        deltas.add_sale(old_values, -1)
+        deltas.add_sale(values, 1)
+
+    changes = [(_values(item, _ITEM_ATTRS), 1) for item in new_items]
+    for item in dirty_items:
+        changes.append((_values(item, _ITEM_ATTRS, old=True), -1))
+        changes.append((_values(item, _ITEM_ATTRS), 1))
+    if old_days:
+        # Unchanged items follow their sale to its new day
+        handled = {item.id for item in new_items + dirty_items}
+        moved_items = session.connection().execute(
+            select(SaleItem.id, *(getattr(SaleItem, attr) for attr in _ITEM_ATTRS))
+            .where(SaleItem.sale_id.in_(old_days))
+        )
+        for row in moved_items:
+            if row.id not in handled:
+                values = {attr: getattr(row, attr) for attr in _ITEM_ATTRS}
+                changes.extend([(values, -1), (values, 1)])
+    if changes:
+        days = _sale_days(session.connection(), [values['sale_id'] for values, _ in changes], known)
+        for values, sign in changes:
+            sale_id = values['sale_id']
+            deltas.add_item(old_days.get(sale_id, days[sale_id]) if sign < 0 else days[sale_id], values, sign)
+
+    deltas.apply(session.connection())
+
+
+def _column_default(column):
+    default = Sale.__table__.c[column].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def _record_bulk_statement(orm_execute_state):
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None or mapper.class_ not in (Sale, SaleItem):
+        return None
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return None
+    parameters = orm_execute_state.parameters
+    if not orm_execute_state.is_insert or not parameters:
+        logger.warning('Sales rollups do not follow bulk %s statements on %s; run `flask rebuild-rollups`',
+                       'UPDATE' if orm_execute_state.is_update else 'DELETE' if orm_execute_state.is_delete
+                       else 'INSERT ... SELECT', mapper.class_.__tablename__)
+        return None
+
+    result = orm_execute_state.invoke_statement()
+    rows = parameters if isinstance(parameters, list) else [parameters]
+    connection = orm_execute_state.session.connection()
+    deltas = _Deltas()
+    if mapper.class_ is Sale:
+        defaults = {attr: _column_default(attr) for attr in _SALE_ATTRS}
+        for row in rows:
+            deltas.add_sale({**defaults, **row}, 1)
+    else:
+        days = _sale_days(connection, [row['sale_id'] for row in rows])
+        for row in rows:
+            deltas.add_item(days[row['sale_id']], row, 1)
+    deltas.apply(connection)
+    return result
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def init_app(app):
+    """Keep the sales rollups current as sales are flushed."""
+    if not event.contains(db.session, 'after_flush', _record_flush):
+        # Load the previous value on assignment, even when the attribute was
+        # expired by a commit, so updates can subtract it from the rollups
+        for model, attrs in ((Sale, _SALE_ATTRS), (SaleItem, _ITEM_ATTRS)):
+            for attr in attrs:
+                event.listen(getattr(model, attr), 'set', _keep_old_value, active_history=True, retval=True)
+        event.listen(db.session, 'before_flush', _record_deletes)
+        event.listen(db.session, 'after_flush', _record_flush)
+        event.listen(db.session, 'do_orm_execute', _record_bulk_statement)
+
+
+def rebuild(start_date=None, end_date=None):
+    """
+    Recompute the sales rollups from ``sales`` and ``sale_items``.
+
+    Args:
+        start_date (date): First day to rebuild; defaults to the first sale.
+        end_date (date): Last day to rebuild (inclusive); defaults to the last sale.
+
+    Returns:
+        tuple: (daily sales rows, daily medicine rows) written.
+    """
+    sales_in_range, sales_days, medicine_days = [], [], []
+    if start_date:
+        sales_in_range.append(Sale.created_at >= datetime.combine(start_date, time.min))
+        sales_days.append(DailySales.day >= start_date)
+        medicine_days.append(DailyMedicineSales.day >= start_date)
+    if end_date:
+        sales_in_range.append(Sale.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+        sales_days.append(DailySales.day <= end_date)
+        medicine_days.append(DailyMedicineSales.day <= end_date)
+
+    db.session.execute(delete(DailySales).where(*sales_days))
+    db.session.execute(delete(DailyMedicineSales).where(*medicine_days))
+
+    bucket = day_bucket(Sale.created_at)
+    daily_sales = db.session.execute(insert(DailySales).from_select(
+        ['day', 'payment_method', 'sale_type', 'sale_count', 'total_amount', 'gst_amount', 'discount_amount'],
+        select(
+            bucket, Sale.payment_method, Sale.sale_type, func.count(Sale.id),
+            func.sum(Sale.total_amount), func.sum(Sale.gst_amount), func.sum(Sale.discount_amount),
+        ).where(*sales_in_range).group_by(bucket, Sale.payment_method, Sale.sale_type),
+    ))
+    daily_medicines = db.session.execute(insert(DailyMedicineSales).from_select(
+        ['day', 'medicine_id', 'units', 'revenue'],
+        select(
+            bucket, SaleItem.medicine_id, func.sum(SaleItem.quantity),
+            func.sum(SaleItem.quantity * SaleItem.price_per_unit),
+        ).join(Sale, Sale.id == SaleItem.sale_id).where(*sales_in_range).group_by(bucket, SaleItem.medicine_id),
+    ))
+    return daily_sales.rowcount, daily_medicines.rowcount
+
+
+def snapshot_inventory(snapshot_date=None):
+    """
+    Record every medicine's closing stock and valuation for ``snapshot_date``, replacing any earlier snapshot of that day.
+
+    The quantity is the stock ledger balance at the end of the day
+    (``stock_ledger.stock_balances``), so only days that have ended (UTC)
+    can be recorded, and later ``stock_on`` lookups start from it. Stock is
+    valued at the selling price and at the unit cost
+    (``sales_aggregation.unit_costs``).
+
+    Args:
+        snapshot_date (date): Day to record; defaults to yesterday.
+
+    Returns:
+        int: Number of medicines recorded.
+
+    Raises:
+        ValueError: If ``snapshot_date`` has not ended yet.
+    """
+    today = datetime.utcnow().date()
+    snapshot_date = snapshot_date or today - timedelta(days=1)
+    if snapshot_date >= today:
+        raise ValueError(f'{snapshot_date} has not ended yet; only past days can be snapshotted.')
+
+    db.session.execute(delete(InventorySnapshot).where(InventorySnapshot.snapshot_date == snapshot_date))
+    balances = stock_balances(snapshot_date)
+    costs = unit_costs()
+    result = db.session.execute(insert(InventorySnapshot).from_select(
+        ['snapshot_date', 'medicine_id', 'quantity', 'stock_value', 'cost_value', 'taken_at'],
+        select(
+            literal(snapshot_date, db.Date), Medicine.id, balances.c.quantity,
+            balances.c.quantity * Medicine.price, balances.c.quantity * costs.c.unit_cost,
+            literal(datetime.utcnow(), db.DateTime),
+        ).join(
+            balances, balances.c.medicine_id == Medicine.id
+        ).join(costs, costs.c.medicine_id == Medicine.id),
+    ))
+    return result.rowcount
+
+
+def inventory_valuation(start_date, end_date):
+    """
+    Total stock and valuation for each snapshot between two dates (inclusive).
+
+    Returns:
+        list: Dicts with 'date', 'quantity', 'stock_value' and 'cost_value'
+              keys, ordered by date; days without a snapshot are left out.
+    """
+    rows = db.session.query(
+        InventorySnapshot.snapshot_date,
+        func.sum(InventorySnapshot.quantity),
+        func.sum(InventorySnapshot.stock_value),
+        func.sum(InventorySnapshot.cost_value),
+    ).filter(
+        InventorySnapshot.snapshot_date.between(start_date, end_date),
+    ).group_by(InventorySnapshot.snapshot_date).order_by(InventorySnapshot.snapshot_date).all()
+    return [
+        {'date': snapshot_date, 'quantity': int(quantity or 0), 'stock_value': float(stock_value or 0.0),
+         'cost_value': float(cost_value or 0.0)}
+        for snapshot_date, quantity, stock_value, cost_value in rows
+    ]
@@ -0,0 +1,243 @@
+"""
+Sales aggregation helpers for Medical Management System.
+
+Dashboard charts and financial reports need sales totals bucketed by day,
+week or month. These helpers read the daily rollup tables kept by
+``rollups`` (``DailySales`` and ``DailyMedicineSales``), so a month or a
+year costs one row per day rather than one per sale, and fold the days into
+weeks or months in Python.
+
+``profit_and_loss`` extends the same approach to cost of goods sold: each
+sold unit is costed at ``Medicine.cost_price``, falling back to the price
+paid on the most recent purchase of that medicine.
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import cast, func, select
+
+from models import db, DailyMedicineSales, DailySales, Medicine, PurchaseItem
+
+PERIODS = ('day', 'week', 'month')
+
+
+def day_range(start_date, end_date):
+    """
+    Convert an inclusive date range into a half-open datetime range.
+
+    Returns:
+        tuple: (start datetime, exclusive end datetime)
+    """
+    return (
+        datetime.combine(start_date, time.min),
+        datetime.combine(end_date + timedelta(days=1), time.min),
+    )
+
+
+def day_bucket(column):
+    """Return a dialect-appropriate expression truncating ``column`` to a date."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.date(column)
+    return cast(column, db.Date)
+
+
+def as_date(value):
+    """Normalise a day bucket value (SQLite returns ISO strings) to a ``date``."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def period_start(day, period):
+    """Return the first day of the day/week/month bucket containing ``day``."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def sales_totals(start_date, end_date, period='day'):
+    """
+    Aggregate sales between two dates (inclusive) from the daily rollup.
+
+    Every bucket in the range is present in the result, including buckets
+    without any sales, so callers can feed the rows straight into a chart.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+        period (str): One of 'day', 'week' (ISO weeks starting Monday) or 'month'.
+
+    Returns:
+        list: Dicts with 'period', 'total_sales', 'gst_amount' and 'sale_count'
+              keys, ordered by period.
+    """
+    if period not in PERIODS:
+        raise ValueError(f'Unsupported period: {period}')
+
+    rows = db.session.query(
+        DailySales.day,
+        func.sum(DailySales.total_amount),
+        func.sum(DailySales.gst_amount),
+        func.sum(DailySales.sale_count),
+    ).filter(
+        DailySales.day.between(start_date, end_date),
+    ).group_by(DailySales.day).all()
+
+    totals = OrderedDict()
+    day = start_date
+    while day <= end_date:
+        key = period_start(day, period)
+        if key not in totals:
+            totals[key] = {'period': key, 'total_sales': 0.0, 'gst_amount': 0.0, 'sale_count': 0}
+        day += timedelta(days=1)
+
+    for day_value, total_sales, gst_amount, sale_count in rows:
+        entry = totals[period_start(as_date(day_value), period)]
+        entry['total_sales'] += float(total_sales or 0.0)
+        entry['gst_amount'] += float(gst_amount or 0.0)
+        entry['sale_count'] += int(sale_count or 0)
+
+    return list(totals.values())
+
+
+def unit_costs():
+    """
+    Build a subquery resolving the unit cost of every medicine.
+
+    The cost is ``Medicine.cost_price`` when set, otherwise the price paid on
+    the most recent purchase of that medicine, otherwise zero.
+
+    Returns:
+        Subquery: Columns 'medicine_id' and 'unit_cost'.
+    """
+    latest_purchase_price = select(PurchaseItem.price_per_unit).where(
+        PurchaseItem.medicine_id == Medicine.id
+    ).order_by(PurchaseItem.id.desc()).limit(1).correlate(Medicine).scalar_subquery()
+
+    return db.session.query(
+        Medicine.id.label('medicine_id'),
+        func.coalesce(Medicine.cost_price, latest_purchase_price, 0.0).label('unit_cost'),
+    ).subquery()
+
+
+def profit_and_loss(start_date, end_date):
+    """
+    Compute daily revenue, cost of goods sold, gross margin and GST.
+
+    Revenue comes from ``DailySales`` and cost of goods sold from the units
+    in ``DailyMedicineSales``, so the report reads one row per day and per
+    medicine sold that day whatever the number of sales. Units whose
+    medicine has neither a cost price nor any purchase history are costed
+    at zero.
+
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range.
+
+    Returns:
+        list: One dict per day with 'date', 'total_sales', 'discount_amount',
+              'net_sales', 'cogs', 'gross_profit', 'gross_margin_percent',
+              'gst_amount' and 'sale_count' keys.
+    """
+    costs = unit_costs()
+    daily_costs = dict(db.session.query(
+        DailyMedicineSales.day,
+        func.sum(DailyMedicineSales.units * costs.c.unit_cost),
+    ).join(
+        costs, costs.c.medicine_id == DailyMedicineSales.medicine_id
+    ).filter(
+        DailyMedicineSales.day.between(start_date, end_date),
+    ).group_by(DailyMedicineSales.day).all())
+
+    rows = db.session.query(
+        DailySales.day,
+        func.sum(DailySales.total_amount),
+        func.sum(DailySales.discount_amount),
+        func.sum(DailySales.gst_amount),
+        func.sum(DailySales.sale_count),
+    ).filter(
+        DailySales.day.between(start_date, end_date),
+    ).group_by(DailySales.day).all()
+
+    by_day = {
+        as_date(day): (total_sales or 0.0, discount_amount or 0.0, gst_amount or 0.0,
+                       daily_costs.get(day) or 0.0, int(sale_count or 0))
+        for day, total_sales, discount_amount, gst_amount, sale_count in rows
+    }
+    report_rows = []
+    day = start_date
+    while day <= end_date:
+        total_sales, discount_amount, gst_amount, cogs, sale_count = by_day.get(day, (0.0, 0.0, 0.0, 0.0, 0))
+        net_sales = float(total_sales) - float(discount_amount)
+        gross_profit = net_sales - float(cogs)
+        report_rows.append({
+            'date': day,
+            'total_sales': float(total_sales),
+            'discount_amount': float(discount_amount),
+            'net_sales': net_sales,
+            'cogs': float(cogs),
+            'gross_profit': gross_profit,
+            'gross_margin_percent': (gross_profit / net_sales) * 100 if net_sales else 0.0,
+            'gst_amount': float(gst_amount),
+            'sale_count': sale_count,
+        })
+        day += timedelta(days=1)
+
+    return report_rows
+
+
+def sales_breakdown(start_date, end_date):
+    """
+    Sales between two dates (inclusive) split by payment method and sale type.
+
+    Returns:
+        list: Dicts with 'payment_method', 'sale_type', 'sale_count',
+              'total_sales', 'gst_amount' and 'discount_amount' keys, largest
+              total first.
+    """
+    total = func.sum(DailySales.total_amount)
+    rows = db.session.query(
+        DailySales.payment_method,
+        DailySales.sale_type,
+        func.sum(DailySales.sale_count),
+        total,
+        func.sum(DailySales.gst_amount),
+        func.sum(DailySales.discount_amount),
+    ).filter(
+        DailySales.day.between(start_date, end_date),
+    ).group_by(DailySales.payment_method, DailySales.sale_type).order_by(total.desc()).all()
+    return [
+        {'payment_method': payment_method, 'sale_type': sale_type, 'sale_count': int(sale_count or 0),
+         'total_sales': float(total_sales or 0.0), 'gst_amount': float(gst_amount or 0.0),
+         'discount_amount': float(discount_amount or 0.0)}
+        for payment_method, sale_type, sale_count, total_sales, gst_amount, discount_amount in rows
+    ]
+
+
+def top_medicines(start_date, end_date, limit=10):
+    """
+    Best-selling medicines between two dates (inclusive), by revenue.
+
+    Returns:
+        list: Dicts with 'medicine_id', 'name', 'units' and 'revenue' keys.
+    """
+    revenue = func.sum(DailyMedicineSales.revenue)
+    rows = db.session.query(
+        Medicine.id,
+        Medicine.name,
+        func.sum(DailyMedicineSales.units),
+        revenue,
+    ).join(
+        Medicine, Medicine.id == DailyMedicineSales.medicine_id
+    ).filter(
+        DailyMedicineSales.day.between(start_date, end_date),
+    ).group_by(Medicine.id, Medicine.name).order_by(revenue.desc()).limit(limit).all()
+    return [
+        {'medicine_id': medicine_id, 'name': name, 'units': int(units or 0), 'revenue': float(revenue or 0.0)}
+        for medicine_id, name, units, revenue in rows
+    ]
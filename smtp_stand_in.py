@@ -0,0 +1,106 @@
+"""
+Local SMTP stand-in for Medical Management System.
+
+``SMTPStandIn`` speaks just enough SMTP, on a free port on 127.0.0.1, to
+accept messages from ``flask_mail`` without a real mail server. Chosen
+recipients can be refused for good (550 at ``RCPT TO``), refused for now
+(451 after ``DATA``) or have the connection dropped mid-message, so the
+outcomes handled by ``mail_queue`` can be produced on demand. It backs the
+mail tests (tests/test_mail_queue.py) and benchmarks/mail_outbox.py.
+"""
+
+import socketserver
+import threading
+import time
+
+# What the stand-in does with mail for a recipient listed in ``rules``
+REFUSE = 'refuse'  # 550 at RCPT TO: permanent
+DEFER = 'defer'  # 451 after DATA: temporary
+DROP = 'drop'  # close the connection after DATA
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough SMTP to accept, refuse or drop messages."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, delay=0.0, reject_every=0, rules=None):
+        """
+        Args:
+            delay (float): Seconds taken to accept each message.
+            reject_every (int): Answer every n-th message with 451 (0: never).
+            rules (dict): Maps recipient address to REFUSE, DEFER or DROP.
+        """
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.delay = delay
+        self.reject_every = reject_every
+        self.rules = dict(rules or {})
+        self.connections = 0
+        self.received = []
+        self.offered = 0
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """Serve from a daemon thread; returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 stand-in ESMTP')
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.upper()
+            if verb.startswith('EHLO'):
+                self.reply('250-stand-in')
+                self.reply('250 8BITMIME')
+            elif verb.startswith('QUIT'):
+                self.reply('221 bye')
+                return
+            elif verb.startswith('MAIL FROM'):
+                recipients = []
+                self.reply('250 ok')
+            elif verb.startswith('RCPT TO'):
+                address = command.split(':', 1)[1].strip().strip('<>')
+                if server.rules.get(address) == REFUSE:
+                    self.reply('550 no such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 ok')
+            elif verb.startswith('DATA'):
+                self.reply('354 go ahead')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                time.sleep(server.delay)
+                actions = {server.rules.get(address) for address in recipients}
+                if DROP in actions:
+                    return
+                with server.lock:
+                    server.offered += 1
+                    refuse = DEFER in actions or (server.reject_every and server.offered % server.reject_every == 0)
+                    if not refuse:
+                        server.received.extend(recipients)
+                self.reply('451 try again later' if refuse else '250 queued')
+            else:
+                self.reply('250 ok')
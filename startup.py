@@ -0,0 +1,92 @@
+"""
+Process startup for Medical Management System.
+
+Two kinds of startup work used to run whenever ``wsgi.py`` was imported,
+i.e. in every gunicorn worker and again on every worker recycle:
+
+- one-shot work: Alembic migrations and the default admin. ``prestart()``
+  runs it once per deployment, from ``flask prestart`` or gunicorn's
+  master (``gunicorn.conf.py``), under a lock so replicas starting together
+  take turns: a PostgreSQL advisory lock, or a file lock in the instance
+  folder for SQLite;
+- per-process work: the alert and mail background threads.
+  ``start_background_workers()`` runs it in each worker after the fork, so
+  it also works with ``--preload``, where the app is imported once in the
+  master and shared copy-on-write by the workers.
+"""
+
+import logging
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock key for the pre-start step (any constant unique to this app)
+PRESTART_LOCK_KEY = 72_410_913
+
+
+def init_migrations(app):
+    """Register Flask-Migrate on ``app``. It imports Alembic, so only callers that migrate do this."""
+    from flask_migrate import Migrate
+
+    if 'migrate' not in app.extensions:
+        Migrate(app, db)
+
+
+@contextmanager
+def prestart_lock(app):
+    """Hold a lock shared by every process pointed at this database."""
+    if db.engine.url.get_backend_name() == 'postgresql':
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': PRESTART_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': PRESTART_LOCK_KEY})
+        return
+
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on Windows; a single dev server does not need one
+        yield
+        return
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'prestart.lock'), 'w') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def prestart(app, migrate=True):
+    """Apply migrations and ensure the default admin exists, once, under the pre-start lock."""
+    from app import create_default_admin
+
+    with app.app_context():
+        with prestart_lock(app):
+            if migrate:
+                from flask_migrate import upgrade
+
+                init_migrations(app)
+                upgrade(directory=os.path.join(os.path.dirname(__file__), 'migrations'))
+                logger.info('Migrations applied')
+            # Create default admin (does NOT create tables; assumes migrations applied)
+            create_default_admin()
+
+
+def start_background_workers(app):
+    """Start this process's alert refresher and mail sender, if configured."""
+    threads = []
+    if app.config.get('ALERT_REFRESH_INTERVAL_SECONDS'):
+        from alert_engine import start_alert_scheduler
+        threads.append(start_alert_scheduler(app, app.config['ALERT_REFRESH_INTERVAL_SECONDS']))
+    if app.config.get('MAIL_QUEUE_POLL_SECONDS'):
+        from mail_queue import start_mail_worker
+        threads.append(start_mail_worker(app, app.config['MAIL_QUEUE_POLL_SECONDS']))
+    return threads
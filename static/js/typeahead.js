@@ -0,0 +1,74 @@
+/*
+ * Autocomplete inputs backed by the /api/search endpoints.
+ *
+ * Markup comes from templates/partials/typeahead.html: a visible text input
+ * with data-typeahead-url, a hidden input holding the selected id and a
+ * dropdown menu. Listeners are delegated from the document, so rows added
+ * to a form later work without extra setup. Selecting a result fires a
+ * bubbling "typeahead:select" event whose detail is the result object.
+ */
+(function () {
+    const DEBOUNCE_MS = 150;
+    const timers = new WeakMap();
+
+    function menuFor(input) {
+        return input.parentElement.querySelector('.typeahead-menu');
+    }
+
+    function hiddenFor(input) {
+        return input.parentElement.querySelector('input[type="hidden"]');
+    }
+
+    function select(input, result) {
+        input.value = result.label;
+        hiddenFor(input).value = result.id;
+        menuFor(input).classList.remove('show');
+        input.dispatchEvent(new CustomEvent('typeahead:select', { bubbles: true, detail: result }));
+    }
+
+    function render(input, results) {
+        const menu = menuFor(input);
+        menu.innerHTML = '';
+        results.forEach((result) => {
+            const item = document.createElement('button');
+            item.type = 'button';
+            item.className = 'dropdown-item';
+            item.textContent = result.label;
+            // mousedown fires before the input loses focus and hides the menu
+            item.addEventListener('mousedown', (event) => {
+                event.preventDefault();
+                select(input, result);
+            });
+            menu.appendChild(item);
+        });
+        menu.classList.toggle('show', results.length > 0);
+    }
+
+    async function lookup(input) {
+        const term = input.value.trim();
+        if (!term) {
+            render(input, []);
+            return;
+        }
+        const url = new URL(input.dataset.typeaheadUrl, window.location.origin);
+        url.searchParams.set('q', term);
+        const response = await fetch(url, { headers: { Accept: 'application/json' } });
+        // Ignore failures and answers to a term the user has since changed
+        if (!response.ok || input.value.trim() !== term) return;
+        render(input, (await response.json()).results);
+    }
+
+    document.addEventListener('input', (event) => {
+        const input = event.target;
+        if (!input.matches('.typeahead-input')) return;
+        hiddenFor(input).value = '';
+        clearTimeout(timers.get(input));
+        timers.set(input, setTimeout(() => lookup(input), DEBOUNCE_MS));
+    });
+
+    document.addEventListener('focusout', (event) => {
+        if (event.target.matches('.typeahead-input')) {
+            menuFor(event.target).classList.remove('show');
+        }
+    });
+})();
@@ -0,0 +1,642 @@
+"""
+Race-free stock movements for Medical Management System.
+
+Reading ``medicine.quantity``, checking it in Python and writing back
+``quantity - n`` loses updates when two workers sell the same medicine at
+once: both read the same quantity and both succeed. ``decrement_stock``
+instead issues one conditional statement for the whole basket::
+
+    UPDATE medicines
+       SET quantity = quantity - CASE id WHEN :a THEN :qa ... END
+     WHERE id IN (:a, ...) AND quantity >= CASE id WHEN :a THEN :qa ... END
+
+The database takes the row locks and re-checks ``quantity >= n`` against
+the committed value (PostgreSQL re-evaluates the WHERE clause after waiting
+on a locked row; SQLite serialises writers), so stock can never go negative
+and concurrent decrements never overwrite each other. If any line is short
+nothing is decremented and the caller rolls back.
+
+Incoming stock goes through ``increment_stock`` so that a purchase order
+of any size is a single statement too, and ``load_medicines`` fetches
+every medicine a basket refers to with one ``IN`` query.
+
+Stock is also held per lot in ``MedicineBatch``, with ``Medicine.quantity``
+as the total. ``receive_stock`` books purchases into their lots and
+``allocate_stock`` takes sales first-expiry-first-out: one windowed query
+over ``(medicine_id, expiry_date)`` picks the lots for the whole basket::
+
+    SELECT id, ..., least(quantity, requested - before) AS take
+      FROM (SELECT ..., sum(quantity) OVER (PARTITION BY medicine_id
+                                            ORDER BY expiry_date, id) - quantity AS before
+              FROM medicine_batches
+             WHERE medicine_id IN (...) AND quantity > 0 AND expiry_date >= :today)
+     WHERE before < requested
+
+and one conditional ``UPDATE`` takes the units from those lots. The
+medicine totals are decremented first, which row-locks the medicines and
+so serialises concurrent allocations of the same medicine.
+
+Every lot-level change (``receive_stock``, ``allocate_stock``,
+``remove_stock``, ``adjust_stock``) is also appended to the ``StockMovement`` journal with
+its reason and source document, in one ``executemany`` per call. Nightly
+``InventorySnapshot`` rows hold each medicine's balance at the end of a
+day, so ``stock_on`` answers "stock on date X" from the latest snapshot
+before X plus the movements since, in one query::
+
+    SELECT medicines.id, coalesce(snapshot.quantity, 0) + coalesce(moved.quantity, 0)
+      FROM medicines
+      LEFT JOIN inventory_snapshots AS snapshot ON ... AND snapshot_date = (latest)
+      LEFT JOIN (SELECT medicine_id, sum(quantity) AS quantity FROM stock_movements
+                  WHERE created_at >= (latest) + 1 day AND created_at < :end_of_day
+                  GROUP BY medicine_id) AS moved ON ...
+
+where ``latest`` is ``SELECT max(snapshot_date) FROM inventory_snapshots
+WHERE snapshot_date <= :on_date``.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import case, func, insert, select, tuple_, update
+
+from models import db, InventorySnapshot, Medicine, MedicineBatch, StockMovement
+
+
+class InsufficientStock(Exception):
+    """Raised when one or more medicines do not have enough stock for a sale."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        names = ', '.join(shortage['name'] for shortage in shortages)
+        super().__init__(f'Not enough stock for {names}.')
+
+
+def _merge(quantities):
+    """Collapse (medicine_id, quantity) pairs into a dict of positive totals."""
+    totals = {}
+    for medicine_id, quantity in quantities:
+        if quantity <= 0:
+            raise ValueError(f'Stock movement quantity must be positive, got {quantity}')
+        totals[medicine_id] = totals.get(medicine_id, 0) + quantity
+    return totals
+
+
+def load_medicines(medicine_ids):
+    """
+    Load the medicines referenced by a basket in one query.
+
+    Returns:
+        dict: Maps medicine id to ``Medicine``; unknown ids are absent.
+    """
+    medicine_ids = set(medicine_ids)
+    if not medicine_ids:
+        return {}
+    return {medicine.id: medicine for medicine in Medicine.query.filter(Medicine.id.in_(medicine_ids))}
+
+
+def _expire_quantities(medicine_ids):
+    """Expire ``quantity`` on loaded Medicine instances after a bulk update."""
+    for instance in list(db.session.identity_map.values()):
+        if isinstance(instance, Medicine) and instance.id in medicine_ids:
+            db.session.expire(instance, ['quantity'])
+
+
+def increment_stock(quantities):
+    """
+    Add received stock for every line of a purchase in one statement.
+
+    Args:
+        quantities (iterable): (medicine_id, quantity) pairs; the same
+                               medicine may appear on several lines.
+    """
+    totals = _merge(quantities)
+    if not totals:
+        return
+
+    received = case(totals, value=Medicine.id)
+    db.session.execute(
+        update(Medicine)
+        .where(Medicine.id.in_(totals))
+        .values(quantity=Medicine.quantity + received)
+        .execution_options(synchronize_session=False)
+    )
+    _expire_quantities(totals)
+
+
+def decrement_stock(quantities):
+    """
+    Atomically take stock for every line of a sale in one statement.
+
+    Must be called inside the transaction that records the sale, before it
+    is committed. On failure the session's transaction is rolled back, so
+    neither the stock nor anything else flushed in it is kept.
+
+    Args:
+        quantities (iterable): (medicine_id, quantity) pairs; the same
+                               medicine may appear on several lines.
+
+    Raises:
+        InsufficientStock: If any medicine is missing or short; its
+                           ``shortages`` lists the offending lines.
+    """
+    totals = _merge(quantities)
+    if not totals:
+        return
+
+    requested = case(totals, value=Medicine.id)
+    result = db.session.execute(
+        update(Medicine)
+        .where(Medicine.id.in_(totals), Medicine.quantity >= requested)
+        .values(quantity=Medicine.quantity - requested)
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount != len(totals):
+        # Undo the rows that were decremented before reporting the shortfall
+        db.session.rollback()
+        raise InsufficientStock(_shortages(totals))
+
+    _expire_quantities(totals)
+
+
+def _shortages(totals):
+    stock = {
+        medicine_id: (name, quantity)
+        for medicine_id, name, quantity in db.session.query(
+            Medicine.id, Medicine.name, Medicine.quantity
+        ).filter(Medicine.id.in_(totals))
+    }
+    shortages = []
+    for medicine_id, requested in totals.items():
+        name, available = stock.get(medicine_id, (f'medicine #{medicine_id}', 0))
+        if available < requested:
+            shortages.append({
+                'medicine_id': medicine_id,
+                'name': name,
+                'requested': requested,
+                'available': available,
+            })
+    return shortages
+
+
+def receive_stock(lines, reason='purchase', source=None):
+    """
+    Book received stock into its lots and the medicine totals.
+
+    A lot is identified by (medicine, batch number); receiving more of an
+    existing lot adds to it, otherwise a new lot is created.
+
+    Args:
+        lines (list): dicts with 'medicine_id', 'batch_number',
+                      'expiry_date', 'quantity' and optionally 'cost_price'
+                      and 'source' (overrides ``source`` for that line).
+        reason (str): Recorded on the stock movements.
+        source (tuple): (source_type, source_id) recorded on the stock
+                        movements, e.g. ``('purchase', purchase.id)``.
+
+    Returns:
+        list: The id of the batch each line was booked into, in order.
+    """
+    if not lines:
+        return []
+    received = {}
+    for line in lines:
+        key = (line['medicine_id'], line['batch_number'])
+        received[key] = received.get(key, 0) + line['quantity']
+
+    existing = _batch_ids(received)
+    updates = {existing[key]: quantity for key, quantity in received.items() if key in existing}
+    if updates:
+        db.session.execute(
+            update(MedicineBatch)
+            .where(MedicineBatch.id.in_(updates))
+            .values(quantity=MedicineBatch.quantity + case(updates, value=MedicineBatch.id))
+            .execution_options(synchronize_session=False)
+        )
+
+    new_lots = {}
+    for line in lines:
+        key = (line['medicine_id'], line['batch_number'])
+        if key not in existing and key not in new_lots:
+            new_lots[key] = {
+                'medicine_id': line['medicine_id'],
+                'batch_number': line['batch_number'],
+                'expiry_date': line['expiry_date'],
+                'quantity': received[key],
+                'cost_price': line.get('cost_price'),
+            }
+    if new_lots:
+        db.session.execute(insert(MedicineBatch), list(new_lots.values()))
+        existing.update(_batch_ids(new_lots))
+
+    increment_stock((line['medicine_id'], line['quantity']) for line in lines)
+    _expire_batches(updates)
+    batch_ids = [existing[(line['medicine_id'], line['batch_number'])] for line in lines]
+    record_movements(
+        ((line['medicine_id'], batch_id, line['quantity'], line.get('source', source))
+         for line, batch_id in zip(lines, batch_ids)),
+        reason, source,
+    )
+    return batch_ids
+
+
+def _batch_ids(keys):
+    return {
+        (medicine_id, batch_number): batch_id
+        for batch_id, medicine_id, batch_number in db.session.query(
+            MedicineBatch.id, MedicineBatch.medicine_id, MedicineBatch.batch_number
+        ).filter(tuple_(MedicineBatch.medicine_id, MedicineBatch.batch_number).in_(list(keys)))
+    }
+
+
+def lot_expiry_dates(keys):
+    """{(medicine_id, batch_number): expiry date} for the lots among ``keys`` that exist."""
+    if not keys:
+        return {}
+    return {
+        (medicine_id, batch_number): expiry_date
+        for medicine_id, batch_number, expiry_date in db.session.query(
+            MedicineBatch.medicine_id, MedicineBatch.batch_number, MedicineBatch.expiry_date,
+        ).filter(tuple_(MedicineBatch.medicine_id, MedicineBatch.batch_number).in_(list(keys)))
+    }
+
+
+def _expire_batches(batch_ids):
+    """Expire ``quantity`` on loaded MedicineBatch instances after a bulk update."""
+    for instance in list(db.session.identity_map.values()):
+        if isinstance(instance, MedicineBatch) and instance.id in batch_ids:
+            db.session.expire(instance, ['quantity'])
+
+
+def _fefo_lots(totals, on_date):
+    """The lots that cover ``totals`` first-expiry-first-out, with how much to take from each."""
+    requested = case(totals, value=MedicineBatch.medicine_id)
+    running = func.sum(MedicineBatch.quantity).over(
+        partition_by=MedicineBatch.medicine_id,
+        order_by=(MedicineBatch.expiry_date, MedicineBatch.id),
+    )
+    lots = select(
+        MedicineBatch.id,
+        MedicineBatch.medicine_id,
+        MedicineBatch.batch_number,
+        MedicineBatch.expiry_date,
+        MedicineBatch.quantity,
+        (running - MedicineBatch.quantity).label('before'),
+        requested.label('requested'),
+    ).where(
+        MedicineBatch.medicine_id.in_(totals),
+        MedicineBatch.quantity > 0,
+        MedicineBatch.expiry_date >= on_date,
+    ).subquery()
+
+    remaining = lots.c.requested - lots.c.before
+    take = case((lots.c.quantity < remaining, lots.c.quantity), else_=remaining)
+    return db.session.execute(
+        select(lots.c.id, lots.c.medicine_id, lots.c.batch_number, lots.c.expiry_date, take.label('take'))
+        .where(lots.c.before < lots.c.requested)
+        .order_by(lots.c.medicine_id, lots.c.expiry_date, lots.c.id)
+    ).all()
+
+
+def allocate_stock(quantities, on_date=None, reason='sale', source=None):
+    """
+    Take stock for a sale from the earliest-expiring unexpired lots.
+
+    Decrements the medicine totals and the chosen lots inside the current
+    transaction; on failure the transaction is rolled back.
+
+    Args:
+        quantities (iterable): (medicine_id, quantity) pairs; the same
+                               medicine may appear on several lines.
+        on_date (date): Lots expiring before this day are not sold
+                        (default: today).
+        reason (str): Recorded on the stock movements.
+        source (tuple): (source_type, source_id) recorded on the stock
+                        movements, e.g. ``('sale', sale.id)``.
+
+    Returns:
+        dict: Maps medicine id to its lots in FEFO order, each a dict with
+              'batch_id', 'batch_number', 'expiry_date' and 'quantity'.
+
+    Raises:
+        InsufficientStock: If any medicine is short of unexpired stock.
+    """
+    totals = _merge(quantities)
+    if not totals:
+        return {}
+    decrement_stock(totals.items())
+
+    allocations = {medicine_id: [] for medicine_id in totals}
+    for batch_id, medicine_id, batch_number, expiry_date, take in _fefo_lots(totals, on_date or date.today()):
+        allocations[medicine_id].append({
+            'batch_id': batch_id,
+            'batch_number': batch_number,
+            'expiry_date': expiry_date,
+            'quantity': take,
+        })
+
+    allocated = {medicine_id: sum(lot['quantity'] for lot in lots) for medicine_id, lots in allocations.items()}
+    short = {medicine_id: allocated[medicine_id] for medicine_id, requested in totals.items()
+             if allocated[medicine_id] < requested}
+    if short:
+        db.session.rollback()
+        raise InsufficientStock(_lot_shortages(totals, short))
+
+    _take_from_batches({lot['batch_id']: lot['quantity'] for lots in allocations.values() for lot in lots})
+    record_movements(
+        ((medicine_id, lot['batch_id'], -lot['quantity']) for medicine_id, lots in allocations.items() for lot in lots),
+        reason, source,
+    )
+    return allocations
+
+
+def take_lots(allocations, medicine_id, quantity):
+    """
+    Split one sale line over the lots ``allocate_stock`` chose for its medicine.
+
+    Consumes the allocation, so lines sharing a medicine get successive lots.
+
+    Returns:
+        list: (lot, quantity) pairs covering ``quantity``.
+    """
+    lots = allocations[medicine_id]
+    parts = []
+    while quantity > 0:
+        lot = lots[0]
+        used = min(quantity, lot['quantity'])
+        parts.append((lot, used))
+        quantity -= used
+        if used == lot['quantity']:
+            lots.pop(0)
+        else:
+            lots[0] = dict(lot, quantity=lot['quantity'] - used)
+    return parts
+
+
+def remove_stock(lines, reason='purchase_deleted', source=None):
+    """
+    Take stock back out of specific lots, e.g. when a purchase is deleted.
+
+    Args:
+        lines (iterable): (medicine_id, batch_id, quantity) triples.
+        reason (str): Recorded on the stock movements.
+        source (tuple): (source_type, source_id) recorded on the stock movements.
+
+    Raises:
+        InsufficientStock: If a lot no longer holds the units (they were sold).
+    """
+    lines = list(lines)
+    totals = _merge((medicine_id, quantity) for medicine_id, _, quantity in lines)
+    if not totals:
+        return
+    decrement_stock(totals.items())
+    taken = _merge((batch_id, quantity) for _, batch_id, quantity in lines)
+    _take_from_batches(taken)
+    record_movements(((medicine_id, batch_id, -quantity) for medicine_id, batch_id, quantity in lines), reason, source)
+
+
+def adjust_stock(medicine_id, batch_number, expiry_date, quantity, source=None):
+    """
+    Correct a medicine's stock to a counted total through one of its lots.
+
+    The medicine row is locked and its committed quantity read in the same
+    statement, so a sale committed while the correction was being entered
+    is counted rather than overwritten. The difference is then received
+    into, or removed from, the lot with ``receive_stock``/``remove_stock``.
+
+    Args:
+        medicine_id (int): Medicine to correct.
+        batch_number (str): Lot that absorbs the difference; created if
+                            stock is added to a lot that does not exist.
+        expiry_date (date): Expiry of a newly created lot.
+        quantity (int): The medicine's correct total stock.
+        source (tuple): (source_type, source_id) recorded on the stock movement.
+
+    Returns:
+        int: The adjustment booked; negative if stock was removed.
+
+    Raises:
+        InsufficientStock: If the lot holds fewer units than must be removed.
+    """
+    # Setting quantity to itself takes the row lock and returns the committed value
+    current = db.session.execute(
+        update(Medicine)
+        .where(Medicine.id == medicine_id)
+        .values(quantity=Medicine.quantity)
+        .returning(Medicine.quantity)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    adjustment = quantity - current
+    if adjustment > 0:
+        receive_stock([{
+            'medicine_id': medicine_id,
+            'batch_number': batch_number,
+            'expiry_date': expiry_date,
+            'quantity': adjustment,
+        }], 'adjustment', source)
+    elif adjustment < 0:
+        batch_id = _batch_ids([(medicine_id, batch_number)]).get((medicine_id, batch_number))
+        if batch_id is None:
+            name = db.session.query(Medicine.name).filter(Medicine.id == medicine_id).scalar()
+            db.session.rollback()
+            raise InsufficientStock([{
+                'medicine_id': medicine_id,
+                'name': f'{name} (batch {batch_number})',
+                'requested': -adjustment,
+                'available': 0,
+            }])
+        remove_stock([(medicine_id, batch_id, -adjustment)], 'adjustment', source)
+    return adjustment
+
+
+def _take_from_batches(taken):
+    requested = case(taken, value=MedicineBatch.id)
+    result = db.session.execute(
+        update(MedicineBatch)
+        .where(MedicineBatch.id.in_(taken), MedicineBatch.quantity >= requested)
+        .values(quantity=MedicineBatch.quantity - requested)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != len(taken):
+        db.session.rollback()
+        raise InsufficientStock(_batch_shortages(taken))
+    _expire_batches(taken)
+
+
+def _batch_shortages(taken):
+    lots = db.session.query(MedicineBatch.id, MedicineBatch.medicine_id, Medicine.name,
+                            MedicineBatch.batch_number, MedicineBatch.quantity)\
+                     .join(Medicine, Medicine.id == MedicineBatch.medicine_id)\
+                     .filter(MedicineBatch.id.in_(taken)).all()
+    return [{
+        'medicine_id': medicine_id,
+        'name': f'{name} (batch {batch_number})',
+        'requested': taken[batch_id],
+        'available': available,
+    } for batch_id, medicine_id, name, batch_number, available in lots if available < taken[batch_id]]
+
+
+def _lot_shortages(totals, allocated):
+    names = dict(db.session.query(Medicine.id, Medicine.name).filter(Medicine.id.in_(allocated)))
+    return [{
+        'medicine_id': medicine_id,
+        'name': names.get(medicine_id, f'medicine #{medicine_id}'),
+        'requested': totals[medicine_id],
+        'available': available,
+    } for medicine_id, available in allocated.items()]
+
+
+def backfill_batches():
+    """
+    Give every medicine without lots a default lot holding its whole quantity.
+
+    For databases created before stock was kept per lot.
+
+    Returns:
+        int: Number of lots created.
+    """
+    without_lots = select(
+        Medicine.id, Medicine.batch_number, Medicine.expiry_date, Medicine.quantity, Medicine.cost_price,
+    ).where(~select(MedicineBatch.id).where(MedicineBatch.medicine_id == Medicine.id).exists())
+    result = db.session.execute(
+        insert(MedicineBatch).from_select(
+            ['medicine_id', 'batch_number', 'expiry_date', 'quantity', 'cost_price'], without_lots
+        )
+    )
+    return result.rowcount
+
+
+def expired_lots(today):
+    """(name, batch_number, expiry_date, quantity) rows for expired lots that still hold stock."""
+    return db.session.query(
+        Medicine.name, MedicineBatch.batch_number, MedicineBatch.expiry_date, MedicineBatch.quantity,
+    ).join(MedicineBatch, MedicineBatch.medicine_id == Medicine.id).filter(
+        MedicineBatch.expiry_date < today, MedicineBatch.quantity > 0,
+    ).order_by(MedicineBatch.expiry_date, Medicine.name).all()
+
+
+def record_movements(lines, reason, source=None):
+    """
+    Append stock movements to the ledger in one batch.
+
+    ``receive_stock``, ``allocate_stock`` and ``remove_stock`` call this
+    themselves; call it directly only for stock changed outside them, such
+    as the opening stock of a new medicine.
+
+    Args:
+        lines (iterable): (medicine_id, batch_id, quantity) triples, with a
+                          negative quantity for stock taken out; a fourth
+                          element overrides ``source`` for that line.
+        reason (str): Why the stock moved, e.g. 'sale' or 'adjustment'.
+        source (tuple): (source_type, source_id) of the document behind the
+                        movement, e.g. ``('sale', 42)``.
+    """
+    created_at = datetime.utcnow()
+    rows = []
+    for medicine_id, batch_id, quantity, *line_source in lines:
+        if not quantity:
+            continue
+        source_type, source_id = (line_source[0] if line_source else source) or (None, None)
+        rows.append({
+            'medicine_id': medicine_id,
+            'batch_id': batch_id,
+            'quantity': quantity,
+            'reason': reason,
+            'source_type': source_type,
+            'source_id': source_id,
+            'created_at': created_at,
+        })
+    if rows:
+        db.session.execute(insert(StockMovement), rows)
+
+
+def _end_of_day(day):
+    return datetime.combine(day + timedelta(days=1), time.min)
+
+
+def _day_after(day):
+    """SQL for midnight at the end of the date expression ``day``."""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        # SQLite keeps dates and datetimes as ISO strings, which compare in order
+        return func.date(day, '+1 day')
+    return day + timedelta(days=1)
+
+
+def stock_balances(on_date=None):
+    """
+    Build a subquery of every medicine's stock at the end of ``on_date``.
+
+    The balance is the latest inventory snapshot taken on or before that
+    day plus the movements recorded after it; the latest snapshot date is
+    a scalar subquery, so the whole balance is one statement. Days are
+    UTC, like ``StockMovement.created_at``.
+
+    Args:
+        on_date (date): Day whose closing stock to compute; defaults to now.
+
+    Returns:
+        Subquery: Columns 'medicine_id' and 'quantity'.
+    """
+    latest = select(func.max(InventorySnapshot.snapshot_date))
+    if on_date is not None:
+        latest = latest.where(InventorySnapshot.snapshot_date <= on_date)
+    snapshot_date = latest.scalar_subquery()
+
+    # Without a snapshot every movement counts
+    window = [StockMovement.created_at >= func.coalesce(_day_after(snapshot_date), datetime.min)]
+    if on_date is not None:
+        window.append(StockMovement.created_at < _end_of_day(on_date))
+    moved = select(
+        StockMovement.medicine_id,
+        func.sum(StockMovement.quantity).label('quantity'),
+    ).where(*window).group_by(StockMovement.medicine_id).subquery()
+    snapshot = select(
+        InventorySnapshot.medicine_id,
+        InventorySnapshot.quantity,
+    ).where(InventorySnapshot.snapshot_date == snapshot_date).subquery()
+
+    return select(
+        Medicine.id.label('medicine_id'),
+        (func.coalesce(snapshot.c.quantity, 0) + func.coalesce(moved.c.quantity, 0)).label('quantity'),
+    ).outerjoin(
+        snapshot, snapshot.c.medicine_id == Medicine.id
+    ).outerjoin(
+        moved, moved.c.medicine_id == Medicine.id
+    ).subquery()
+
+
+def stock_on(on_date, medicine_ids=None):
+    """
+    Stock of each medicine at the end of ``on_date``, from the ledger.
+
+    Args:
+        on_date (date): Day whose closing stock to return.
+        medicine_ids (iterable): Restrict to these medicines (default: all).
+
+    Returns:
+        dict: Maps medicine id to its quantity.
+    """
+    balances = stock_balances(on_date)
+    query = db.session.query(balances.c.medicine_id, balances.c.quantity)
+    if medicine_ids is not None:
+        query = query.filter(balances.c.medicine_id.in_(set(medicine_ids)))
+    return {medicine_id: int(quantity) for medicine_id, quantity in query}
+
+
+def stock_discrepancies():
+    """
+    Medicines whose ``quantity`` differs from their ledger balance.
+
+    Returns:
+        list: Dicts with 'medicine_id', 'name', 'quantity' and
+              'ledger_quantity' keys.
+    """
+    balances = stock_balances()
+    rows = db.session.query(
+        Medicine.id, Medicine.name, Medicine.quantity, balances.c.quantity,
+    ).join(
+        balances, balances.c.medicine_id == Medicine.id
+    ).filter(Medicine.quantity != balances.c.quantity).order_by(Medicine.name).all()
+    return [
+        {'medicine_id': medicine_id, 'name': name, 'quantity': quantity, 'ledger_quantity': int(ledger_quantity)}
+        for medicine_id, name, quantity, ledger_quantity in rows
+    ]
@@ -0,0 +1,244 @@
+"""
+Dashboard summary cache for Medical Management System.
+
+The dashboards show counts and aggregates that change far less often than
+they are viewed. ``cached()`` stores those summaries in a small cache and
+recomputes them only when the data behind them changes or a TTL expires.
+
+Each summary depends on one or more *topics* ('inventory', 'sales',
+'equipment', 'people'). Topics carry a version number that is part of the
+cache key. SQLAlchemy session events record which topics a flush touched
+and bump their versions once the transaction commits, so the next read
+misses and recomputes; rolled back changes invalidate nothing.
+
+Two backends are available:
+
+- an in-process TTL LRU (default). Versions are per process, so other
+  workers see a change once their entry's TTL expires;
+- Redis, when ``SUMMARY_CACHE_URL`` is set and the ``redis`` package is
+  installed. Versions live in Redis, so invalidation reaches every worker
+  immediately. If Redis cannot be reached, reads count as misses and
+  writes are dropped, so pages are computed uncached rather than failing.
+"""
+
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import event
+
+from models import (
+    db, Customer, InventoryAlert, MedicalEquipment, Medicine, MedicineBatch, Patient, Purchase, PurchaseItem, Sale,
+    SaleItem,
+)
+
+logger = logging.getLogger(__name__)
+
+# Which summary topics a change to each model invalidates
+MODEL_TOPICS = {
+    Medicine: ('inventory',),
+    MedicineBatch: ('inventory',),
+    InventoryAlert: ('inventory',),
+    Purchase: ('inventory',),
+    PurchaseItem: ('inventory',),
+    Sale: ('sales',),
+    SaleItem: ('sales', 'inventory'),
+    MedicalEquipment: ('equipment',),
+    Customer: ('people',),
+    Patient: ('people',),
+}
+
+_PENDING_KEY = 'summary_cache_topics'
+
+
+class MemoryCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, ttl=60, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, topics):
+        with self._lock:
+            return [self._versions.get(topic, 0) for topic in topics]
+
+    def bump(self, topics):
+        with self._lock:
+            for topic in topics:
+                self._versions[topic] = self._versions.get(topic, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """Redis-backed cache sharing entries and topic versions between processes."""
+
+    prefix = 'medical:summary:'
+
+    def __init__(self, client, ttl=60):
+        from redis import RedisError
+
+        self.client = client
+        self.ttl = ttl
+        self.errors = RedisError
+
+    def get(self, key):
+        try:
+            payload = self.client.get(self.prefix + key)
+        except self.errors as e:
+            logger.warning('Summary cache read failed, computing uncached: %s', e)
+            return None
+        return pickle.loads(payload) if payload is not None else None
+
+    def set(self, key, value):
+        try:
+            self.client.set(self.prefix + key, pickle.dumps(value), ex=self.ttl)
+        except self.errors as e:
+            logger.warning('Summary cache write failed: %s', e)
+
+    def versions(self, topics):
+        """Topic versions, or None when Redis is unreachable (the caller then skips the cache)."""
+        try:
+            values = self.client.mget([f'{self.prefix}version:{topic}' for topic in topics])
+        except self.errors as e:
+            logger.warning('Summary cache read failed, computing uncached: %s', e)
+            return None
+        return [int(value or 0) for value in values]
+
+    def bump(self, topics):
+        try:
+            pipeline = self.client.pipeline()
+            for topic in topics:
+                pipeline.incr(f'{self.prefix}version:{topic}')
+            pipeline.execute()
+        except self.errors as e:
+            # Entries of these topics now live until their TTL runs out
+            logger.error('Summary cache invalidation of %s failed: %s', ', '.join(topics), e)
+
+    def clear(self):
+        try:
+            for key in self.client.scan_iter(self.prefix + '*'):
+                self.client.delete(key)
+        except self.errors as e:
+            logger.warning('Summary cache clear failed: %s', e)
+
+
+def create_backend(app):
+    """Build the cache backend described by ``app``'s config."""
+    config = app.config
+    ttl = config.get('SUMMARY_CACHE_TTL', 60)
+    url = config.get('SUMMARY_CACHE_URL')
+    if url:
+        try:
+            import redis
+        except ImportError:
+            app.logger.warning('redis package not available; using the in-process summary cache.')
+        else:
+            timeout = config.get('SUMMARY_CACHE_TIMEOUT', 0.5)
+            return RedisCache(redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout),
+                              ttl=ttl)
+    return MemoryCache(ttl=ttl, max_entries=config.get('SUMMARY_CACHE_MAX_ENTRIES', 256))
+
+
+def _topics_for(objects):
+    topics = set()
+    for obj in objects:
+        topics.update(MODEL_TOPICS.get(type(obj), ()))
+    return topics
+
+
+def _record_flush(session, flush_context):
+    topics = _topics_for(session.new) | _topics_for(session.dirty) | _topics_for(session.deleted)
+    if topics:
+        session.info.setdefault(_PENDING_KEY, set()).update(topics)
+
+
+def _record_bulk_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        topics = MODEL_TOPICS.get(mapper.class_, ()) if mapper is not None else ()
+        if topics:
+            orm_execute_state.session.info.setdefault(_PENDING_KEY, set()).update(topics)
+
+
+def _apply_after_commit(session):
+    topics = session.info.pop(_PENDING_KEY, None)
+    if topics:
+        invalidate(*topics)
+
+
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app):
+    """Create the cache backend for ``app`` and hook invalidation into the session."""
+    app.extensions['summary_cache'] = create_backend(app)
+    if not event.contains(db.session, 'after_flush', _record_flush):
+        event.listen(db.session, 'after_flush', _record_flush)
+        event.listen(db.session, 'do_orm_execute', _record_bulk_statement)
+        event.listen(db.session, 'after_commit', _apply_after_commit)
+        event.listen(db.session, 'after_rollback', _discard_after_rollback)
+
+
+def invalidate(*topics):
+    """Invalidate every summary depending on any of ``topics``."""
+    backend = current_app.extensions.get('summary_cache')
+    if backend is not None:
+        backend.bump(topics)
+
+
+def cached(name, topics, compute):
+    """
+    Return the cached summary ``name``, computing and storing it on a miss.
+
+    Args:
+        name (str): Cache key; include any parameters the summary depends on.
+        topics (tuple): Topics whose changes invalidate this summary.
+        compute (callable): Builds the summary. The result must be picklable
+                            plain data (no ORM instances).
+
+    Returns:
+        The cached or freshly computed summary.
+    """
+    backend = current_app.extensions.get('summary_cache')
+    if backend is None:
+        return compute()
+
+    versions = backend.versions(topics)
+    if versions is None:
+        return compute()
+    versions = '.'.join(str(version) for version in versions)
+    key = f'{name}@{versions}'
+    value = backend.get(key)
+    if value is None:
+        value = compute()
+        backend.set(key, value)
+    return value
@@ -0,0 +1,72 @@
+"""
+Shared fixtures: an application on a fresh SQLite database per test.
+
+``app`` uses the testing configuration (in-memory SQLite, CSRF off).
+Tests push an app context themselves where they query directly, so that
+client requests still get a context, and a session, of their own.
+``file_app`` points at a SQLite file instead, for tests that use several
+connections at once, and ``make_app`` builds apps with other settings.
+``client`` is a test client logged in as the default admin, and ``smtp``
+a local SMTP stand-in (``smtp_stand_in``) for tests that send mail.
+"""
+
+import os
+
+os.environ['FLASK_ENV'] = 'testing'
+# config.py needs a DATABASE_URL to import; the tests use their own databases
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+import pytest
+
+from app import create_app, create_default_admin
+from deploy_profile import engine_options
+from models import db
+from smtp_stand_in import SMTPStandIn
+
+
+@pytest.fixture
+def make_app():
+    """Factory for apps with extra settings; their tables are dropped after the test."""
+    apps = []
+
+    def make(test_config=None):
+        app = create_app('testing', test_config=test_config)
+        with app.app_context():
+            db.create_all()
+            create_default_admin()
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def file_app(make_app, tmp_path):
+    uri = f'sqlite:///{tmp_path / "test.db"}'
+    return make_app({'SQLALCHEMY_DATABASE_URI': uri, 'SQLALCHEMY_ENGINE_OPTIONS': engine_options(uri)})
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'Admin', 'password': 'Admin@13'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def smtp():
+    """An SMTP server on 127.0.0.1; set ``smtp.rules`` to refuse, defer or drop recipients."""
+    server = SMTPStandIn().start()
+    yield server
+    server.stop()
@@ -0,0 +1,66 @@
+"""Stock alerts and the stock status on the inventory pages share one threshold."""
+
+from datetime import date, timedelta
+
+from alert_engine import refresh_alerts
+from models import db, Customer, InventoryAlert, Medicine, MedicineBatch
+
+
+def add_medicines():
+    expiry = date.today() + timedelta(days=365)
+    for name, quantity in (('Plenty', 50), ('Low', 8), ('Critical', 3), ('Empty', 0)):
+        medicine = Medicine(name=name, batch_number=name[0], category='General', quantity=quantity,
+                            expiry_date=expiry, price=10.0, gst_percent=12.0,
+                            minimum_stock_level=10, reorder_point=5)
+        medicine.batches = [MedicineBatch(batch_number=name[0], expiry_date=expiry, quantity=quantity)]
+        db.session.add(medicine)
+    db.session.commit()
+
+
+def test_low_stock_uses_minimum_stock_level(app):
+    with app.app_context():
+        add_medicines()
+        refresh_alerts()
+        alerts = {(alert.medicine.name, alert.alert_type): alert.severity for alert in InventoryAlert.query}
+    assert alerts == {
+        ('Low', 'LOW_STOCK'): 'Medium',
+        ('Critical', 'LOW_STOCK'): 'High',
+        ('Empty', 'OUT_OF_STOCK'): 'Critical',
+    }
+
+
+def test_pages_agree_with_alerts(app, client):
+    with app.app_context():
+        add_medicines()
+        refresh_alerts()
+
+    inventory = client.get('/inventory').get_data(as_text=True)
+    assert inventory.count('Low Stock</span>') == 2
+    assert inventory.count('>Out</span>') == 1
+    dashboard = client.get('/').get_data(as_text=True)
+    assert '3 items running low' in dashboard
+    assert '<h4>3</h4>' in client.get('/inventory_dashboard').get_data(as_text=True)
+
+
+def test_status_follows_stock_without_refresh(app, client):
+    with app.app_context():
+        add_medicines()
+        customer = Customer(name='Walk-in')
+        db.session.add(customer)
+        db.session.commit()
+        plenty_id, customer_id = Medicine.query.filter_by(name='Plenty').one().id, customer.id
+    assert '3 items running low' in client.get('/').get_data(as_text=True)
+
+    # Selling Plenty down to its minimum stock level makes it low at once
+    response = client.post('/sales', data={'customer': customer_id, 'items-0-medicine': plenty_id,
+                                           'items-0-quantity': 40})
+    assert '/bill' in response.headers['Location']
+    assert client.get('/inventory').get_data(as_text=True).count('Low Stock</span>') == 3
+    assert '4 items running low' in client.get('/').get_data(as_text=True)
+    assert '<h4>4</h4>' in client.get('/inventory_dashboard').get_data(as_text=True)
+
+    with app.app_context():
+        db.session.execute(db.update(Medicine).values(quantity=50))
+        db.session.commit()
+    assert 'Low Stock</span>' not in client.get('/inventory').get_data(as_text=True)
+    assert 'items running low' not in client.get('/').get_data(as_text=True)
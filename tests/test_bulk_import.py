@@ -0,0 +1,111 @@
+"""Imports can be re-run: rows that are already present are not imported twice."""
+
+import csv
+from datetime import date
+
+from models import db, Medicine, MedicineBatch, Purchase, PurchaseItem, Supplier
+from bulk_import import run_import
+
+PURCHASE_COLUMNS = ['supplier', 'invoice_number', 'medicine', 'batch_number', 'expiry_date', 'quantity',
+                    'price_per_unit']
+
+
+def write_csv(path, columns, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    return str(path)
+
+
+def test_restarted_purchase_import_adds_only_missing_lines(app, tmp_path):
+    lines = [
+        ['Acme', 'INV-1', 'Aspirin', 'A1', '2030-01-01', 10, 1.0],
+        ['Acme', 'INV-1', 'Aspirin', 'A1', '2030-01-01', 10, 1.0],  # a repeated line is still a line
+        ['Acme', 'INV-1', 'Aspirin', 'A2', '2031-01-01', 5, 1.0],
+        ['Acme', 'INV-2', 'Aspirin', 'A1', '2030-01-01', 3, 1.0],
+    ]
+    with app.app_context():
+        db.session.add(Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=0,
+                                expiry_date=date(2030, 1, 1), price=2.0, gst_percent=12.0))
+        db.session.commit()
+
+        # The first run stopped after committing part of INV-1
+        partial = run_import('purchases', write_csv(tmp_path / 'partial.csv', PURCHASE_COLUMNS, lines[:1]))
+        assert partial.inserted == 1
+
+        report = run_import('purchases', write_csv(tmp_path / 'full.csv', PURCHASE_COLUMNS, lines), chunk_size=2)
+        assert (report.inserted, report.skipped) == (3, 1)
+        again = run_import('purchases', str(tmp_path / 'full.csv'))
+        assert (again.inserted, again.skipped) == (0, 4)
+
+        totals = dict(db.session.query(Purchase.invoice_number, Purchase.total_amount))
+        assert totals == {'INV-1': 25.0, 'INV-2': 3.0}
+        assert PurchaseItem.query.count() == 4
+        lots = dict(db.session.query(MedicineBatch.batch_number, MedicineBatch.quantity))
+        assert lots == {'A1': 23, 'A2': 5}
+        assert Medicine.query.one().quantity == 28
+
+
+MEDICINE_COLUMNS = ['name', 'batch_number', 'category', 'expiry_date', 'price', 'gst_percent', 'quantity']
+
+
+def test_medicine_batches_become_lots_of_one_medicine(app, tmp_path):
+    rows = [
+        ['Aspirin', 'A1', 'Tablet', '2030-01-01', 2.0, 12.0, 10],
+        ['ASPIRIN', 'A2', 'Tablet', '2031-01-01', 2.0, 12.0, 5],
+        ['Brufen', 'B1', 'Tablet', '2030-06-01', 3.0, 12.0, 0],
+    ]
+    with app.app_context():
+        report = run_import('medicines', write_csv(tmp_path / 'medicines.csv', MEDICINE_COLUMNS, rows), chunk_size=1)
+        assert (report.inserted, report.skipped) == (3, 0)
+        more = [['aspirin', 'A3', 'Tablet', '2032-01-01', 2.0, 12.0, 7]]
+        run_import('medicines', write_csv(tmp_path / 'more.csv', MEDICINE_COLUMNS, more))
+        again = run_import('medicines', str(tmp_path / 'medicines.csv'))
+        assert (again.inserted, again.skipped) == (0, 3)
+
+        assert sorted(name for name, in db.session.query(Medicine.name)) == ['Aspirin', 'Brufen']
+        aspirin = Medicine.query.filter_by(name='Aspirin').one()
+        assert aspirin.quantity == 22
+        lots = dict(db.session.query(MedicineBatch.batch_number, MedicineBatch.quantity)
+                              .filter_by(medicine_id=aspirin.id))
+        assert lots == {'A1': 10, 'A2': 5, 'A3': 7}
+
+
+def test_purchase_lots_need_a_real_expiry(app, tmp_path):
+    lines = [
+        ['Acme', 'INV-1', 'Aspirin', 'A9', '', 10, 1.0],  # new batch without expiry
+        ['Acme', 'INV-1', 'Aspirin', 'A1', '2031-05-05', 10, 1.0],  # differs from the lot
+        ['Acme', 'INV-1', 'Aspirin', 'A1', '', 4, 1.0],  # existing lot: its expiry is used
+        ['Acme', 'INV-1', 'Aspirin', '', '', 1, 1.0],  # default lot
+    ]
+    with app.app_context():
+        medicine = Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=0,
+                            expiry_date=date(2030, 1, 1), price=2.0, gst_percent=12.0)
+        medicine.batches = [MedicineBatch(batch_number='A1', expiry_date=date(2030, 1, 1), quantity=0)]
+        db.session.add(medicine)
+        db.session.commit()
+
+        report = run_import('purchases', write_csv(tmp_path / 'purchases.csv', PURCHASE_COLUMNS, lines))
+        assert report.inserted == 2
+        assert [line for line, _ in report.errors] == [2, 3]
+        assert 'expiry_date is required' in report.errors[0][1]
+        assert 'does not match batch' in report.errors[1][1]
+        assert dict(db.session.query(MedicineBatch.batch_number, MedicineBatch.expiry_date)) == {'A1': date(2030, 1, 1)}
+
+
+def test_suppliers_are_created_only_for_imported_lines(app, tmp_path):
+    lines = [
+        ['Acme', 'INV-1', 'Aspirin', 'A1', '2030-01-01', 10, 1.0],
+        ['Zenith', 'Z-1', 'Unknown', 'U1', '2030-01-01', 10, 1.0],  # not in the inventory
+        ['Orbit', 'O-1', 'Aspirin', 'A7', '', 10, 1.0],  # new batch without expiry
+    ]
+    with app.app_context():
+        db.session.add(Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=0,
+                                expiry_date=date(2030, 1, 1), price=2.0, gst_percent=12.0))
+        db.session.commit()
+
+        report = run_import('purchases', write_csv(tmp_path / 'purchases.csv', PURCHASE_COLUMNS, lines))
+        assert report.inserted == 1
+        assert [line for line, _ in report.errors] == [3, 4]
+        assert [name for name, in db.session.query(Supplier.name)] == ['Acme']
@@ -0,0 +1,76 @@
+"""The fuzzy catalog index follows medicines as they are added, renamed and deleted."""
+
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import update
+
+import catalog
+from models import db, Medicine
+
+
+def add_medicine(name, manufacturer='Cipla'):
+    medicine = Medicine(name=name, batch_number='B1', category='Tablet', manufacturer=manufacturer, quantity=5,
+                        expiry_date=date(2030, 1, 1), price=1.0, gst_percent=12.0)
+    db.session.add(medicine)
+    db.session.commit()
+    return medicine
+
+
+def names(term):
+    found = dict(db.session.query(Medicine.id, Medicine.name))
+    return [found[medicine_id] for medicine_id, _ in catalog.search(term)]
+
+
+def test_index_follows_changes(make_app):
+    # Far longer than the test: only this process's commits trigger a refresh
+    app = make_app({'CATALOG_REFRESH_SECONDS': 3600})
+    with app.app_context():
+        add_medicine('Paracetamol 500mg')
+        add_medicine('Amoxicillin 250mg', manufacturer='Sun Pharma')
+        # Misspelt names still find the medicine
+        assert names('paracetmol') == ['Paracetamol 500mg']
+        assert names('amoxycilin') == ['Amoxicillin 250mg']
+        assert names('sun') == ['Amoxicillin 250mg']
+
+        added = add_medicine('Pantoprazole 40mg')
+        assert names('pantoprazol') == ['Pantoprazole 40mg']
+
+        added.name = 'Pantocid 40mg'
+        db.session.commit()
+        assert names('pantocid') == ['Pantocid 40mg']
+        assert names('pantoprazole') == []
+
+        db.session.delete(added)
+        db.session.commit()
+        assert names('pantocid') == []
+        assert catalog.get_index().dead == 2
+
+
+def test_refresh_reads_rows_changed_elsewhere(make_app):
+    # Writes from other processes are only seen through the updated_at watermark
+    app = make_app({'CATALOG_REFRESH_SECONDS': 0})
+    with app.app_context():
+        medicine = add_medicine('Cetirizine 10mg')
+        assert names('cetrizine') == ['Cetirizine 10mg']
+        index = catalog.get_index()
+
+        later = datetime.utcnow() + timedelta(minutes=1)
+        db.session.execute(update(Medicine).where(Medicine.id == medicine.id)
+                           .values(name='Levocetirizine 5mg', updated_at=later))
+        db.session.commit()
+        assert names('levocetrizine') == ['Levocetirizine 5mg']
+        assert catalog.get_index() is index
+        assert index.watermark == later
+
+
+def test_apps_keep_their_own_index(make_app):
+    first, second = make_app(), make_app()
+    with first.app_context():
+        add_medicine('Azithromycin 500mg')
+        assert names('azithro') == ['Azithromycin 500mg']
+    with second.app_context():
+        assert catalog.search('azithro') == []
+        add_medicine('Ibuprofen 400mg')
+        assert names('ibuprofen') == ['Ibuprofen 400mg']
+    with first.app_context():
+        assert catalog.search('ibuprofen') == []
@@ -0,0 +1,41 @@
+"""Cached choice lists follow changes made by other processes."""
+
+from datetime import date
+
+from sqlalchemy import text
+
+from choices import choice_label, customer_choices, medicine_choices
+from models import db, Customer, Medicine
+
+
+def add_medicines(*names):
+    for name in names:
+        db.session.add(Medicine(name=name, batch_number='B1', category='General', quantity=10,
+                                expiry_date=date(2030, 1, 1), price=10.0, gst_percent=12.0))
+    db.session.commit()
+
+
+def test_rows_deleted_elsewhere_leave_the_list(app):
+    with app.app_context():
+        add_medicines('Aspirin', 'Brufen', 'Crocin')
+        assert [name for _, name in medicine_choices()] == ['Aspirin', 'Brufen', 'Crocin']
+
+        # A raw statement is what another worker's change looks like: no session events here
+        db.session.execute(text("DELETE FROM medicines WHERE name = 'Brufen'"))
+        db.session.commit()
+        assert [name for _, name in medicine_choices()] == ['Aspirin', 'Crocin']
+
+
+def test_choice_label_uses_cached_list(app):
+    with app.app_context():
+        add_medicines('Aspirin')
+        db.session.add(Customer(name='Ravi'))
+        db.session.commit()
+        medicines = medicine_choices()
+        assert medicine_choices() is medicines
+        medicine_id = medicines[0][0]
+        assert choice_label(medicines, medicine_id) == 'Aspirin'
+        assert choice_label(medicines, None) == ''
+        assert choice_label(medicines, 999) == ''
+        # Lists that did not come from a provider are scanned
+        assert choice_label(list(customer_choices()), 1) == 'Ravi'
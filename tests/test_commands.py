@@ -0,0 +1,41 @@
+"""Maintenance commands report through click and stream their rows."""
+
+from datetime import date, datetime
+
+import bill_renderer
+from models import db, Customer, Medicine, Sale
+
+
+def test_render_bills_streams_report_rows(app, monkeypatch, tmp_path):
+    with app.app_context():
+        customer = Customer(name='Ravi')
+        db.session.add(customer)
+        db.session.add(Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=7,
+                                expiry_date=date(2030, 1, 1), price=2.0, gst_percent=12.0))
+        db.session.flush()
+        for hour in range(3):
+            db.session.add(Sale(customer_id=customer.id, total_amount=10.0 + hour, gst_amount=1.0,
+                                created_at=datetime(2026, 5, 1, 9 + hour)))
+        db.session.commit()
+
+    documents = {}
+
+    def render_batch(docs, output, workers=None, on_progress=None):
+        # Stands in for the PDF pool: keeps the HTML of each document
+        for name, html, _ in docs:
+            documents[name] = html
+            on_progress(name)
+        return len(documents), 1.0
+
+    monkeypatch.setattr(bill_renderer, 'PDF_GENERATION_AVAILABLE', True)
+    monkeypatch.setattr(bill_renderer, 'render_batch', render_batch)
+    result = app.test_cli_runner().invoke(args=[
+        'render-bills', '--start', '2026-05-01', '--output', str(tmp_path / 'bills.zip'),
+    ])
+
+    assert result.exit_code == 0, result.output
+    assert 'Wrote 7 PDFs (3 bills)' in result.output
+    assert len([name for name in documents if name.startswith('bills/')]) == 3
+    for report in ('sales_report', 'gst_report'):
+        assert documents[f'reports/{report}.pdf'].count('2026-05-01') == 3
+    assert '<td>Aspirin</td>' in documents['reports/inventory_report.pdf']
@@ -0,0 +1,112 @@
+"""The search index follows edits to patients, prescriptions and history notes."""
+
+import csv
+from datetime import date
+
+from sqlalchemy import text
+
+import fulltext
+from bulk_import import run_import
+from models import db, MedicalHistory, Patient, Prescription
+
+
+def add_patient(first_name, last_name, **values):
+    patient = Patient(first_name=first_name, last_name=last_name, date_of_birth=date(1980, 1, 1),
+                      gender='Female', **values)
+    db.session.add(patient)
+    db.session.flush()
+    return patient
+
+
+def add_prescription(patient, number, **values):
+    prescription = Prescription(prescription_number=number, patient_id=patient.id, doctor_name='Dr Rao', **values)
+    db.session.add(prescription)
+    db.session.flush()
+    return prescription
+
+
+def ids(ranked):
+    return [row_id for row_id, _ in ranked]
+
+
+def test_index_follows_edits(app):
+    with app.app_context():
+        assert fulltext.available()
+        asha = add_patient('Asha', 'Menon', phone_number='9000000001')
+        ravi = add_patient('Ravi', 'Kumar')
+        note = MedicalHistory(patient_id=ravi.id, chief_complaint='Headache', notes='Advised rest')
+        db.session.add(note)
+        first = add_prescription(asha, 'RX-1', diagnosis='Migraine')
+        second = add_prescription(ravi, 'RX-2', diagnosis='Fever')
+        db.session.commit()
+
+        assert ids(fulltext.search_patients('asha')) == [asha.id]
+        assert ids(fulltext.search_patients('wheez')) == []
+        assert ids(fulltext.search_prescriptions('migr')) == [first.id]
+
+        # Updates replace the indexed text, old words stop matching
+        asha.last_name = 'Pillai'
+        note.notes = 'Wheezing at night'
+        second.diagnosis = 'Migraine with aura'
+        db.session.commit()
+
+        assert ids(fulltext.search_patients('menon')) == []
+        assert ids(fulltext.search_patients('asha pillai')) == [asha.id]
+        assert ids(fulltext.search_patients('wheez')) == [ravi.id]
+        assert ids(fulltext.search_patients('rest')) == []
+        assert set(ids(fulltext.search_prescriptions('migraine'))) == {first.id, second.id}
+        # The patient's new name finds their prescriptions too
+        assert ids(fulltext.search_prescriptions('pillai')) == [first.id]
+
+        # Rows that are changed outside the indexed columns keep their entry
+        ravi.address = 'Kochi'
+        db.session.commit()
+        assert ids(fulltext.search_patients('ravi')) == [ravi.id]
+
+        db.session.delete(note)
+        db.session.delete(second)
+        db.session.commit()
+        assert ids(fulltext.search_patients('wheez')) == []
+        assert ids(fulltext.search_prescriptions('aura')) == []
+
+
+def test_better_matches_rank_first(app):
+    with app.app_context():
+        once = add_patient('Meera', 'Nair')
+        db.session.add(MedicalHistory(patient_id=once.id, notes='Asthma follow up'))
+        often = add_patient('John', 'Asthma', email='asthma@example.com')
+        db.session.commit()
+
+        assert ids(fulltext.search_patients('asthma')) == [often.id, once.id]
+
+
+def test_bulk_imported_patients_are_indexed(app, tmp_path):
+    path = tmp_path / 'patients.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['first_name', 'last_name', 'date_of_birth', 'gender', 'phone_number'])
+        writer.writerow(['Lakshmi', 'Iyer', '1975-05-01', 'Female', '9000000002'])
+        writer.writerow(['Arjun', 'Das', '1990-09-12', 'Male', '9000000003'])
+    with app.app_context():
+        assert run_import('patients', str(path)).inserted == 2
+
+        lakshmi = Patient.query.filter_by(first_name='Lakshmi').one()
+        assert ids(fulltext.search_patients('laksh iyer')) == [lakshmi.id]
+        assert ids(fulltext.search_patients('9000000003')) == [Patient.query.filter_by(first_name='Arjun').one().id]
+
+
+def test_pages_fall_back_to_ilike_without_the_index(app, client):
+    with app.app_context():
+        add_patient('Farah', 'Khan')
+        db.session.commit()
+        for name in fulltext.INDEXES:
+            db.session.execute(text(f'DROP TABLE {fulltext.fts_table(name)}'))
+        db.session.commit()
+        fulltext._ready_binds.clear()
+        assert not fulltext.available()
+
+    response = client.get('/patients?search=arah')
+    assert response.status_code == 200
+    assert b'Khan' in response.data
+    response = client.get('/prescriptions?search=arah')
+    assert response.status_code == 200
@@ -0,0 +1,45 @@
+"""The hot filters are served by the composite indexes declared in models.py."""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from models import db, InventoryAlert, MedicalHistory, Medicine, Prescription, PurchaseItem, Sale, SaleItem
+
+MONTH_START = datetime(date.today().year, date.today().month, 1)
+
+# (expected index, query shape used by the views)
+HOT_QUERIES = [
+    ('ix_sales_created_at', lambda: Sale.query.filter(
+        Sale.created_at >= MONTH_START, Sale.created_at < MONTH_START + timedelta(days=31))),
+    ('ix_sales_customer_id_created_at', lambda: Sale.query.filter_by(customer_id=1)),
+    ('ix_sale_items_sale_id', lambda: SaleItem.query.filter_by(sale_id=1)),
+    ('ix_medicines_expiry_date', lambda: Medicine.query.filter(Medicine.expiry_date < date.today())),
+    ('ix_medicines_quantity_reorder_point', lambda: db.session.query(func.count(Medicine.id))
+     .filter(Medicine.quantity <= Medicine.reorder_point)),
+    ('ix_purchase_items_medicine_id_id', lambda: PurchaseItem.query.filter_by(medicine_id=1)
+     .order_by(PurchaseItem.id.desc()).limit(1)),
+    ('ix_inventory_alerts_active_ack_created_at', lambda: InventoryAlert.query
+     .filter_by(is_active=True, is_acknowledged=False).order_by(InventoryAlert.created_at.desc()).limit(10)),
+    ('ix_prescriptions_status_priority_date', lambda: Prescription.query.filter(Prescription.status == 'Pending')
+     .order_by(Prescription.priority.desc(), Prescription.prescription_date.desc())),
+    ('ix_medical_history_patient_id_visit_date', lambda: MedicalHistory.query.filter_by(patient_id=1)
+     .order_by(MedicalHistory.visit_date.desc())),
+]
+
+
+def query_plan(query):
+    connection = db.session.connection()
+    compiled = query.statement.compile(dialect=connection.dialect)
+    params = compiled.construct_params()
+    rows = connection.exec_driver_sql(
+        'EXPLAIN QUERY PLAN ' + str(compiled), tuple(params[name] for name in compiled.positiontup),
+    ).fetchall()
+    return ' '.join(str(row) for row in rows)
+
+
+@pytest.mark.parametrize('index_name, build_query', HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+def test_hot_query_uses_index(app, index_name, build_query):
+    with app.app_context():
+        assert index_name in query_plan(build_query())
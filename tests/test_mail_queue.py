@@ -0,0 +1,110 @@
+"""Queued mail is delivered, retried or given up on, against a local SMTP stand-in."""
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+import mail_queue
+from models import db, OutboundEmail
+from smtp_stand_in import DEFER, DROP, REFUSE
+
+
+@pytest.fixture
+def mail_app(make_app, smtp):
+    return make_app({
+        'MAIL_SERVER': '127.0.0.1', 'MAIL_PORT': smtp.port, 'MAIL_USE_TLS': False, 'MAIL_USE_SSL': False,
+        'MAIL_USERNAME': None, 'MAIL_PASSWORD': None, 'MAIL_DEFAULT_SENDER': 'pharmacy@example.com',
+        'MAIL_SUPPRESS_SEND': False, 'MAIL_RETRY_BASE_SECONDS': 60,
+    })
+
+
+def queue(*recipients):
+    for recipient in recipients:
+        mail_queue.enqueue('Password Reset Request', [recipient], 'link')
+    db.session.commit()
+
+
+def outbox():
+    return {json.loads(email.recipients)[0]: email for email in OutboundEmail.query}
+
+
+def test_outcomes(mail_app, smtp):
+    smtp.rules = {'busy@example.com': DEFER, 'nobody@example.com': REFUSE}
+    with mail_app.app_context():
+        queue('ok@example.com', 'busy@example.com', 'nobody@example.com')
+        started = datetime.utcnow()
+        assert mail_queue.send_due() == {'sent': 1, 'retrying': 1, 'failed': 1}
+        emails = outbox()
+
+        sent = emails['ok@example.com']
+        assert (sent.status, sent.attempts, sent.claimed_by) == ('sent', 1, None)
+        assert sent.sent_at >= started
+
+        retrying = emails['busy@example.com']
+        assert (retrying.status, retrying.attempts) == ('pending', 1)
+        assert 'SMTPDataError' in retrying.last_error
+        # Backed off by MAIL_RETRY_BASE_SECONDS, give or take the jitter
+        assert retrying.next_attempt_at >= started + timedelta(seconds=60 * 0.8)
+
+        failed = emails['nobody@example.com']
+        assert (failed.status, failed.attempts) == ('failed', 1)
+        assert 'SMTPRecipientsRefused' in failed.last_error
+
+        # The retry is not due yet, and nothing else is
+        assert mail_queue.send_due() == {'sent': 0, 'retrying': 0, 'failed': 0}
+    assert smtp.received == ['ok@example.com']
+    assert smtp.connections == 1
+
+
+def test_dropped_connection_retries_the_rest(mail_app, smtp):
+    smtp.rules = {'second@example.com': DROP}
+    with mail_app.app_context():
+        queue('first@example.com', 'second@example.com', 'third@example.com')
+        assert mail_queue.send_due() == {'sent': 1, 'retrying': 2, 'failed': 0}
+        emails = outbox()
+        assert emails['first@example.com'].status == 'sent'
+        for address in ('second@example.com', 'third@example.com'):
+            assert (emails[address].status, emails[address].attempts) == ('pending', 1)
+            assert emails[address].next_attempt_at > datetime.utcnow()
+
+
+def test_abandoned_claims_are_reclaimed(mail_app, smtp):
+    with mail_app.app_context():
+        queue('stuck@example.com', 'busy@example.com')
+        stuck, busy = OutboundEmail.query.order_by(OutboundEmail.id).all()
+        # One claim was left by a worker that died, the other is still being worked on
+        stuck.status, stuck.claimed_by = 'sending', 'dead-worker'
+        stuck.claimed_at = datetime.utcnow() - mail_queue.CLAIM_TIMEOUT - timedelta(minutes=1)
+        busy.status, busy.claimed_by, busy.claimed_at = 'sending', 'live-worker', datetime.utcnow()
+        db.session.commit()
+
+        assert mail_queue.send_due() == {'sent': 1, 'retrying': 0, 'failed': 0}
+        assert db.session.get(OutboundEmail, busy.id).claimed_by == 'live-worker'
+    assert smtp.received == ['stuck@example.com']
+
+
+def test_concurrent_claims_do_not_overlap(file_app):
+    app = file_app
+    with app.app_context():
+        queue(*(f'user{i}@example.com' for i in range(40)))
+
+    claimed, lock = [], threading.Lock()
+
+    def worker():
+        with app.app_context():
+            while True:
+                batch = [email.id for email in mail_queue.claim(3)]
+                if not batch:
+                    return
+                with lock:
+                    claimed.extend(batch)
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == 40
+    assert len(set(claimed)) == 40
@@ -0,0 +1,53 @@
+"""Purchases receive stock into lots with real expiry dates."""
+
+from datetime import date
+
+from models import db, Medicine, MedicineBatch, Purchase, Supplier
+
+EXPIRY = date(2030, 1, 1)
+
+
+def seed():
+    supplier = Supplier(name='Acme')
+    medicine = Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=0,
+                        expiry_date=EXPIRY, price=2.0, gst_percent=12.0)
+    medicine.batches = [MedicineBatch(batch_number='A1', expiry_date=EXPIRY, quantity=0)]
+    db.session.add_all([supplier, medicine])
+    db.session.commit()
+    return supplier.id, medicine.id
+
+
+def purchase(client, supplier_id, medicine_id, batch_number='', expiry_date=''):
+    # The form posts back to the page it is shown on
+    return client.post('/purchases?show_form=true', data={
+        'supplier': supplier_id, 'items-0-medicine': medicine_id, 'items-0-quantity': 5,
+        'items-0-price_per_unit': 1.0, 'items-0-batch_number': batch_number, 'items-0-expiry_date': expiry_date,
+    })
+
+
+def test_new_batch_needs_expiry(app, client):
+    with app.app_context():
+        supplier_id, medicine_id = seed()
+
+    response = purchase(client, supplier_id, medicine_id, batch_number='A2')
+    assert response.status_code == 200
+    assert 'Enter the expiry date of new batch A2.' in response.get_data(as_text=True)
+
+    assert purchase(client, supplier_id, medicine_id, batch_number='A2', expiry_date='2031-01-01').status_code == 302
+    with app.app_context():
+        lots = dict(db.session.query(MedicineBatch.batch_number, MedicineBatch.expiry_date))
+        assert lots == {'A1': EXPIRY, 'A2': date(2031, 1, 1)}
+
+
+def test_existing_lot_keeps_its_expiry(app, client):
+    with app.app_context():
+        supplier_id, medicine_id = seed()
+
+    response = purchase(client, supplier_id, medicine_id, batch_number='A1', expiry_date='2032-02-02')
+    assert 'Batch A1 of Aspirin expires on 2030-01-01, not 2032-02-02.' in response.get_data(as_text=True)
+    assert purchase(client, supplier_id, medicine_id, batch_number='A1').status_code == 302
+
+    with app.app_context():
+        assert Purchase.query.count() == 1
+        lot = MedicineBatch.query.one()
+        assert (lot.expiry_date, lot.quantity) == (EXPIRY, 5)
@@ -0,0 +1,90 @@
+"""List and detail views run a fixed number of statements however many rows they show."""
+
+from datetime import date, datetime, timedelta
+
+from models import (
+    db, Customer, InventoryAlert, MedicalEquipment, Medicine, Patient, Prescription,
+    PrescriptionItem, Purchase, PurchaseItem, Sale, SaleItem, Supplier,
+)
+from query_counter import QueryCounter
+
+ROUTES = [
+    '/',
+    '/inventory',
+    '/inventory_dashboard',
+    '/inventory_alerts',
+    '/sales',
+    '/customers',
+    '/patients',
+    '/prescriptions',
+    '/prescription/1',
+    '/prescription/1/dispense',
+    '/purchases',
+    '/purchases/1',
+    '/medical_equipment',
+    '/admin/users',
+]
+
+
+def seed(rows):
+    """Add ``rows`` of each entity, each linked to its related rows."""
+    today = date.today()
+    supplier = Supplier(name=f'Supplier {Supplier.query.count() + 1}')
+    customer = Customer(name=f'Customer {Customer.query.count() + 1}')
+    patient = Patient(first_name='Pat', last_name=str(Patient.query.count() + 1),
+                      date_of_birth=date(1990, 1, 1), gender='Other')
+    db.session.add_all([supplier, customer, patient])
+    db.session.flush()
+
+    purchase = Purchase.query.order_by(Purchase.id).first()
+    if purchase is None:
+        purchase = Purchase(supplier_id=supplier.id, total_amount=0.0)
+        db.session.add(purchase)
+    prescription = Prescription.query.order_by(Prescription.id).first()
+    if prescription is None:
+        prescription = Prescription(prescription_number='RX-00001', patient_id=patient.id, doctor_name='Dr. Rao')
+        db.session.add(prescription)
+    db.session.flush()
+
+    for i in range(rows):
+        medicine = Medicine(name=f'Medicine {supplier.id}-{i}', batch_number=f'B{i}', category='General',
+                            quantity=i % 7, expiry_date=today + timedelta(days=i - rows // 2), price=10.0,
+                            gst_percent=12.0, supplier_id=supplier.id)
+        equipment = MedicalEquipment(name=f'Equipment {i}', serial_number=f'SN-{supplier.id}-{i}',
+                                     category='Diagnostic', supplier_id=supplier.id)
+        db.session.add_all([medicine, equipment])
+        db.session.flush()
+        sale = Sale(customer_id=customer.id, total_amount=10.0, gst_amount=1.2, created_at=datetime.utcnow())
+        db.session.add(sale)
+        db.session.flush()
+        db.session.add_all([
+            SaleItem(sale_id=sale.id, medicine_id=medicine.id, quantity=1, price_per_unit=10.0, dispensed_quantity=1),
+            Purchase(supplier_id=supplier.id, total_amount=0.0),
+            PurchaseItem(purchase_id=purchase.id, medicine_id=medicine.id, quantity=1, price_per_unit=8.0),
+            Prescription(prescription_number=f'RX-{supplier.id}-{i}', patient_id=patient.id, doctor_name='Dr. Rao'),
+            PrescriptionItem(prescription_id=prescription.id, medicine_id=medicine.id,
+                             medicine_name=medicine.name, prescribed_quantity=2),
+            InventoryAlert(alert_type='LOW_STOCK', message='Low stock', medicine_id=medicine.id),
+            InventoryAlert(alert_type='MAINTENANCE_DUE', message='Maintenance due', equipment_id=equipment.id),
+        ])
+    db.session.commit()
+
+
+def statement_count(client, engine, url):
+    with QueryCounter(engine) as counter:
+        response = client.get(url)
+    assert response.status_code == 200, url
+    return counter.count
+
+
+def test_statement_counts_do_not_grow_with_rows(app, client):
+    with app.app_context():
+        seed(5)
+        engine = db.engine
+    small = {url: statement_count(client, engine, url) for url in ROUTES}
+
+    with app.app_context():
+        seed(15)
+    grown = {url: (small[url], count) for url in ROUTES
+             if (count := statement_count(client, engine, url)) > small[url]}
+    assert not grown, f'statement count grew with the data: {grown}'
@@ -0,0 +1,26 @@
+"""Report date arguments are validated and the range is capped."""
+
+from datetime import date, timedelta
+
+import pytest
+
+
+@pytest.mark.parametrize('url', [
+    '/reports?start_date=foo',
+    '/reports?end_date=2024-13-40',
+    '/reports/profit_loss?start_date=0001-01-01',
+    '/reports/stock_movements?start_date=yesterday',
+    '/reports/stock_on_date?date=foo',
+])
+def test_invalid_dates_fall_back_to_defaults(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    assert b'use YYYY-MM-DD' in response.data
+
+
+def test_long_ranges_are_capped(client, app):
+    days = app.config['REPORT_MAX_DAYS']
+    response = client.get('/reports?start_date=1900-01-01&end_date=2999-12-31')
+    assert response.status_code == 200
+    start = date.today() - timedelta(days=days - 1)
+    assert f'showing {start.isoformat()} to {date.today().isoformat()}'.encode() in response.data
@@ -0,0 +1,53 @@
+"""A form posted with a customer, supplier or medicine deleted meanwhile writes nothing."""
+
+from datetime import date
+
+import pytest
+
+from blueprints import inventory, sales
+from models import db, Customer, Medicine, Purchase, Sale, Supplier
+
+GONE = 999
+
+
+@pytest.fixture
+def stale_choices(app, monkeypatch):
+    """Choice lists that still offer row ``GONE``, as a stale cache would."""
+    with app.app_context():
+        medicine = Medicine(name='Aspirin', batch_number='A1', category='Tablet', quantity=10,
+                            expiry_date=date(2030, 1, 1), price=2.0, gst_percent=12.0)
+        db.session.add_all([medicine, Customer(name='Ravi'), Supplier(name='Acme')])
+        db.session.commit()
+        ids = {'medicine': medicine.id, 'customer': Customer.query.one().id, 'supplier': Supplier.query.one().id}
+
+    def with_gone(choices):
+        return lambda *args, **kwargs: list(choices(*args, **kwargs)) + [(GONE, 'Deleted')]
+
+    for module in (sales, inventory):
+        for name in ('medicine_choices', 'customer_choices', 'supplier_choices'):
+            if hasattr(module, name):
+                monkeypatch.setattr(module, name, with_gone(getattr(module, name)))
+    return ids
+
+
+@pytest.mark.parametrize('customer, medicine', [('customer', GONE), (GONE, 'medicine')])
+def test_sale(app, client, stale_choices, customer, medicine):
+    response = client.post('/sales', data={
+        'customer': stale_choices.get(customer, customer), 'items-0-medicine': stale_choices.get(medicine, medicine),
+        'items-0-quantity': 1,
+    })
+    assert response.status_code == 302 and '/bill' not in response.headers['Location']
+    with app.app_context():
+        assert Sale.query.count() == 0
+        assert Medicine.query.one().quantity == 10
+
+
+@pytest.mark.parametrize('supplier, medicine', [('supplier', GONE), (GONE, 'medicine')])
+def test_purchase(app, client, stale_choices, supplier, medicine):
+    response = client.post('/purchases?show_form=true', data={
+        'supplier': stale_choices.get(supplier, supplier), 'items-0-medicine': stale_choices.get(medicine, medicine),
+        'items-0-quantity': 1, 'items-0-price_per_unit': 1.0,
+    })
+    assert response.status_code == 302
+    with app.app_context():
+        assert Purchase.query.count() == 0
@@ -0,0 +1,53 @@
+"""Worker startup stays cheap: no one-shot work and no heavy imports in wsgi.py."""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from models import db, User
+import startup
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Loaded on first use only; none of these may appear in a worker's import
+DEFERRED = ('weasyprint', 'openpyxl', 'alembic', 'flask_migrate')
+
+
+def import_as_gunicorn_worker(tmp_path):
+    """Import wsgi.py in a fresh interpreter the way gunicorn does; returns what it loaded."""
+    database = tmp_path / 'worker.db'
+    env = dict(os.environ, FLASK_ENV='development', DATABASE_URL=f'sqlite:///{database}',
+               MAIL_QUEUE_POLL_SECONDS='0', ALERT_REFRESH_INTERVAL_SECONDS='0')
+    code = (
+        'import gunicorn, json, sys\n'
+        f'sys.path.insert(0, {ROOT!r})\n'
+        'import wsgi\n'
+        f'print(json.dumps(sorted(name for name in sys.modules if name.split(".")[0] in {DEFERRED!r})))\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1]), database
+
+
+def test_worker_import_is_cheap(tmp_path):
+    loaded, database = import_as_gunicorn_worker(tmp_path)
+    assert loaded == []
+    # Migrations and the default admin are left to the master's pre-start step
+    assert not database.exists() or database.stat().st_size == 0
+
+
+def test_prestart_runs_under_lock(file_app):
+    with file_app.app_context():
+        User.query.delete()
+        db.session.commit()
+    # Replicas starting together take turns, so only one creates the admin
+    threads = [threading.Thread(target=startup.prestart, args=(file_app,), kwargs={'migrate': False})
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with file_app.app_context():
+        assert User.query.filter_by(username='Admin').count() == 1
@@ -0,0 +1,73 @@
+"""Concurrent sales of one medicine neither oversell nor lose updates."""
+
+import random
+import threading
+from datetime import date, timedelta
+
+from sqlalchemy import func
+
+from models import db, Customer, Medicine, MedicineBatch, Sale, SaleItem
+
+STOCK = 30
+ATTEMPTS = 60
+THREADS = 8
+
+
+def seed():
+    customer = Customer(name='Counter Customer')
+    medicine = Medicine(name='Contested', batch_number='B1', category='Tablet', quantity=STOCK,
+                        expiry_date=date.today() + timedelta(days=365), price=10.0, gst_percent=12.0)
+    # Two lots, so the sales also go through FEFO allocation
+    medicine.batches = [
+        MedicineBatch(batch_number='B1', expiry_date=date.today() + timedelta(days=365), quantity=STOCK // 2),
+        MedicineBatch(batch_number='B0', expiry_date=date.today() + timedelta(days=30), quantity=STOCK - STOCK // 2),
+    ]
+    db.session.add_all([customer, medicine])
+    db.session.commit()
+    return customer.id, medicine.id
+
+
+def test_concurrent_sales_keep_stock_consistent(file_app):
+    with file_app.app_context():
+        customer_id, medicine_id = seed()
+
+    attempts, lock, outcomes = [ATTEMPTS], threading.Lock(), []
+
+    def worker():
+        client = file_app.test_client()
+        client.post('/login', data={'username': 'Admin', 'password': 'Admin@13'})
+        rnd = random.Random()
+        while True:
+            with lock:
+                if attempts[0] <= 0:
+                    return
+                attempts[0] -= 1
+            quantity = rnd.randint(1, 3)
+            response = client.post('/sales', data={
+                'customer': customer_id, 'items-0-medicine': medicine_id, 'items-0-quantity': quantity,
+            })
+            accepted = response.status_code == 302 and '/bill' in response.headers.get('Location', '')
+            with lock:
+                outcomes.append((accepted, quantity, response.status_code))
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with file_app.app_context():
+        final_stock = db.session.get(Medicine, medicine_id).quantity
+        lot_stock = db.session.query(func.sum(MedicineBatch.quantity)).scalar()
+        negative_lots = MedicineBatch.query.filter(MedicineBatch.quantity < 0).count()
+        sold_units = db.session.query(func.coalesce(func.sum(SaleItem.quantity), 0)).scalar()
+        sale_count = Sale.query.count()
+
+    accepted = [quantity for ok, quantity, _ in outcomes if ok]
+    assert len(outcomes) == ATTEMPTS
+    assert all(status in (200, 302) for _, _, status in outcomes)
+    assert accepted, 'no sale was accepted'
+    assert final_stock >= 0 and not negative_lots
+    assert final_stock == STOCK - sold_units, 'lost update'
+    assert lot_stock == final_stock
+    assert sold_units == sum(accepted) and sale_count == len(accepted)
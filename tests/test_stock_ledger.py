@@ -0,0 +1,114 @@
+"""The stock movement ledger agrees with the stock it records."""
+
+from datetime import date, datetime
+
+from sqlalchemy import func, text
+
+from models import db, InventorySnapshot, Medicine, MedicineBatch, StockMovement
+from query_counter import QueryCounter
+from stock_ledger import record_movements, stock_on
+
+EXPIRY = date(2030, 1, 1)
+
+
+def add_medicine(quantity=20):
+    medicine = Medicine(name='Paracetamol', batch_number='B1', category='Tablet', quantity=quantity,
+                        expiry_date=EXPIRY, price=2.0, gst_percent=12.0)
+    medicine.batches = [MedicineBatch(batch_number='B1', expiry_date=EXPIRY, quantity=quantity)]
+    db.session.add(medicine)
+    db.session.flush()
+    record_movements([(medicine.id, medicine.batches[0].id, quantity)], 'opening', ('medicine', medicine.id))
+    db.session.commit()
+    return medicine.id
+
+
+def edit_form(**values):
+    form = {'name': 'Paracetamol', 'batch_number': 'B1', 'category': 'Tablet', 'quantity': 20,
+            'expiry_date': EXPIRY.isoformat(), 'price': 2.0, 'gst_percent': 12.0, 'minimum_stock_level': 10,
+            'maximum_stock_level': 1000, 'reorder_point': 5, 'unit_of_measurement': 'Units', 'supplier_id': 0}
+    form.update(values)
+    return form
+
+
+def ledger_balance(medicine_id):
+    return db.session.query(func.sum(StockMovement.quantity)).filter_by(medicine_id=medicine_id).scalar()
+
+
+def test_stock_correction_counts_sales_made_meanwhile(app, client):
+    with app.app_context():
+        medicine_id = add_medicine()
+        # A sale of 5 is committed after the edit form was loaded with 20
+        db.session.execute(text('UPDATE medicines SET quantity = quantity - 5 WHERE id = :id'), {'id': medicine_id})
+        db.session.execute(text('UPDATE medicine_batches SET quantity = quantity - 5'))
+        record_movements([(medicine_id, None, -5)], 'sale')
+        db.session.commit()
+
+    response = client.post(f'/edit_medicine/{medicine_id}', data=edit_form(quantity=18))
+    assert response.status_code == 302
+
+    with app.app_context():
+        assert db.session.get(Medicine, medicine_id).quantity == 18
+        assert MedicineBatch.query.filter_by(medicine_id=medicine_id).one().quantity == 18
+        assert ledger_balance(medicine_id) == 18
+
+
+def test_stock_correction_into_a_new_lot(app, client):
+    with app.app_context():
+        medicine_id = add_medicine()
+
+    assert client.post(f'/edit_medicine/{medicine_id}', data=edit_form(quantity=25, batch_number='B2')).status_code == 302
+    # Removing more than the named lot holds is refused
+    response = client.post(f'/edit_medicine/{medicine_id}', data=edit_form(quantity=10, batch_number='B2'))
+    assert b'Cannot correct the stock' in response.data
+
+    with app.app_context():
+        lots = dict(db.session.query(MedicineBatch.batch_number, MedicineBatch.quantity).filter_by(medicine_id=medicine_id))
+        assert lots == {'B1': 20, 'B2': 5}
+        assert db.session.get(Medicine, medicine_id).quantity == 25
+        assert ledger_balance(medicine_id) == 25
+
+
+def test_medicines_with_history_are_kept(app, client):
+    with app.app_context():
+        medicine_id = add_medicine()
+        unused = Medicine(name='Typo', batch_number='B1', category='Tablet', quantity=0,
+                          expiry_date=EXPIRY, price=1.0, gst_percent=5.0)
+        db.session.add(unused)
+        db.session.commit()
+        unused_id = unused.id
+
+    response = client.post(f'/delete_medicine/{medicine_id}', follow_redirects=True)
+    assert b'has stock history and cannot be deleted' in response.data
+    client.post(f'/delete_medicine/{unused_id}')
+
+    with app.app_context():
+        assert db.session.get(Medicine, medicine_id) is not None
+        assert ledger_balance(medicine_id) == 20
+        assert db.session.get(Medicine, unused_id) is None
+
+
+def test_stock_on_starts_from_the_latest_snapshot(app):
+    with app.app_context():
+        medicine = Medicine(name='Cetirizine', batch_number='B1', category='Tablet', quantity=0,
+                            expiry_date=EXPIRY, price=1.0, gst_percent=5.0)
+        db.session.add(medicine)
+        db.session.flush()
+        for created_at, quantity in ((datetime(2026, 3, 1, 9), 50), (datetime(2026, 3, 1, 23, 59), -10),
+                                     (datetime(2026, 3, 2, 0, 0), -5), (datetime(2026, 3, 3, 12), -7)):
+            db.session.add(StockMovement(medicine_id=medicine.id, quantity=quantity, reason='sale',
+                                         created_at=created_at))
+        db.session.commit()
+
+        assert stock_on(date(2026, 2, 28)) == {medicine.id: 0}
+        assert stock_on(date(2026, 3, 2)) == {medicine.id: 35}
+
+        # A snapshot replaces the movements up to the end of its day
+        db.session.add(InventorySnapshot(snapshot_date=date(2026, 3, 1), medicine_id=medicine.id,
+                                         quantity=100, stock_value=0, cost_value=0))
+        db.session.commit()
+        with QueryCounter(db.engine) as counter:
+            balances = stock_on(date(2026, 3, 2))
+        assert balances == {medicine.id: 95}
+        assert counter.count == 1
+        assert stock_on(date(2026, 3, 3)) == {medicine.id: 88}
+        assert stock_on(date(2026, 2, 28)) == {medicine.id: 0}
@@ -0,0 +1,31 @@
+"""Summaries are computed uncached when Redis is unreachable."""
+
+import pytest
+
+import summary_cache
+
+
+@pytest.fixture
+def redis_down_app(make_app):
+    pytest.importorskip('redis')
+    # Nothing listens on port 1, so every Redis call fails to connect
+    return make_app({'SUMMARY_CACHE_URL': 'redis://127.0.0.1:1/0', 'SUMMARY_CACHE_TIMEOUT': 0.1})
+
+
+def test_backend_errors_are_misses(redis_down_app):
+    backend = redis_down_app.extensions['summary_cache']
+    assert isinstance(backend, summary_cache.RedisCache)
+    assert backend.get('key') is None
+    backend.set('key', 1)
+    backend.bump(('sales',))
+    assert backend.versions(('sales',)) is None
+
+    with redis_down_app.app_context():
+        assert summary_cache.cached('answer', ('sales',), lambda: 42) == 42
+
+
+def test_dashboard_renders_without_redis(redis_down_app):
+    client = redis_down_app.test_client()
+    client.post('/login', data={'username': 'Admin', 'password': 'Admin@13'})
+    assert client.get('/').status_code == 200
+    assert client.get('/inventory_dashboard').status_code == 200
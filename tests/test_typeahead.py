@@ -0,0 +1,35 @@
+"""Typeahead prefix matches are byte-order range scans on the search key indexes."""
+
+from datetime import date
+
+from sqlalchemy.dialects import postgresql
+
+from models import db, Medicine, medicine_search_key
+from typeahead import search
+
+
+def test_prefix_and_substring_matches(app):
+    with app.app_context():
+        for name in ('Zincovit', 'zinc oxide', 'Oxyzinc', 'Amoxicillin'):
+            db.session.add(Medicine(name=name, batch_number='B1', category='General', quantity=5,
+                                    expiry_date=date(2030, 1, 1), price=1.0, gst_percent=5.0))
+        db.session.commit()
+        names = [result['name'] for result in search('medicines', 'ZINC')['results']]
+    # Prefix matches first, by key, then substring matches
+    assert names == ['zinc oxide', 'Zincovit', 'Oxyzinc']
+
+
+def test_search_key_uses_byte_order_on_postgresql():
+    sql = str(medicine_search_key.compile(dialect=postgresql.dialect()))
+    assert sql == '(lower(medicines.name)) COLLATE "C"'
+
+
+def test_prefix_range_uses_index(app):
+    with app.app_context():
+        query = db.session.query(Medicine.id).filter(medicine_search_key >= 'ab', medicine_search_key < 'ac')
+        compiled = query.statement.compile(dialect=db.engine.dialect)
+        plan = db.session.connection().exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + str(compiled), tuple(compiled.construct_params()[name]
+                                                        for name in compiled.positiontup),
+        ).fetchall()
+    assert 'ix_medicines_name_lower' in str(plan)
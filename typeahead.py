@@ -0,0 +1,186 @@
+"""
+Typeahead search for medicines, patients and customers.
+
+Autocomplete widgets ask for the top few matches of what has been typed so
+far instead of shipping whole tables to the page. Matches come in two
+phases, both ordered by the lower-cased name:
+
+1. prefix matches, answered as a range scan on an expression index over
+   ``lower(name)`` (``lower(:q) <= key < successor(:q)``). The range is
+   only exact in byte order, so the keys and their indexes are compared
+   with ``COLLATE "C"`` on PostgreSQL (see ``models.byte_order``);
+2. substring matches that are not prefixes, which need a scan and so only
+   run while the request is inside its latency budget. On PostgreSQL the
+   scan is additionally capped with ``statement_timeout``, set inside a
+   savepoint and restored afterwards so the rest of the request is not
+   affected.
+
+Responses are paginated with opaque cursors encoding (phase, key, id), the
+same keyset approach the list views use.
+"""
+
+import time
+
+from flask import current_app
+from sqlalchemy import and_, not_, or_, text
+from sqlalchemy.exc import OperationalError
+
+from models import (
+    db, Customer, Medicine, Patient,
+    customer_search_key, medicine_search_key, patient_search_key,
+)
+from pagination import decode_cursor, encode_cursor
+
+MAX_LIMIT = 50
+
+
+def _medicine_result(medicine):
+    return {
+        'id': medicine.id,
+        'label': f'{medicine.name} ({medicine.batch_number})',
+        'name': medicine.name,
+        'batch_number': medicine.batch_number,
+        'manufacturer': medicine.manufacturer,
+        'price': medicine.price,
+        'gst_percent': medicine.gst_percent,
+        'quantity': medicine.quantity,
+        'expiry_date': medicine.expiry_date.isoformat(),
+    }
+
+
+def _patient_result(patient):
+    return {
+        'id': patient.id,
+        'label': patient.full_name,
+        'first_name': patient.first_name,
+        'last_name': patient.last_name,
+        'date_of_birth': patient.date_of_birth.isoformat(),
+        'gender': patient.gender,
+        'phone_number': patient.phone_number,
+        'blood_group': patient.blood_group,
+        'allergies': patient.allergies,
+    }
+
+
+def _customer_result(customer):
+    return {
+        'id': customer.id,
+        'label': customer.name,
+        'phone_number': customer.phone_number,
+        'email': customer.email,
+    }
+
+
+# name -> (model, indexed search key, result serialiser)
+SEARCHES = {
+    'medicines': (Medicine, medicine_search_key, _medicine_result),
+    'patients': (Patient, patient_search_key, _patient_result),
+    'customers': (Customer, customer_search_key, _customer_result),
+}
+
+
+def _successor(prefix):
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _phase_query(model, key, term, phase, after, filters):
+    is_prefix = and_(key >= term, key < _successor(term))
+    if phase == 0:
+        condition = is_prefix
+    else:
+        condition = and_(key.like(f'%{_escape_like(term)}%', escape='\\'), not_(is_prefix))
+
+    query = db.session.query(model, key).filter(condition, *filters)
+    if after is not None:
+        after_key, after_id = after
+        query = query.filter(or_(key > after_key, and_(key == after_key, model.id > after_id)))
+    return query.order_by(key, model.id)
+
+
+def _with_timeout(query, limit, remaining_ms):
+    """Run ``query`` with a statement timeout on PostgreSQL; None if it is cancelled."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return query.limit(limit).all()
+    previous = db.session.execute(text('SHOW statement_timeout')).scalar()
+    savepoint = db.session.begin_nested()
+    try:
+        db.session.execute(text(f'SET LOCAL statement_timeout = {max(int(remaining_ms), 1)}'))
+        rows = query.limit(limit).all()
+    except OperationalError:
+        # Rolling back to the savepoint also undoes the SET LOCAL
+        savepoint.rollback()
+        return None
+    # SET LOCAL outlives a released savepoint, so put the previous timeout back first
+    db.session.execute(text("SELECT set_config('statement_timeout', :previous, true)"), {'previous': previous})
+    savepoint.commit()
+    return rows
+
+
+def search(name, term, limit=10, cursor=None, filters=()):
+    """
+    Return one page of typeahead matches for ``term``.
+
+    Args:
+        name (str): One of SEARCHES ('medicines', 'patients', 'customers').
+        term (str): What the user typed; matched case-insensitively.
+        limit (int): Page size, capped at MAX_LIMIT.
+        cursor (str): ``next_cursor`` from a previous page.
+        filters (tuple): Extra filter criteria, e.g. ``Medicine.quantity > 0``.
+
+    Returns:
+        dict: 'results' (serialised matches), 'next_cursor' (None on the last
+              page) and 'partial' (True if the latency budget cut the
+              substring phase short).
+    """
+    model, key, serialise = SEARCHES[name]
+    term = (term or '').strip().lower()
+    limit = max(1, min(limit, MAX_LIMIT))
+    if not term:
+        return {'results': [], 'next_cursor': None, 'partial': False}
+
+    budget_ms = current_app.config.get('TYPEAHEAD_BUDGET_MS', 150)
+    started = time.perf_counter()
+
+    phase, after = 0, None
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None and len(position) == 3 and position[0] in (0, 1):
+        phase, after = position[0], (position[1], position[2])
+
+    rows = []
+    partial = False
+    while phase <= 1 and len(rows) <= limit:
+        query = _phase_query(model, key, term, phase, after, filters)
+        wanted = limit + 1 - len(rows)
+        if phase == 0:
+            found = query.limit(wanted).all()
+        else:
+            remaining_ms = budget_ms - (time.perf_counter() - started) * 1000
+            found = _with_timeout(query, wanted, remaining_ms) if remaining_ms > 0 else None
+            if found is None:
+                partial = True
+                break
+        rows.extend((phase, row, row_key) for row, row_key in found)
+        if len(rows) > limit:
+            break
+        phase, after = phase + 1, None
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_phase, last, last_key = rows[-1]
+        next_cursor = encode_cursor([last_phase, last_key, last.id])
+    elif partial:
+        # Let the client resume the substring phase where the budget ran out
+        after_key, after_id = after or ('', 0)
+        next_cursor = encode_cursor([1, after_key, after_id])
+    return {
+        'results': [serialise(row) for _, row, _ in rows],
+        'next_cursor': next_cursor,
+        'partial': partial,
+    }
+
@@ -8,45 +8,38 @@ Usage:
     # Development
     python wsgi.py
 
-    # Production with Gunicorn
-    gunicorn --bind 0.0.0.0:5000 wsgi:app
+    # Production with Gunicorn (settings from gunicorn.conf.py / deploy_profile.py).
+    # Migrations run once in the gunicorn master before workers start; use
+    # RUN_MIGRATIONS=0 and `flask prestart` to run them as a release step instead.
+    gunicorn wsgi:application
     
     # Production with specific workers
-    gunicorn --workers 4 --bind 0.0.0.0:5000 wsgi:app
+    WEB_CONCURRENCY=4 GUNICORN_THREADS=8 gunicorn wsgi:application
 """
 
 import os
 import sys
-from werkzeug.security import generate_password_hash
+
+import click
 
 # Add the current directory to the Python path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app import app, create_default_admin
-from models import User, db
-from alembic import command as alembic_command
-from alembic.config import Config as AlembicConfig
+from app import app
+from startup import prestart, start_background_workers
 
 # Set production configuration if environment is production
 config_name = os.environ.get('FLASK_ENV', 'development')
 
-# Run migrations (optional) and ensure default admin exists
-with app.app_context():
+# Under gunicorn, gunicorn.conf.py runs the pre-start step once in the master
+# and starts the background threads in each worker after the fork; the flask
+# CLI (which also loads this module) needs neither
+if 'gunicorn' not in sys.modules and click.get_current_context(silent=True) is None:
     try:
-        if os.environ.get('RUN_MIGRATIONS', '1') == '1':
-            # Alembic migration upgrade to head
-            alembic_ini_path = os.path.join(os.path.dirname(__file__), 'migrations', 'alembic.ini')
-            if os.path.exists(alembic_ini_path):
-                alembic_cfg = AlembicConfig(alembic_ini_path)
-                alembic_command.upgrade(alembic_cfg, 'head')
-                print("✅ Alembic migrations applied")
-            else:
-                print("⚠️ Alembic config not found; skipping migrations")
-
-        # Create default admin (does NOT create tables; assumes migrations applied)
-        create_default_admin()
+        prestart(app, migrate=os.environ.get('RUN_MIGRATIONS', '1') == '1')
     except Exception as e:
         print(f"❌ Startup initialization error: {e}")
+    start_background_workers(app)
 
 # WSGI application object
 application = app